@@ -0,0 +1,129 @@
+import sys
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+from datetime import datetime
+
+# 任务类型 -> 系统命令
+ACTION_COMMANDS = {
+    '关机': ['powershell', '-Command', "Start-Process shutdown -ArgumentList '/s /t 0' -Verb RunAs"],
+    # 通过计划任务以最高权限重启，锁屏状态下也能执行，见 README
+    '重启': ['schtasks', '/run', '/tn', '定时软件调用重启'],
+    '锁定': ['rundll32.exe', 'user32.dll,LockWorkStation'],
+}
+
+
+class ActionResult:
+    __slots__ = 'task_id', 'action', 'command', 'started_at', 'duration', 'exit_code', 'timed_out', 'error'
+
+    def __init__(self, task_id, action, command, started_at, duration=0.0, exit_code=None, timed_out=False, error=None):
+        self.task_id = task_id
+        self.action = action
+        self.command = command
+        self.started_at = started_at
+        self.duration = duration
+        self.exit_code = exit_code
+        self.timed_out = timed_out
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.exit_code == 0 and not self.timed_out and self.error is None
+
+    def to_dict(self):
+        return {
+            'task_id': self.task_id,
+            'action': self.action,
+            'command': self.command,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': round(self.duration, 3),
+            'exit_code': self.exit_code,
+            'timed_out': self.timed_out,
+            'error': self.error,
+        }
+
+
+class ActionRunner:
+    """
+    动作执行器：run 立即返回，不占用调度线程；执行结果按任务保存最近 history_size 条，
+    并回调 listeners(result)
+    """
+    def __init__(self, timeout=60, history_size=20):
+        self.timeout = timeout
+        self.history_size = history_size
+        self.listeners = []
+        self._history = {}
+        self._lock = threading.Lock()
+
+    def run(self, task_id, action):
+        raise NotImplementedError
+
+    def get_history(self, task_id):
+        with self._lock:
+            return list(self._history.get(task_id, ()))
+
+    def forget(self, task_id):
+        with self._lock:
+            self._history.pop(task_id, None)
+
+    def _record(self, result):
+        with self._lock:
+            history = self._history.get(result.task_id)
+            if history is None:
+                history = self._history[result.task_id] = deque(maxlen=self.history_size)
+            history.append(result)
+        for callback in self.listeners:
+            try:
+                callback(result)
+            except Exception as e:
+                logging.warning('动作结果回调异常：%s', e)
+
+
+class SubprocessRunner(ActionRunner):
+    """用子进程执行系统命令，超时后结束进程"""
+    def run(self, task_id, action):
+        command = ACTION_COMMANDS[action]
+        started_at = datetime.now()
+        start = time.monotonic()
+        kwargs = {}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        try:
+            proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **kwargs)
+        except OSError as e:
+            self._record(ActionResult(task_id, action, command, started_at, time.monotonic() - start, error=str(e)))
+            return
+        threading.Thread(
+            target=self._wait, args=(proc, task_id, action, command, started_at, start),
+            name=f'action-{action}', daemon=True
+        ).start()
+
+    def _wait(self, proc, task_id, action, command, started_at, start):
+        timed_out = False
+        error = None
+        try:
+            _, stderr = proc.communicate(timeout=self.timeout)
+            if proc.returncode != 0 and stderr:
+                error = stderr.decode(errors='replace').strip()[:500] or None
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            proc.kill()
+            proc.communicate()
+        self._record(ActionResult(
+            task_id, action, command, started_at, time.monotonic() - start,
+            exit_code=proc.returncode, timed_out=timed_out, error=error
+        ))
+
+
+class FakeRunner(ActionRunner):
+    """不执行任何命令，按给定退出码立即记录结果，用于测试和非 Windows 环境"""
+    def __init__(self, exit_code=0, **kwargs):
+        super().__init__(**kwargs)
+        self.exit_code = exit_code
+        self.calls = []
+
+    def run(self, task_id, action):
+        self.calls.append((task_id, action))
+        self._record(ActionResult(task_id, action, ACTION_COMMANDS.get(action), datetime.now(), exit_code=self.exit_code))
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+_listener = None
+
+
+def app_data_dir():
+    """用户数据目录：Windows 为 %APPDATA%\\dingshitixing，其他系统为 ~/.dingshitixing"""
+    base = os.environ.get('APPDATA') if sys.platform == 'win32' else None
+    if base:
+        return os.path.join(base, 'dingshitixing')
+    return os.path.join(os.path.expanduser('~'), '.dingshitixing')
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志一行 JSON，便于日志系统采集"""
+    def format(self, record):
+        item = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            item['exc'] = self.formatException(record.exc_info)
+        return json.dumps(item, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按日志模板限流：同一模板每 interval 秒最多输出 burst 条，
+    之后再放行时在消息末尾注明期间被抑制的条数
+    """
+    def __init__(self, burst=20, interval=60.0, clock=time.monotonic):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.clock = clock
+        self._windows = {}  # (logger, 模板) -> [窗口开始, 已输出, 已抑制]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = self.clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if len(self._windows) > 10000:
+                    # 模板数量异常增长时清理，防止内存无限增长
+                    self._windows = {key: self._windows[key]}
+                if suppressed:
+                    record.msg = f'{record.msg}（前{self.interval:g}秒内另有{suppressed}条相同日志被抑制）'
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """队列满时直接丢弃，写日志永远不会阻塞调度线程"""
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(options, console=False, level=None):
+    """
+    日志管道：各线程只把记录放入有界队列，由后台 QueueListener 写入按大小或按时间轮转的文件，
+    可选 JSON Lines 格式；返回日志文件路径
+    """
+    global _listener
+    level = (level or options.get('level', 'INFO')).upper()
+    log_dir = options.get('dir') or os.path.join(app_data_dir(), 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, options.get('file', 'app.log'))
+    if options.get('rotation', 'size') == 'time':
+        file_handler = TimedRotatingFileHandler(
+            path, when=options.get('when', 'midnight'), backupCount=options.get('backup_count', 7), encoding='utf-8'
+        )
+    else:
+        file_handler = RotatingFileHandler(
+            path, maxBytes=options.get('max_bytes', 10 * 1024 * 1024),
+            backupCount=options.get('backup_count', 5), encoding='utf-8'
+        )
+    if options.get('json'):
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s [%(threadName)s] %(message)s')
+    handlers = [file_handler]
+    if console or options.get('console'):
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.Queue(options.get('queue_size', 10000))
+    queue_handler = DroppingQueueHandler(log_queue)
+    rate_limit = options.get('rate_limit', {})
+    if rate_limit.get('burst'):
+        queue_handler.addFilter(RateLimitFilter(rate_limit['burst'], rate_limit.get('interval', 60)))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return path
+
+
+def shutdown_logging():
+    """停止后台写日志线程，先把队列中剩余的记录写完"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
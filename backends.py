@@ -0,0 +1,505 @@
+"""
+调度后端：引擎只通过 SchedulerBackend 的接口管理作业，可按部署在 settings.json 的 scheduler_backend 中选择
+apscheduler（默认，每个任务一个 APScheduler 作业，支持作业持久化和补执行）或 heap（按触发时刻分组的最小堆）
+"""
+import time
+import heapq
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SchedulerBackend:
+    """
+    后端接口。func(task_id) 为任务到点时调用的入口，在后端的线程池中执行；
+    options 为 core.job_options 生成的 executor、max_instances、coalesce、misfire_grace_time
+    """
+    def __init__(self, settings, metrics, func):
+        self.settings = settings
+        self.metrics = metrics
+        self.func = func
+
+    timezone = None
+
+    def start(self, paused=False):
+        raise NotImplementedError
+
+    def shutdown(self):
+        raise NotImplementedError
+
+    def schedule(self, task_id, trigger, signature, options):
+        # 新增或原地替换任务作业，下次执行时间从当前时刻重新计算
+        raise NotImplementedError
+
+    def unschedule(self, task_id):
+        raise NotImplementedError
+
+    def reschedule(self, task_id, trigger):
+        # 只更换触发器，保留其他选项；任务没有作业时忽略
+        raise NotImplementedError
+
+    def next_fire_time(self, task_id):
+        raise NotImplementedError
+
+    def jobs(self):
+        # [(任务ID, 触发器, 下次执行时间)]
+        raise NotImplementedError
+
+    def jobs_by_time(self):
+        # 按下次执行时间升序的 [(任务ID, 触发器, 下次执行时间)]，不含暂停的作业；可以是按需读取的迭代器
+        return sorted((job for job in self.jobs() if job[2] is not None), key=lambda job: job[2])
+
+    def next_fire_times(self, until=None):
+        # {任务ID: 下次执行时间}，只含 until 及之前的，None 时不限
+        return {
+            task_id: next_time for task_id, trigger, next_time in self.jobs()
+            if next_time is not None and (until is None or next_time <= until)
+        }
+
+    def count(self):
+        raise NotImplementedError
+
+    def add_periodic(self, func, seconds, executor, job_id):
+        # 内部周期作业（如法定日刷新），立即执行一次，之后每 seconds 秒执行
+        raise NotImplementedError
+
+    def saved_jobs(self):
+        # 持久化的作业 [(任务ID, 签名, 触发器, 下次执行时间, 线程池)]，不支持持久化的后端返回空
+        return []
+
+    def set_next_fire_time(self, task_id, next_time):
+        raise NotImplementedError
+
+    def submit(self, task_id, executor, fire_date=None):
+        # 立即在指定线程池中执行一次（补执行）
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def resume(self):
+        raise NotImplementedError
+
+    @property
+    def paused(self):
+        raise NotImplementedError
+
+    def queue_depths(self):
+        # {线程池名: 排队中的作业数}
+        return {}
+
+
+def _pool_depth(pool):
+    # 读取线程池内部队列长度，concurrent.futures 未公开该值
+    queue = getattr(pool, '_work_queue', None)
+    return queue.qsize() if queue is not None else None
+
+
+class APSchedulerBackend(SchedulerBackend):
+    """
+    每个任务一个 APScheduler 作业，任务作业放在 tasks 作业库（jobstore.path 非空时持久化到 SQLite），
+    内部周期作业放在内存库
+    """
+    def __init__(self, settings, metrics, func):
+        super().__init__(settings, metrics, func)
+        self.scheduler = None
+        self.jobstore = None
+
+    @property
+    def timezone(self):
+        return self.scheduler.timezone
+
+    def start(self, paused=False):
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.executors.pool import ThreadPoolExecutor as APSThreadPoolExecutor
+        from apscheduler.jobstores.memory import MemoryJobStore
+        # 每类动作使用独立线程池，慢的系统命令或网络请求不会占满提醒线程
+        executors = {name: APSThreadPoolExecutor(size) for name, size in self.settings['executors'].items()}
+        options = self.settings['jobstore']
+        if options.get('path'):
+            from jobstore import SQLiteJobStore
+            self.jobstore = SQLiteJobStore(options['path'])
+        else:
+            self.jobstore = MemoryJobStore()
+        jobstores = {'default': MemoryJobStore(), 'tasks': self.jobstore}
+        self.scheduler = BackgroundScheduler(
+            executors=executors, jobstores=jobstores, job_defaults=self.settings['job_defaults']
+        )
+        self.scheduler.add_listener(self.on_scheduler_event)
+        self.scheduler.start(paused=paused)
+
+    def shutdown(self):
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def on_scheduler_event(self, event):
+        from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES
+        if event.code == EVENT_JOB_SUBMITTED:
+            # 计划触发时间与实际提交到线程池的时间差
+            now = datetime.now(self.scheduler.timezone)
+            for run_time in event.scheduled_run_times:
+                self.metrics.observe('fire_delay_seconds', max((now - run_time).total_seconds(), 0.0))
+        elif event.code == EVENT_JOB_MISSED:
+            self.metrics.inc('skipped_fires', reason='misfire')
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            self.metrics.inc('skipped_fires', reason='max_instances')
+
+    def schedule(self, task_id, trigger, signature, options):
+        # 已存在的作业原地替换，不会先删除再添加；签名随作业保存，重启后据此判断是否需要重建
+        self.scheduler.add_job(
+            self.func, trigger, args=[task_id], kwargs={'signature': signature}, id=f'task_{task_id}',
+            jobstore='tasks', replace_existing=True, **options
+        )
+
+    def unschedule(self, task_id):
+        from apscheduler.jobstores.base import JobLookupError
+        try:
+            self.scheduler.remove_job(f'task_{task_id}', jobstore='tasks')
+        except JobLookupError:
+            pass
+
+    def reschedule(self, task_id, trigger):
+        if self.scheduler.get_job(f'task_{task_id}', jobstore='tasks'):
+            self.scheduler.reschedule_job(f'task_{task_id}', jobstore='tasks', trigger=trigger)
+
+    def next_fire_time(self, task_id):
+        job = self.scheduler.get_job(f'task_{task_id}', jobstore='tasks')
+        return job.next_run_time if job else None
+
+    def jobs(self):
+        return [
+            (job.args[0], job.trigger, job.next_run_time)
+            for job in self.scheduler.get_jobs(jobstore='tasks') if job.args
+        ]
+
+    def jobs_by_time(self):
+        # 持久化作业库按时间索引分批读取；内存库本身就按下次执行时间排序
+        if hasattr(self.jobstore, 'iter_jobs'):
+            jobs = self.jobstore.iter_jobs()
+        else:
+            jobs = self.scheduler.get_jobs(jobstore='tasks')
+        for job in jobs:
+            if job.args and job.next_run_time is not None:
+                yield job.args[0], job.trigger, job.next_run_time
+
+    def next_fire_times(self, until=None):
+        if hasattr(self.jobstore, 'next_run_times'):
+            return {job_id[len('task_'):]: next_time for job_id, next_time in self.jobstore.next_run_times(until)}
+        return super().next_fire_times(until)
+
+    def count(self):
+        # 持久化作业库直接计数，避免为统计而反序列化全部作业
+        if hasattr(self.jobstore, 'count'):
+            return self.jobstore.count()
+        return len(self.scheduler.get_jobs(jobstore='tasks'))
+
+    def add_periodic(self, func, seconds, executor, job_id):
+        self.scheduler.add_job(
+            func, 'interval', seconds=seconds, next_run_time=datetime.now(self.scheduler.timezone),
+            id=job_id, executor=executor, replace_existing=True
+        )
+
+    def saved_jobs(self):
+        saved = []
+        for job in self.scheduler.get_jobs(jobstore='tasks'):
+            task_id = job.args[0] if job.args else None
+            saved.append((task_id, job.kwargs.get('signature'), job.trigger, job.next_run_time, job.executor))
+        return saved
+
+    def set_next_fire_time(self, task_id, next_time):
+        self.scheduler.modify_job(f'task_{task_id}', jobstore='tasks', next_run_time=next_time)
+
+    def submit(self, task_id, executor, fire_date=None):
+        # 补执行作业放在内存库，立即执行
+        self.scheduler.add_job(
+            self.func, 'date', run_date=datetime.now(self.scheduler.timezone), args=[task_id],
+            kwargs={'fire_date': fire_date}, executor=executor, misfire_grace_time=None
+        )
+
+    def pause(self):
+        self.scheduler.pause()
+
+    def resume(self):
+        self.scheduler.resume()
+
+    @property
+    def paused(self):
+        from apscheduler.schedulers.base import STATE_PAUSED
+        return self.scheduler.state == STATE_PAUSED
+
+    def queue_depths(self):
+        depths = {}
+        for name in self.settings['executors']:
+            depth = _pool_depth(getattr(self.scheduler._lookup_executor(name), '_pool', None))
+            if depth is not None:
+                depths[name] = depth
+        return depths
+
+
+class _Entry:
+    # 堆后端中的一个作业，用 __slots__ 控制每个任务的内存占用
+    __slots__ = ('key', 'task_id', 'func', 'trigger', 'next_time', 'executor',
+                 'max_instances', 'coalesce', 'grace', 'running')
+
+    def __init__(self, key, task_id, func, trigger, executor, max_instances, coalesce, grace):
+        self.key = key
+        self.task_id = task_id
+        self.func = func
+        self.trigger = trigger
+        self.next_time = None
+        self.executor = executor
+        self.max_instances = max_instances
+        self.coalesce = coalesce
+        self.grace = grace
+        self.running = 0
+
+
+class HeapBackend(SchedulerBackend):
+    """
+    最小堆后端：堆中每个元素是一个触发时刻，同一时刻的所有任务放在同一个桶里，到点只唤醒一次，
+    按线程池分组整批提交，每个时刻只占用一次线程调度。不依赖 APScheduler 的作业和作业库，
+    只复用它的触发器计算下次时间；相同的固定时间触发器在任务间共享，每个时刻只计算一次。
+    不持久化作业，重启时按任务重新生成，停机期间错过的触发不补执行
+    """
+    MAX_WAIT = 60  # 最长睡眠秒数，系统时间被调整后最迟这么久重新计算
+
+    def __init__(self, settings, metrics, func):
+        super().__init__(settings, metrics, func)
+        from tzlocal import get_localzone
+        self.timezone = get_localzone()
+        self._cond = threading.Condition(threading.RLock())
+        self._heap = []  # 触发时刻的时间戳，每个时刻只入堆一次
+        self._buckets = {}  # 时间戳 -> {作业键: _Entry}
+        self._entries = {}  # 作业键 -> _Entry
+        self._shared_triggers = {}  # 触发器描述 -> 共享的触发器实例
+        self._pools = {}
+        self._paused = False
+        self._stopped = False
+        self._thread = None
+
+    def start(self, paused=False):
+        self._pools = {
+            name: ThreadPoolExecutor(size, thread_name_prefix=f'heap-{name}')
+            for name, size in self.settings['executors'].items()
+        }
+        self._paused = paused
+        self._thread = threading.Thread(target=self._run, name='heap-scheduler', daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        for pool in self._pools.values():
+            pool.shutdown(wait=False)
+
+    def _share(self, trigger):
+        # 固定时间类触发器只依赖参数，参数相同即可共享；间隔类触发器带各自的起点，不能共享
+        from apscheduler.triggers.cron import CronTrigger
+        from triggers import DailyTimesTrigger
+        if not isinstance(trigger, (CronTrigger, DailyTimesTrigger)):
+            return trigger
+        key = (type(trigger), str(trigger), str(getattr(trigger, 'timezone', '')))
+        return self._shared_triggers.setdefault(key, trigger)
+
+    def _place(self, entry, next_time):
+        entry.next_time = next_time
+        if next_time is None:
+            return
+        ts = next_time.timestamp()
+        bucket = self._buckets.get(ts)
+        if bucket is None:
+            bucket = self._buckets[ts] = {}
+            heapq.heappush(self._heap, ts)
+        bucket[entry.key] = entry
+
+    def _discard(self, entry):
+        # 从所在的桶中移除；桶空后堆中的时刻留作懒删除，出堆时跳过
+        if entry.next_time is None:
+            return
+        bucket = self._buckets.get(entry.next_time.timestamp())
+        if bucket is not None:
+            bucket.pop(entry.key, None)
+
+    def _add(self, key, task_id, func, trigger, options, next_time=None):
+        job_defaults = self.settings['job_defaults']
+        grace = options.get('misfire_grace_time', job_defaults['misfire_grace_time'])
+        entry = _Entry(
+            key, task_id, func, self._share(trigger), options.get('executor', 'default'),
+            options.get('max_instances', job_defaults['max_instances']),
+            options.get('coalesce', job_defaults['coalesce']), grace
+        )
+        with self._cond:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._discard(old)
+            self._entries[key] = entry
+            head = self._heap[0] if self._heap else None
+            if next_time is None:
+                next_time = entry.trigger.get_next_fire_time(None, datetime.now(self.timezone))
+            self._place(entry, next_time)
+            if entry.next_time is not None and (head is None or entry.next_time.timestamp() < head):
+                self._cond.notify()
+
+    def schedule(self, task_id, trigger, signature, options):
+        self._add(f'task_{task_id}', task_id, self.func, trigger, options)
+
+    def unschedule(self, task_id):
+        with self._cond:
+            entry = self._entries.pop(f'task_{task_id}', None)
+            if entry is not None:
+                self._discard(entry)
+
+    def reschedule(self, task_id, trigger):
+        with self._cond:
+            entry = self._entries.get(f'task_{task_id}')
+            if entry is None:
+                return
+            self._discard(entry)
+            entry.trigger = self._share(trigger)
+            self._place(entry, entry.trigger.get_next_fire_time(None, datetime.now(self.timezone)))
+            self._cond.notify()
+
+    def next_fire_time(self, task_id):
+        entry = self._entries.get(f'task_{task_id}')
+        return entry.next_time if entry is not None else None
+
+    def jobs(self):
+        with self._cond:
+            return [
+                (entry.task_id, entry.trigger, entry.next_time)
+                for entry in self._entries.values() if entry.task_id is not None
+            ]
+
+    def jobs_by_time(self):
+        # 复制时刻堆后逐个弹出，只展开用到的时刻；期间被移走的作业按时刻核对后跳过
+        with self._cond:
+            heap = list(self._heap)
+        seen = set()
+        while heap:
+            ts = heapq.heappop(heap)
+            if ts in seen:
+                continue
+            seen.add(ts)
+            with self._cond:
+                entries = list(self._buckets.get(ts, {}).values())
+            for entry in entries:
+                next_time = entry.next_time
+                if entry.task_id is not None and next_time is not None and next_time.timestamp() == ts:
+                    yield entry.task_id, entry.trigger, next_time
+
+    def count(self):
+        return sum(1 for entry in list(self._entries.values()) if entry.task_id is not None)
+
+    def add_periodic(self, func, seconds, executor, job_id):
+        from apscheduler.triggers.interval import IntervalTrigger
+        now = datetime.now(self.timezone)
+        # 与 apscheduler 后端一致，第一次立即执行，之后按间隔
+        self._add(job_id, None, func, IntervalTrigger(seconds=seconds, start_date=now), {'executor': executor}, next_time=now)
+
+    def set_next_fire_time(self, task_id, next_time):
+        with self._cond:
+            entry = self._entries.get(f'task_{task_id}')
+            if entry is not None:
+                self._discard(entry)
+                self._place(entry, next_time)
+                self._cond.notify()
+
+    def submit(self, task_id, executor, fire_date=None):
+        self._pools[executor].submit(self.func, task_id, fire_date=fire_date)
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def queue_depths(self):
+        depths = {}
+        for name, pool in self._pools.items():
+            depth = _pool_depth(pool)
+            if depth is not None:
+                depths[name] = depth
+        return depths
+
+    def _run(self):
+        with self._cond:
+            while not self._stopped:
+                if self._paused or not self._heap:
+                    self._cond.wait(self.MAX_WAIT)
+                    continue
+                ts = self._heap[0]
+                delay = ts - time.time()
+                if delay > 0:
+                    self._cond.wait(min(delay, self.MAX_WAIT))
+                    continue
+                heapq.heappop(self._heap)
+                bucket = self._buckets.pop(ts, None)
+                if bucket:
+                    self._fire(bucket)
+
+    def _fire(self, bucket):
+        """
+        处理同一时刻到点的一桶作业：逐个检查容错时间和并发数，计算下次时间，再按线程池整批提交
+        """
+        now = datetime.now(self.timezone)
+        batches = {}
+        next_times = {}  # 共享触发器在本时刻只计算一次
+        for entry in bucket.values():
+            fire_time = entry.next_time
+            late = (now - fire_time).total_seconds()
+            if entry.grace is not None and late > entry.grace:
+                self.metrics.inc('skipped_fires', reason='misfire')
+            elif entry.running >= entry.max_instances:
+                self.metrics.inc('skipped_fires', reason='max_instances')
+            else:
+                entry.running += 1
+                batches.setdefault(entry.executor, []).append(entry)
+                self.metrics.observe('fire_delay_seconds', max(late, 0.0))
+            trigger_id = id(entry.trigger)
+            if trigger_id in next_times:
+                next_time = next_times[trigger_id]
+            else:
+                next_time = next_times[trigger_id] = entry.trigger.get_next_fire_time(fire_time, now)
+            if next_time is not None and next_time <= now and entry.coalesce:
+                # 错过多次只保留一次，直接跳到当前之后
+                next_time = entry.trigger.get_next_fire_time(None, now)
+            self._place(entry, next_time)
+        for executor, entries in batches.items():
+            pool = self._pools.get(executor) or self._pools['default']
+            pool.submit(self._run_batch, entries)
+
+    def _run_batch(self, entries):
+        for entry in entries:
+            try:
+                if entry.task_id is None:
+                    entry.func()
+                else:
+                    entry.func(entry.task_id)
+            except Exception:
+                logging.exception('执行作业%s失败', entry.key)
+            finally:
+                with self._cond:
+                    entry.running -= 1
+
+
+BACKENDS = {
+    'apscheduler': APSchedulerBackend,
+    'heap': HeapBackend,
+}
+
+
+def create_backend(settings, metrics, func):
+    name = settings.get('scheduler_backend', 'apscheduler')
+    if name not in BACKENDS:
+        logging.error('未知的调度后端%s，使用 apscheduler', name)
+        name = 'apscheduler'
+    return BACKENDS[name](settings, metrics, func)
@@ -0,0 +1,70 @@
+"""
+冷启动基准：多次以子进程运行 `main.py --headless --dry-run`，统计耗时，
+并检查无界面模式没有加载 PyQt5
+
+用法：python benchmarks/bench_startup.py [--runs 10] [--workdir 目录]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+# 子进程内执行：运行 dry-run 后报告加载的重量级模块
+PROBE = (
+    'import sys, runpy; sys.path.insert(0, {root!r}); sys.argv = [{main!r}, "--headless", "--dry-run"]\n'
+    'try:\n'
+    '    runpy.run_path({main!r}, run_name="__main__")\n'
+    'except SystemExit:\n'
+    '    pass\n'
+    'print("MODULES=" + ",".join(m for m in ("PyQt5", "requests", "apscheduler") if m in sys.modules))\n'
+)
+
+
+def run_once(workdir):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-c', PROBE.format(root=ROOT, main=MAIN)],
+        cwd=workdir, capture_output=True, text=True, encoding='utf-8'
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    modules = ''
+    for line in proc.stdout.splitlines():
+        if line.startswith('MODULES='):
+            modules = line[len('MODULES='):]
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='无界面冷启动耗时基准')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--workdir', default=os.getcwd(), help='tasks.db 所在目录')
+    args = parser.parse_args()
+    timings = []
+    modules = ''
+    for _ in range(args.runs):
+        elapsed, modules = run_once(args.workdir)
+        timings.append(elapsed)
+    result = {
+        'runs': args.runs,
+        'min_s': round(min(timings), 4),
+        'median_s': round(statistics.median(timings), 4),
+        'max_s': round(max(timings), 4),
+        'loaded_modules': modules.split(',') if modules else [],
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if 'PyQt5' in result['loaded_modules']:
+        print('无界面模式加载了 PyQt5', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
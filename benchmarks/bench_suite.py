@@ -0,0 +1,270 @@
+"""
+规模基准：按 CYCLE_TYPES 生成合成任务，测量调度、表格刷新、存储读写和触发路径在不同任务量下的
+耗时与峰值内存，并用模拟时钟测量触发抖动，结果保存为 JSON 便于对比
+
+用法：python benchmarks/bench_suite.py [--sizes 100,1000,10000,100000] [--backend apscheduler,heap] [--output 结果.json] [--skip-gui] [--no-memory]
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core import CYCLE_TYPES, SchedulerEngine, Task, build_trigger  # noqa: E402
+from config import load_settings  # noqa: E402
+from store import TaskStore, new_task_id  # noqa: E402
+from holiday import HolidayCalendar, StaticHolidayProvider  # noqa: E402
+from actions import FakeRunner  # noqa: E402
+from notify import ReminderQueue  # noqa: E402
+
+TASK_TYPES = ['提醒'] * 7 + ['关机', '重启', '锁定']
+
+
+def generate_tasks(n, seed=0):
+    """生成 n 个合成任务，周期类型轮流覆盖 CYCLE_TYPES"""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        cycle_type = CYCLE_TYPES[i % len(CYCLE_TYPES)]
+        ttype = rng.choice(TASK_TYPES)
+        task = {
+            'id': new_task_id(),
+            'name': f'任务{i}',
+            'type': ttype,
+            'content': f'合成任务{i}',
+            'cycle_type': cycle_type,
+            'days': sorted(rng.sample(range(7), rng.randint(1, 7))) if cycle_type == '自定义' else [],
+            'time': f'{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.choice((0, 0, 0, 30)):02d}',
+            'interval': f'00:{rng.randrange(60):02d}:{rng.randrange(1, 60):02d}' if cycle_type == '时间间隔' else '00:00:00',
+            'status': '启用' if rng.random() < 0.9 else '禁用',
+        }
+        if cycle_type == 'Cron表达式':
+            task['cron'] = f"{rng.randrange(60)} {rng.randrange(24)},{rng.randrange(24)} * * {rng.choice(('*', '1-5', '0,6'))}"
+        if ttype == '提醒':
+            task['remind_start'] = '00:00'
+            task['remind_end'] = '23:59'
+        tasks.append(task)
+    return tasks
+
+
+TRACE_MEMORY = True
+
+
+def measure(func):
+    """返回 (结果, 耗时秒, 峰值内存字节)；tracemalloc 会拖慢执行，--no-memory 时只计时"""
+    gc.collect()
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if TRACE_MEMORY:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def record(results, op, elapsed, peak, **extra):
+    item = {'op': op, 'wall_s': round(elapsed, 6), 'peak_mem_bytes': peak}
+    item.update(extra)
+    results.append(item)
+    memory = f'{peak / 1024 / 1024:8.2f} MiB' if peak is not None else ''
+    print(f"  {op:<24} {elapsed * 1000:10.2f} ms  {memory}")
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def simulate_jitter(engine, tasks, horizon=timedelta(hours=1)):
+    """
+    模拟时钟：从各任务触发器算出一小时内的所有触发时刻，按时刻分批调用 trigger_task，
+    记录每次触发相对所在时刻开始处理的延迟，即纯处理开销带来的抖动
+    """
+    tz = engine.backend.timezone
+    now = datetime.now(tz).replace(microsecond=0)
+    end = now + horizon
+    due = {}
+    for task in tasks:
+        if task['status'] != '启用':
+            continue
+        trigger = build_trigger(Task.from_dict(task))
+        if trigger is None:
+            continue
+        fire_time = trigger.get_next_fire_time(None, now)
+        while fire_time is not None and fire_time <= end:
+            due.setdefault(fire_time, []).append(task['id'])
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+    delays = []
+    for fire_time in sorted(due):
+        tick = time.perf_counter()
+        for task_id in due[fire_time]:
+            engine.trigger_task(task_id)
+            delays.append(time.perf_counter() - tick)
+    return {
+        'fires': len(delays),
+        'instants': len(due),
+        'max_batch': max((len(ids) for ids in due.values()), default=0),
+        'jitter_p50_ms': round(percentile(delays, 50) * 1000, 4),
+        'jitter_p95_ms': round(percentile(delays, 95) * 1000, 4),
+        'jitter_p99_ms': round(percentile(delays, 99) * 1000, 4),
+        'jitter_max_ms': round(max(delays, default=0) * 1000, 4),
+    }
+
+
+def bench_size(n, workdir, skip_gui, backend='apscheduler'):
+    print(f'== {n} 个任务（{backend}）==')
+    results = []
+    tasks = generate_tasks(n)
+    store_path = os.path.join(workdir, f'tasks_{backend}_{n}.db')
+    store = TaskStore(store_path, legacy_json=None)
+    _, elapsed, peak = measure(lambda: store.upsert_many(tasks))
+    record(results, 'save_all', elapsed, peak)
+    sample = tasks[n // 2]
+    _, elapsed, peak = measure(lambda: store.upsert(sample))
+    record(results, 'save_one', elapsed, peak)
+    loaded, elapsed, peak = measure(lambda: list(store.iter_tasks()))
+    record(results, 'load_all', elapsed, peak, count=len(loaded))
+
+    calendar = HolidayCalendar(StaticHolidayProvider({}), cache_path=os.path.join(workdir, 'holidays.json'))
+    settings = load_settings(None)
+    settings['jobstore']['path'] = os.path.join(workdir, f'jobs_{backend}_{n}.db')
+    # 不写指标快照，基准不在当前目录留下 metrics.json
+    settings['metrics']['snapshot_path'] = None
+    settings['scheduler_backend'] = backend
+    runner = FakeRunner()
+    engine = SchedulerEngine(store=store, calendar=calendar, settings=settings, action_runner=runner)
+    queue = ReminderQueue()
+    engine.on_reminder = queue.push
+    _, elapsed, peak = measure(lambda: engine.start(refresh_holidays=False, paused=True))
+    record(results, 'engine_start', elapsed, peak)
+    _, elapsed, peak = measure(engine.reload_schedules)
+    record(results, 'reload_unchanged', elapsed, peak)
+
+    def full_rebuild():
+        engine.job_signatures.clear()
+        engine.reload_schedules()
+    _, elapsed, peak = measure(full_rebuild)
+    record(results, 'reload_rebuild', elapsed, peak)
+    target = engine.get_task(sample['id'])
+    _, elapsed, peak = measure(lambda: engine.set_enabled(target['id'], target['status'] != '启用'))
+    record(results, 'toggle_one', elapsed, peak)
+    # 索引筛选和即将执行列表（界面筛选栏、即将执行面板的查询）
+    for op, query in (
+        ('filter_name', lambda: engine.filter_tasks('任务12')),
+        ('filter_combined', lambda: engine.filter_tasks('任务1', '提醒', '每天', '启用')),
+        ('filter_next_hour', lambda: engine.filter_tasks(within=3600)),
+        ('upcoming_50', lambda: engine.upcoming_fires(50)),
+    ):
+        found, elapsed, peak = measure(query)
+        record(results, op, elapsed, peak, count=len(found))
+
+    fire_ids = [task['id'] for task in tasks[:min(n, 10000)]]
+
+    def fire_all():
+        for task_id in fire_ids:
+            engine.trigger_task(task_id)
+    _, elapsed, peak = measure(fire_all)
+    record(results, 'trigger_task', elapsed, peak, fires=len(fire_ids), per_fire_us=round(elapsed / len(fire_ids) * 1e6, 3))
+    jitter, elapsed, peak = measure(lambda: simulate_jitter(engine, tasks))
+    record(results, 'fire_jitter_1h', elapsed, peak, **jitter)
+
+    if not skip_gui:
+        gui_results = bench_gui(engine)
+        for op, elapsed, peak in gui_results:
+            record(results, op, elapsed, peak)
+    engine.shutdown()
+    store.close()
+    return results
+
+
+def bench_gui(engine):
+    try:
+        from PyQt5.QtWidgets import QApplication
+        import gui
+    except ImportError as e:
+        print(f'  跳过界面基准：{e}')
+        return []
+    app = QApplication.instance() or QApplication([])
+    out = []
+    window, elapsed, peak = measure(lambda: gui.MainWindow(engine))
+    out.append(('gui_window_create', elapsed, peak))
+
+    def show_and_paint():
+        window.show()
+        app.processEvents()
+        window.grab()
+    _, elapsed, peak = measure(show_and_paint)
+    out.append(('gui_first_paint', elapsed, peak))
+    _, elapsed, peak = measure(window.refresh_table)
+    out.append(('gui_refresh_table', elapsed, peak))
+
+    def toggle_row():
+        window.on_toggle_clicked(0)
+        app.processEvents()
+    _, elapsed, peak = measure(toggle_row)
+    out.append(('gui_toggle_row', elapsed, peak))
+    window.reminder_timer.stop()
+    window.next_fire_timer.stop()
+    window.tray_icon.hide()
+    window.deleteLater()
+    app.processEvents()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='调度/表格/存储/触发规模基准')
+    parser.add_argument('--sizes', default='100,1000,10000,100000', help='逗号分隔的任务数量')
+    parser.add_argument('--output', help='结果 JSON 路径，默认 benchmarks/results/bench-时间.json')
+    parser.add_argument('--skip-gui', action='store_true', help='不运行界面基准')
+    parser.add_argument('--backend', default='apscheduler', help='调度后端，逗号分隔可对比多个：apscheduler,heap')
+    parser.add_argument('--no-memory', action='store_true', help='不统计峰值内存，计时更准确')
+    args = parser.parse_args()
+    global TRACE_MEMORY
+    TRACE_MEMORY = not args.no_memory
+    sizes = [int(x) for x in args.sizes.split(',') if x.strip()]
+    workdir = tempfile.mkdtemp(prefix='dingshi-bench-')
+    report = {
+        'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'trace_memory': TRACE_MEMORY,
+        'sizes': {},
+    }
+    backends = [name.strip() for name in args.backend.split(',') if name.strip()]
+    try:
+        for n in sizes:
+            for backend in backends:
+                # 只测一个后端时保持原来的结果结构
+                key = str(n) if len(backends) == 1 else f'{n}/{backend}'
+                report['sizes'][key] = bench_size(n, workdir, args.skip_gui, backend)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'结果已保存到 {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
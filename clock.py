@@ -0,0 +1,84 @@
+"""
+时钟监视：比较单调时钟与系统时间的走时，发现系统时间被调整、休眠恢复、时区变化、日期变化
+"""
+import time
+import logging
+import threading
+from datetime import date
+
+
+def current_zone():
+    # 重新读取系统时区（tzlocal 会缓存），返回时区名
+    from tzlocal import reload_localzone
+    return str(reload_localzone())
+
+
+class ClockMonitor:
+    """
+    每 interval 秒检查一次，发现以下情况时回调 on_event(kind, shift)，在监视线程中调用：
+    jump 系统时间被调整，shift 为调整的秒数（正为向前；Linux 下休眠恢复也表现为向前跳变）；
+    resume 监视线程长时间没有运行，多为休眠恢复（Windows 的单调时钟包含休眠时间），shift 为停顿秒数；
+    timezone 时区变化；date 日期变化
+    """
+    def __init__(self, on_event, interval=5, tolerance=2, zone_interval=60,
+                 wall=time.time, monotonic=time.monotonic, zone=current_zone):
+        self.on_event = on_event
+        self.interval = interval
+        self.tolerance = tolerance
+        self.zone_interval = zone_interval
+        self.wall = wall
+        self.monotonic = monotonic
+        self.zone = zone
+        self._last_wall = None
+        self._last_mono = None
+        self._last_date = None
+        self._last_zone = None
+        self._zone_checked = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.check()
+        self._thread = threading.Thread(target=self._loop, name='clock-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                for kind, shift in self.check():
+                    self.on_event(kind, shift)
+            except Exception:
+                logging.exception('处理时钟事件失败')
+
+    def check(self):
+        """
+        与上一次检查比较，返回 [(kind, shift)]；第一次调用只记录基准
+        """
+        wall = self.wall()
+        mono = self.monotonic()
+        events = []
+        if self._last_wall is not None:
+            mono_delta = mono - self._last_mono
+            shift = (wall - self._last_wall) - mono_delta
+            if abs(shift) > self.tolerance:
+                events.append(('jump', shift))
+            elif mono_delta > self.interval * 2 + self.tolerance:
+                events.append(('resume', mono_delta - self.interval))
+        if self._zone_checked is None or mono - self._zone_checked >= self.zone_interval or events:
+            self._zone_checked = mono
+            try:
+                zone = self.zone()
+            except Exception as e:
+                logging.warning('读取系统时区失败：%s', e)
+                zone = self._last_zone
+            if self._last_zone is not None and zone != self._last_zone:
+                events.append(('timezone', 0))
+            self._last_zone = zone
+        today = date.fromtimestamp(wall)
+        if self._last_date is not None and today != self._last_date:
+            events.append(('date', 0))
+        self._last_wall, self._last_mono, self._last_date = wall, mono, today
+        return events
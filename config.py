@@ -0,0 +1,95 @@
+import os
+import json
+import copy
+import logging
+
+# 可在 settings.json 中覆盖的默认配置，未写的项使用默认值
+DEFAULT_SETTINGS = {
+    # 各类动作独立的线程池大小：提醒、网络请求（法定日刷新）、系统命令（关机/重启/锁定）
+    'executors': {
+        'default': 4,
+        'reminder': 4,
+        'network': 2,
+        'system': 2,
+    },
+    # 任务未单独设置时使用的默认策略
+    'job_defaults': {
+        'coalesce': True,
+        'max_instances': 1,
+        'misfire_grace_time': 60,
+    },
+    # 调度后端：apscheduler 每个任务一个作业，支持持久化和补执行；
+    # heap 按触发时刻分组的最小堆，同一时刻的任务一次唤醒整批处理，任务量大时更快、更省内存，但不持久化
+    'scheduler_backend': 'apscheduler',
+    # 作业持久化（apscheduler 后端）：path 为空时只保存在内存中；catchup 为停机期间错过的触发的处理方式：
+    # run_once 补执行一次，run_all 逐次补执行（最多 catchup_limit 次），skip 跳过
+    'jobstore': {
+        'path': 'jobs.db',
+        'catchup': 'run_once',
+        'catchup_limit': 100,
+    },
+    # 关机/重启/锁定命令的超时时间（秒）和每个任务保留的执行记录条数
+    'action_timeout': 60,
+    'action_history': 20,
+    # 运行指标：定期写入快照文件；http_port 非0时在 127.0.0.1 上提供只读 /metrics 接口
+    'metrics': {
+        'snapshot_path': 'metrics.json',
+        'snapshot_interval': 30,
+        'http_port': 0,
+    },
+    # 本地控制接口（127.0.0.1），同时用于保证只运行一个实例；port 为0时关闭。请求需带 X-Control-Token：
+    # token 为空时首次运行随机生成并保存在 token_path 中
+    'control': {
+        'port': 9107,
+        'token': None,
+        'token_path': 'control.token',
+    },
+    # 时钟监视：每 interval 秒比较单调时钟与系统时间，偏差超过 tolerance 秒视为系统时间被调整
+    'clock': {
+        'interval': 5,
+        'tolerance': 2,
+    },
+    # 日志：dir 为空时写入用户数据目录下的 logs；rotation 为 size（按大小）或 time（按 when 轮转）
+    'logging': {
+        'level': 'INFO',
+        'dir': None,
+        'file': 'app.log',
+        'rotation': 'size',
+        'max_bytes': 10 * 1024 * 1024,
+        'when': 'midnight',
+        'backup_count': 5,
+        'json': False,
+        'console': False,
+        'queue_size': 10000,
+        # 同一条日志模板每 interval 秒最多输出 burst 条
+        'rate_limit': {'burst': 20, 'interval': 60},
+    },
+}
+
+# 任务类型 -> 执行它的线程池
+TYPE_EXECUTORS = {
+    '提醒': 'reminder',
+    '关机': 'system',
+    '重启': 'system',
+    '锁定': 'system',
+}
+
+
+def _merge(base, override):
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_settings(path='settings.json'):
+    settings = copy.deepcopy(DEFAULT_SETTINGS)
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _merge(settings, json.load(f))
+        except Exception as e:
+            logging.error('读取配置%s失败，使用默认配置：%s', path, e)
+    return settings
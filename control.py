@@ -0,0 +1,341 @@
+"""
+本地控制接口：在 127.0.0.1 上提供 JSON HTTP 接口，供脚本批量管理任务；监听端口同时用于保证只运行一个实例
+"""
+import os
+import sys
+import hmac
+import json
+import socket
+import logging
+import secrets
+import threading
+import socketserver
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+from urllib.request import Request, urlopen
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from core import Task
+from transfer import normalize_task
+
+APP_NAME = 'dingshitixing'
+MAX_BODY_BYTES = 64 * 1024 * 1024
+TOKEN_HEADER = 'X-Control-Token'
+
+
+class ControlError(Exception):
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors or []
+
+
+class _Server(ThreadingHTTPServer):
+    # Windows 下 SO_REUSEADDR 允许两个进程绑定同一端口，单实例检测会失效，改用独占绑定
+    allow_reuse_address = sys.platform != 'win32'
+    daemon_threads = True
+
+    def server_bind(self):
+        if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        # 跳过 HTTPServer.server_bind 中的 getfqdn，部分机器上会卡住数秒
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = self.server_address[:2]
+
+
+def call(port, method, path, body=None, token=None, timeout=5):
+    """
+    调用控制接口，返回 (状态码, JSON)；连接失败时抛出 OSError
+    """
+    data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None
+    req = Request(f'http://127.0.0.1:{port}{path}', data=data, method=method)
+    req.add_header('Content-Type', 'application/json; charset=utf-8')
+    if token:
+        req.add_header(TOKEN_HEADER, token)
+    try:
+        with urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read().decode('utf-8'))
+    except Exception as e:
+        # HTTPError 也带有响应体
+        if hasattr(e, 'code') and hasattr(e, 'read'):
+            try:
+                return e.code, json.loads(e.read().decode('utf-8'))
+            except ValueError:
+                return e.code, {}
+        raise
+
+
+def load_token(options):
+    """
+    返回控制接口口令：settings.json 中的 token 优先，否则读取 token_path，不存在时随机生成并保存，
+    防止浏览器中打开的网页向本地接口发送请求
+    """
+    if options.get('token'):
+        return options['token']
+    path = options.get('token_path') or 'control.token'
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    # 只允许当前用户读写
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    logging.info('已生成控制接口口令：%s', os.path.abspath(path))
+    return token
+
+
+def is_running(port):
+    # 端口上是否是本程序的另一个实例；/ping 不需要口令
+    try:
+        status, data = call(port, 'GET', '/ping', timeout=2)
+    except (OSError, ValueError):
+        return False
+    return status == 200 and data.get('app') == APP_NAME
+
+
+class ControlServer:
+    """
+    控制接口服务：先 bind() 占用端口（失败说明可能已有实例在运行），引擎启动后再 start(engine) 开始服务。
+    on_show() 在另一个实例请求显示窗口时回调，在接口线程中调用
+    """
+    def __init__(self, port, token=None):
+        self.port = port
+        self.token = token
+        self.engine = None
+        self.on_show = None
+        self._server = None
+        self._serving = False
+
+    def bind(self):
+        try:
+            self._server = _Server(('127.0.0.1', self.port), self._handler_class())
+        except OSError as e:
+            logging.warning('控制接口端口%s已被占用：%s', self.port, e)
+            return False
+        return True
+
+    def start(self, engine):
+        self.engine = engine
+        self._serving = True
+        threading.Thread(target=self._server.serve_forever, name='control-http', daemon=True).start()
+        logging.info('控制接口：http://127.0.0.1:%s/', self.port)
+
+    def stop(self):
+        if self._server is not None:
+            # shutdown() 会等待 serve_forever 退出，只绑定未服务时直接关闭
+            if self._serving:
+                self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _handler_class(self):
+        control = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.dispatch('GET')
+
+            def do_POST(self):
+                self.dispatch('POST')
+
+            def dispatch(self, method):
+                try:
+                    url = urlparse(self.path)
+                    # 浏览器发出的跨站请求都带 Origin，本接口只供本机脚本调用，一律拒绝
+                    if self.headers.get('Origin') is not None:
+                        raise ControlError(403, '不接受浏览器发起的请求')
+                    if url.path != '/ping' and control.token and \
+                            not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ''), control.token):
+                        raise ControlError(401, '口令错误')
+                    body = self.read_body() if method == 'POST' else None
+                    status, payload = 200, control.handle(method, url.path, parse_qs(url.query), body)
+                except ControlError as e:
+                    status, payload = e.status, {'error': str(e), 'errors': e.errors}
+                except Exception as e:
+                    logging.exception('控制接口处理失败')
+                    status, payload = 500, {'error': str(e)}
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def read_body(self):
+                # 要求 JSON 类型，网页表单等无需预检的 text/plain 请求不会被解析
+                content_type = self.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+                if content_type != 'application/json':
+                    raise ControlError(415, 'Content-Type 应为 application/json')
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > MAX_BODY_BYTES:
+                    raise ControlError(413, '请求体过大')
+                if not length:
+                    return {}
+                try:
+                    return json.loads(self.rfile.read(length).decode('utf-8'))
+                except ValueError as e:
+                    raise ControlError(400, f'JSON 解析失败：{e}')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle(self, method, path, query, body):
+        """
+        路由：返回 JSON 响应，参数或任务有误时抛出 ControlError；批量请求要么全部生效，要么全部拒绝
+        """
+        engine = self.engine
+        if engine is None:
+            raise ControlError(503, '引擎尚未启动')
+        if method == 'GET':
+            if path == '/ping':
+                return {'app': APP_NAME}
+            if path == '/status':
+                return {
+                    'paused': engine.paused, 'tasks': len(engine.tasks), 'scheduled': engine.scheduled_job_count(),
+                    'invalid': len(engine.invalid_records),
+                }
+            if path == '/tasks':
+                # 可选筛选：q 名称子串，type/cycle_type/status 取值，hours 小时内会触发
+                tasks = engine.filter_tasks(
+                    query.get('q', [''])[0], _str_param(query, 'type'), _str_param(query, 'cycle_type'),
+                    _str_param(query, 'status'), _int_param(query, 'hours', 1) * 3600 if 'hours' in query else None
+                ) if query else engine.task_list()
+                return {'tasks': [task.to_dict() for task in tasks]}
+            if path == '/upcoming':
+                limit = _int_param(query, 'limit', 50)
+                hours = _int_param(query, 'hours', 24)
+                until = datetime.now(engine.backend.timezone) + timedelta(hours=hours)
+                return {'fires': [
+                    {'time': fire_time.isoformat(), 'task_id': task.id, 'name': task.name, 'type': task.type}
+                    for fire_time, task in engine.upcoming_fires(limit, until)
+                ]}
+            raise ControlError(404, f'未知接口：{path}')
+        if method != 'POST':
+            raise ControlError(405, f'不支持的方法：{method}')
+        if path == '/tasks/create':
+            # replace 为 true 时已存在的任务ID按导入处理，整条覆盖
+            tasks = self._validate(_items(body, 'tasks'), create=True, replace=bool(body.get('replace')))
+            _apply(engine, upserts=tasks)
+            return {'created': len(tasks), 'ids': [task.id for task in tasks]}
+        if path == '/tasks/update':
+            # 在现有任务上合并修改，读取与写入在引擎锁内完成，不会覆盖界面同时做的修改
+            with engine.lock:
+                tasks = self._validate(_items(body, 'tasks'), create=False)
+                _apply(engine, upserts=tasks)
+            return {'updated': len(tasks)}
+        if path in ('/tasks/enable', '/tasks/disable', '/tasks/delete'):
+            action = path.rsplit('/', 1)[1]
+            with engine.lock:
+                ids = self._existing_ids(_items(body, 'ids'))
+                if action == 'delete':
+                    _apply(engine, deletes=ids)
+                else:
+                    status = '启用' if action == 'enable' else '禁用'
+                    _apply(engine, upserts=self._with_status(ids, status))
+            return {action + 'd': len(ids)}
+        if path == '/pause':
+            engine.pause()
+            return {'paused': True}
+        if path == '/resume':
+            engine.resume()
+            return {'paused': False}
+        if path == '/show':
+            if self.on_show:
+                self.on_show()
+            return {'shown': self.on_show is not None}
+        raise ControlError(404, f'未知接口：{path}')
+
+    def _validate(self, items, create, replace=False):
+        tasks, errors, seen = [], [], set()
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('每个任务应为 JSON 对象')
+                task_id = item.get('id')
+                existing = self.engine.get_task(task_id) if task_id else None
+                if create and existing is not None and not replace:
+                    raise ValueError(f'任务已存在：{task_id}')
+                if not create:
+                    if existing is None:
+                        raise ValueError(f'任务不存在：{task_id}')
+                    # 更新时只需给出要修改的字段；normalize_task 会补上默认值（如全天的提醒时间段），
+                    # 只保留任务原有的和本次给出的字段，未涉及的字段保持不变
+                    item = dict(existing.to_dict(), **item)
+                    task = Task.from_dict({key: value for key, value in normalize_task(item).items() if key in item})
+                else:
+                    task = Task.from_dict(normalize_task(item))
+                if task.id in seen:
+                    raise ValueError(f'同一批次中任务重复：{task.id}')
+                seen.add(task.id)
+                tasks.append(task)
+            except (ValueError, TypeError) as e:
+                # 字段类型不对（如 days 为数字）时转换会抛出 TypeError，同样按任务有误处理
+                errors.append({'index': index, 'error': str(e)})
+        if errors:
+            raise ControlError(400, f'{len(errors)}个任务有误，本批次未做任何修改', errors)
+        return tasks
+
+    def _existing_ids(self, ids):
+        missing = [{'index': i, 'error': f'任务不存在：{task_id}'}
+                   for i, task_id in enumerate(ids) if not isinstance(task_id, str) or self.engine.get_task(task_id) is None]
+        if missing:
+            raise ControlError(400, f'{len(missing)}个任务不存在，本批次未做任何修改', missing)
+        return list(dict.fromkeys(ids))
+
+    def _with_status(self, ids, status):
+        # 如未选择星期的自定义任务不能启用，有一个不能修改则整批拒绝
+        tasks, errors = [], []
+        for index, task_id in enumerate(ids):
+            try:
+                tasks.append(self.engine.get_task(task_id).replace(status=status))
+            except ValueError as e:
+                errors.append({'index': index, 'error': f'{task_id}：{e}'})
+        if errors:
+            raise ControlError(400, f'{len(errors)}个任务有误，本批次未做任何修改', errors)
+        return tasks
+
+
+def open_control(options):
+    """
+    按配置占用控制端口，返回 (ControlServer 或 None, 是否已有实例在运行)；
+    端口被其他程序占用时只记录错误，不影响本程序运行
+    """
+    port = options.get('port')
+    if not port:
+        return None, False
+    server = ControlServer(port, load_token(options))
+    if server.bind():
+        return server, False
+    if is_running(port):
+        return None, True
+    logging.error('端口%s被其他程序占用，控制接口和单实例检测不可用，可在 settings.json 的 control.port 中更换', port)
+    return None, False
+
+
+def _apply(engine, upserts=(), deletes=()):
+    if engine.apply_batch(upserts, deletes) is None:
+        raise ControlError(500, '写入任务存储失败，本批次未做任何修改')
+
+
+def _items(body, key):
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise ControlError(400, f'请求体应为 {{"{key}": [...]}}')
+    return items
+
+
+def _str_param(query, name):
+    return query.get(name, [None])[0] or None
+
+
+def _int_param(query, name, default):
+    try:
+        return max(int(query.get(name, [default])[0]), 1)
+    except ValueError:
+        raise ControlError(400, f'参数{name}应为整数')
@@ -0,0 +1,825 @@
+"""
+调度核心：任务、触发器、存储与执行，不依赖 PyQt5，可独立以无界面方式运行
+"""
+import re
+import sys
+import heapq
+import signal
+import logging
+import threading
+from datetime import datetime, timedelta, time as dtime
+import holiday
+from holiday import HolidayCalendar, AppWorldsProvider
+from store import TaskStore, new_task_id
+from config import TYPE_EXECUTORS, load_settings
+from actions import ACTION_COMMANDS, SubprocessRunner
+from metrics import Metrics, MetricsExporter
+from backends import create_backend
+from clock import ClockMonitor
+from index import TaskIndex
+
+CYCLE_TYPES = [
+    '法定工作日', '法定节假日', '周末', '每天', '自定义', '时间间隔', 'Cron表达式'
+]
+
+TASK_TYPES = ['提醒', '关机', '重启', '锁定']
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+# crontab 星期字段的英文缩写，下标即 crontab 的数字（0为周日）
+CRON_DAY_NAMES = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+def debug_log(msg, *args):
+    # 使用 % 模板延迟格式化，DEBUG 未开启时几乎没有开销
+    logging.debug(msg, *args)
+
+def parse_hms(value):
+    # 'HH:MM:SS' -> (h, m, s)，缺省部分按0处理
+    parts = value.split(':') if value else []
+    h = int(parts[0]) if len(parts) > 0 and parts[0] else 0
+    m = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    s = int(parts[2]) if len(parts) > 2 and parts[2] else 0
+    return h, m, s
+
+def parse_clock(value, field):
+    """
+    严格解析 'HH:MM[:SS]' 为 (h, m, s)，格式或范围不对时抛出 ValueError
+    """
+    try:
+        hms = parse_hms(value)
+    except (ValueError, AttributeError):
+        raise ValueError(f'{field}格式应为 HH:MM:SS：{value}')
+    if not (0 <= hms[0] <= 23 and 0 <= hms[1] <= 59 and 0 <= hms[2] <= 59):
+        raise ValueError(f'{field}超出范围：{value}')
+    return _shared(hms)
+
+_TIME_SPLIT = re.compile(r'[,，;；、\s]+')
+
+def parse_times(value, field='时间'):
+    """
+    解析一个或多个时间点（'09:00, 12:00:30' 或列表），返回去重排序后的 ((h, m, s), ...)
+    """
+    if isinstance(value, str):
+        value = _TIME_SPLIT.split(value.strip())
+    times = {parse_clock(item, field) for item in value or () if item}
+    if not times:
+        raise ValueError(f'{field}不能为空')
+    return _shared(tuple(sorted(times)))
+
+def _cron_day(token):
+    token = token.strip().lower()
+    if token in CRON_DAY_NAMES:
+        return CRON_DAY_NAMES.index(token)
+    if not token.isdigit() or int(token) > 7:
+        raise ValueError(f'星期应为0-7或 sun-sat：{token}')
+    return int(token)
+
+def _cron_weekdays(field):
+    # crontab 的星期 0/7 为周日、1 为周一，APScheduler 的数字 0 为周一；展开后换成英文缩写交给 APScheduler
+    if field in ('*', '?'):
+        return '*'
+    days = set()
+    for item in field.split(','):
+        spec, _, step = item.partition('/')
+        if spec == '*':
+            start, end = 0, 6
+        elif '-' in spec:
+            start, end = map(_cron_day, spec.split('-', 1))
+        else:
+            start = end = _cron_day(spec)
+            if step:
+                end = 6
+        if start > end:
+            raise ValueError(f'星期范围无效：{item}')
+        days.update(day % 7 for day in range(start, end + 1, int(step) if step else 1))
+    return ','.join(CRON_DAY_NAMES[day] for day in sorted(days))
+
+def cron_trigger(expr):
+    """
+    把5段 crontab 表达式（分 时 日 月 周）编译为 CronTrigger，表达式无效时抛出 ValueError；
+    与 crontab 一致，日和周都有限定（都不以 * 开头）时满足其一即触发，用 OrTrigger 组合两个 CronTrigger
+    """
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.combining import OrTrigger
+    from tzlocal import get_localzone
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f'Cron表达式应为5段（分 时 日 月 周）：{expr}')
+    minute, hour, day, month, day_of_week = fields
+    day = '*' if day == '?' else day
+    try:
+        options = {'minute': minute, 'hour': hour, 'month': month, 'second': 0, 'timezone': get_localzone()}
+        weekdays = _cron_weekdays(day_of_week)
+        if day.startswith('*') or day_of_week.startswith('*') or day_of_week == '?':
+            return CronTrigger(day=day, day_of_week=weekdays, **options)
+        return OrTrigger([CronTrigger(day=day, **options), CronTrigger(day_of_week=weekdays, **options)])
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Cron表达式无效：{expr}（{e}）')
+
+# 解析结果和触发器按值共享，上万个任务里相同的时间、时间段、周期只保存一份
+_shared_values = {}
+_shared_triggers = {}
+
+def _shared(value):
+    return _shared_values.setdefault(value, value)
+
+def _shared_trigger(key, factory, store=True):
+    # 固定时间类触发器只依赖参数和时区，参数相同的任务共用一个实例；store 为 False 时只复用已有的，不加入缓存
+    from tzlocal import get_localzone
+    key = key + (str(get_localzone()),)
+    trigger = _shared_triggers.get(key)
+    if trigger is None:
+        trigger = factory()
+        if store:
+            _shared_triggers[key] = trigger
+    return trigger
+
+class Task:
+    """
+    任务：加载时一次性校验并解析，时间、时间段、星期保存为解析后的值，触发路径不再解析字符串；
+    创建后不再修改（用 replace 生成新对象）。仍可按 task['name']、task.get() 读取，to_dict() 得到存储用的字典。
+    time 可以是逗号分隔的多个时间点，合并为一个触发器；Cron表达式周期的表达式保存在 cron 中
+    """
+    FIELDS = (
+        'id', 'name', 'type', 'content', 'cycle_type', 'days', 'time', 'interval', 'cron', 'status',
+        'remind_start', 'remind_end', 'max_instances', 'coalesce', 'misfire_grace_time'
+    )
+    # 可选字段为 None 表示未设置，读取时视为不存在
+    OPTIONAL = ('cron', 'remind_start', 'remind_end', 'max_instances', 'coalesce', 'misfire_grace_time')
+    __slots__ = (
+        'id', 'name', 'type', 'content', 'cycle_type', 'day_mask', 'times', 'interval_hms', 'cron', 'status',
+        'window', 'max_instances', 'coalesce', 'misfire_grace_time', '_trigger'
+    )
+    @classmethod
+    def from_dict(cls, data):
+        """
+        校验并解析存储/界面/导入得到的字典，缺少 id 时生成新 id；任务无效时抛出 ValueError
+        """
+        task = cls.__new__(cls)
+        task.id = str(data.get('id') or '') or new_task_id()
+        name = data.get('name')
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError('任务名称不能为空')
+        task.name = name
+        task.type = sys.intern(str(data.get('type') or '提醒'))
+        if task.type not in TASK_TYPES:
+            raise ValueError(f'未知的任务类型：{task.type}')
+        task.cycle_type = sys.intern(str(data.get('cycle_type') or ''))
+        if task.cycle_type not in CYCLE_TYPES:
+            raise ValueError(f'未知的周期：{task.cycle_type}')
+        task.content = str(data.get('content') or '')
+        task.status = sys.intern(str(data.get('status') or '启用'))
+        if task.status not in ('启用', '禁用'):
+            raise ValueError(f'未知的状态：{task.status}')
+        task.times = parse_times(data.get('time') or '00:00:00')
+        task.interval_hms = parse_clock(data.get('interval') or '00:00:00', '间隔')
+        if task.cycle_type == '时间间隔' and task.interval_hms == (0, 0, 0):
+            raise ValueError('时间间隔不能为0')
+        task.cron = None
+        if task.cycle_type == 'Cron表达式':
+            task.cron = ' '.join(str(data.get('cron') or '').split())
+            if not task.cron:
+                raise ValueError('Cron表达式不能为空')
+            # 编译一次用于校验；已调度过的表达式直接复用，校验本身不加入共享缓存（如编辑时的预览）
+            _shared_trigger(('cron', task.cron), lambda: cron_trigger(task.cron), store=False)
+        task.day_mask = 0
+        if task.cycle_type == '自定义':
+            for day in data.get('days') or []:
+                if not isinstance(day, int) or not 0 <= day <= 6:
+                    raise ValueError(f'星期应为0-6（0为周一）：{day}')
+                task.day_mask |= 1 << day
+            # 未选择星期的任务只能禁用保存，不会调度
+            if not task.day_mask and task.status == '启用':
+                raise ValueError('自定义周期至少选择一天')
+        task.window = None
+        # Cron表达式自身限定了触发的时段，不再叠加提醒时间段
+        if task.type == '提醒' and data.get('remind_start') and not task.cron:
+            start = parse_clock(data['remind_start'], '提醒开始时间')
+            end = parse_clock(data.get('remind_end') or '23:59', '提醒结束时间')
+            task.window = _shared((dtime(*start), dtime(*end)))
+        task.max_instances = task.coalesce = task.misfire_grace_time = None
+        if data.get('max_instances') not in (None, ''):
+            task.max_instances = int(data['max_instances'])
+            if task.max_instances < 1:
+                raise ValueError(f"最大并发数不能小于1：{data['max_instances']}")
+        if data.get('coalesce') is not None:
+            task.coalesce = bool(data['coalesce'])
+        if data.get('misfire_grace_time') is not None:
+            # 0 表示不限制补执行时间
+            task.misfire_grace_time = int(data['misfire_grace_time'])
+            if task.misfire_grace_time < 0:
+                raise ValueError(f"补执行容错不能小于0：{data['misfire_grace_time']}")
+        return task
+    def to_dict(self):
+        return {key: self[key] for key in self.FIELDS if key in self}
+    def replace(self, **changes):
+        return Task.from_dict(dict(self.to_dict(), **changes))
+    @property
+    def days(self):
+        return [day for day in range(7) if self.day_mask >> day & 1]
+    @property
+    def time(self):
+        return ','.join('%02d:%02d:%02d' % hms for hms in self.times)
+    @property
+    def interval(self):
+        return '%02d:%02d:%02d' % self.interval_hms
+    @property
+    def remind_start(self):
+        return self.window[0].strftime('%H:%M') if self.window else None
+    @property
+    def remind_end(self):
+        return self.window[1].strftime('%H:%M') if self.window else None
+    @property
+    def trigger(self):
+        # 第一次用到时生成并缓存，任务无需调度时为 None
+        try:
+            return self._trigger
+        except AttributeError:
+            return self.compile_trigger()
+    def compile_trigger(self):
+        # 重新生成触发器（如时区变化后）
+        self._trigger = build_trigger(self)
+        return self._trigger
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in self.OPTIONAL:
+            raise KeyError(key)
+        return value
+    def __contains__(self, key):
+        return key in self.FIELDS and (key not in self.OPTIONAL or getattr(self, key) is not None)
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+    def __repr__(self):
+        return f'<Task {self.id} {self.name!r} {self.cycle_type} {self.time}>'
+
+def build_trigger(task, shared=True):
+    """
+    根据任务周期生成触发器，任务无需调度时返回None；
+    提醒时间段直接体现在触发器中，时间段外不会触发；多个时间点合并在同一个触发器中，每个任务只有一个作业。
+    shared 为 False 时（如编辑时的预览）新生成的触发器不加入共享缓存
+    """
+    # APScheduler 较重，用到时才导入
+    from apscheduler.triggers.interval import IntervalTrigger
+    from triggers import HolidayTrigger, WeekdayTrigger, WindowedIntervalTrigger, window_contains
+    cycle_type = task.cycle_type
+    window = task.window
+    if cycle_type == '时间间隔':
+        interval_h, interval_m, interval_s = task.interval_hms
+        if window:
+            return WindowedIntervalTrigger(window[0], window[1], hours=interval_h, minutes=interval_m, seconds=interval_s)
+        return IntervalTrigger(hours=interval_h, minutes=interval_m, seconds=interval_s)
+    if cycle_type == 'Cron表达式':
+        cron = task.cron
+        return _shared_trigger(('cron', cron), lambda: cron_trigger(cron), shared)
+    times = task.times
+    if window:
+        # 落在提醒时间段外的时间点永远不会提醒，全部在外时无需调度
+        times = _shared(tuple(hms for hms in times if window_contains(window[0], window[1], dtime(*hms))))
+        if not times:
+            return None
+    if cycle_type in ('法定工作日', '法定节假日'):
+        workday = cycle_type == '法定工作日'
+        return _shared_trigger((HolidayTrigger, workday, times), lambda: HolidayTrigger(workday=workday, times=times), shared)
+    if cycle_type == '每天':
+        mask = 0x7f
+    elif cycle_type == '周末':
+        mask = 0x60
+    else:
+        mask = task.day_mask
+    days = [day for day in range(7) if mask >> day & 1]
+    if not days:
+        return None
+    return _shared_trigger((WeekdayTrigger, mask, times), lambda: WeekdayTrigger(days, times), shared)
+
+def as_task(task):
+    return task if isinstance(task, Task) else Task.from_dict(task)
+
+def describe_cycle(task):
+    # 表格“周期”列的显示文本
+    if task.cycle_type == '自定义':
+        return ','.join(WEEKDAY_NAMES[i] for i in task.days) or '未选择星期'
+    if task.cycle_type == '时间间隔':
+        # 显示为"每隔X小时Y分钟Z秒"
+        h, m, s = task.interval_hms
+        parts = []
+        if h > 0:
+            parts.append(f'{h}小时')
+        if m > 0:
+            parts.append(f'{m}分钟')
+        if s > 0:
+            parts.append(f'{s}秒')
+        return '每隔' + ''.join(parts) if parts else '每隔1秒'
+    if task.cycle_type == 'Cron表达式':
+        return f'Cron {task.cron}'
+    return task.cycle_type
+
+# 触发器生成规则变化时加一，已持久化的作业签名随之失效并按新规则重建
+TRIGGER_VERSION = 5
+
+def schedule_signature(task):
+    # 只包含影响调度的字段，签名不变则无需重建触发器
+    return (
+        TRIGGER_VERSION, task.status, task.cycle_type, task.day_mask, task.times, task.interval_hms, task.cron, task.type,
+        task.window, task.max_instances, task.coalesce, task.misfire_grace_time
+    )
+
+def job_options(task):
+    """
+    任务的执行选项：按类型分配线程池，任务单独设置的并发数、合并、容错时间覆盖默认值
+    """
+    options = {'executor': TYPE_EXECUTORS.get(task.type, 'default')}
+    if task.max_instances:
+        options['max_instances'] = task.max_instances
+    if task.coalesce is not None:
+        options['coalesce'] = task.coalesce
+    if task.misfire_grace_time is not None:
+        # 0 表示不限制补执行时间
+        options['misfire_grace_time'] = task.misfire_grace_time or None
+    return options
+
+# 当前运行的引擎，供持久化作业的入口函数 fire_task 使用
+_active_engine = None
+
+def fire_task(task_id, signature=None, fire_date=None):
+    """
+    作业入口：持久化的作业只能引用模块级函数，这里转给当前运行的引擎；
+    signature 是生成作业时的调度签名，重启后据此判断作业是否仍与任务一致
+    """
+    if _active_engine is not None:
+        _active_engine.trigger_task(task_id, fire_date)
+
+def missed_fire_times(trigger, next_run_time, now, limit):
+    # 从已保存的下次执行时间起，列出停机期间错过的触发时刻（最多 limit 个）
+    missed = []
+    while next_run_time is not None and next_run_time <= now and len(missed) < limit:
+        missed.append(next_run_time)
+        next_run_time = trigger.get_next_fire_time(next_run_time, now)
+    return missed
+
+class SchedulerEngine:
+    """
+    调度引擎：持有任务、存储、法定日日历和调度后端，界面只是它的一个客户端。
+    on_reminder(task) 在提醒触发时回调，on_error(title, exc) 在持久化失败时回调，
+    on_tasks_changed() 在批量修改后回调，均可能在工作线程中调用
+    """
+    def __init__(self, store=None, calendar=None, settings=None, action_runner=None):
+        self.settings = settings if settings is not None else load_settings()
+        if action_runner is None:
+            action_runner = SubprocessRunner(self.settings['action_timeout'], self.settings['action_history'])
+        self.action_runner = action_runner
+        self.action_runner.listeners.append(self.on_action_finished)
+        self.tasks = {}  # 任务ID -> 任务，保持插入顺序
+        self.index = TaskIndex()  # 名称、类型、周期、状态索引，随 tasks 增量维护
+        self.invalid_records = {}  # 任务ID -> (存储中的原始记录, 原因)，加载时校验失败、未调度的任务
+        self.job_signatures = {}  # 任务ID -> 已调度的签名
+        self.store = store
+        self.holiday_calendar = calendar
+        self.backend = None
+        self.on_reminder = None
+        self.on_error = None
+        self.on_tasks_changed = None
+        self.lock = threading.RLock()  # 串行化来自界面和控制接口的修改，任务的增删改都在锁内进行
+        self.metrics = Metrics()
+        self.metrics_exporter = None
+        self.clock_monitor = None
+    def start(self, refresh_holidays=True, paused=False):
+        """
+        启动调度：apscheduler 后端的任务作业保存在持久化作业库中，重启时直接恢复并按 catchup 策略处理停机期间错过的触发；
+        paused 时只加载不执行，也不做补执行
+        """
+        global _active_engine
+        if self.store is None:
+            self.store = TaskStore()
+        # 法定日日历：先读本地缓存，再后台拉取今年和明年的数据
+        if self.holiday_calendar is None:
+            self.holiday_calendar = HolidayCalendar(AppWorldsProvider())
+        self.holiday_calendar.load()
+        self.holiday_calendar.add_listener(self.on_holiday_calendar_updated)
+        holiday.set_default_calendar(self.holiday_calendar)
+        self.backend = create_backend(self.settings, self.metrics, fire_task)
+        # 先暂停启动，恢复作业、补执行处理完再开始调度
+        self.backend.start(paused=True)
+        _active_engine = self
+        self.start_metrics()
+        if refresh_holidays:
+            # 法定日数据刷新放在网络线程池中定期执行
+            self.backend.add_periodic(
+                self.holiday_calendar.prefetch, self.holiday_calendar.check_interval, 'network', 'holiday_refresh'
+            )
+        self.load_tasks()
+        self.restore_jobs(catchup=not paused)
+        self.reload_schedules()
+        if not paused:
+            self.backend.resume()
+        # 系统时间调整、休眠恢复、时区变化时只重新计算受影响的作业，不再定时全量重载
+        self.clock_monitor = ClockMonitor(self.on_clock_event, **self.settings['clock'])
+        self.clock_monitor.start()
+    def restore_jobs(self, catchup=True):
+        """
+        接管后端中已保存的作业：签名与任务一致的保留原下次执行时间，不重新生成；
+        对应任务已删除的作业直接移除，签名不一致的交给 reload_schedules 重建
+        """
+        now = datetime.now(self.backend.timezone)
+        restored = 0
+        for task_id, signature, trigger, next_run_time, executor in self.backend.saved_jobs():
+            task = self.tasks.get(task_id)
+            if task is None:
+                self.backend.unschedule(task_id)
+                continue
+            if signature != schedule_signature(task):
+                continue
+            self.job_signatures[task_id] = signature
+            restored += 1
+            if catchup and next_run_time is not None and next_run_time <= now:
+                self.catch_up(task, trigger, next_run_time, executor, now)
+        if restored:
+            logging.info('已从作业库恢复%s个作业', restored)
+    def catch_up(self, task, trigger, next_run_time, executor, now):
+        """
+        处理停机或休眠期间错过的触发：超过任务补执行容错时间的不再补执行（与调度器的错过处理一致），
+        其余按策略 run_once 补执行一次，run_all 逐次补执行（最多 catchup_limit 次），skip 跳过
+        """
+        options = self.settings['jobstore']
+        policy = options.get('catchup', 'run_once')
+        grace = job_options(task).get('misfire_grace_time', self.settings['job_defaults'].get('misfire_grace_time'))
+        if grace is not None and next_run_time < now - timedelta(seconds=grace):
+            # 例如昨晚错过的关机，开机或唤醒后不应立即执行
+            self.metrics.inc('skipped_fires', reason='misfire')
+            logging.info('任务%s错过的触发已超过补执行容错时间%s秒，不再补执行', task.name, grace)
+            next_run_time = trigger.get_next_fire_time(None, now - timedelta(seconds=grace))
+        missed = missed_fire_times(trigger, next_run_time, now, max(options.get('catchup_limit', 100), 1))
+        if policy == 'run_once':
+            missed = missed[-1:]
+        if missed and policy in ('run_once', 'run_all'):
+            # 按任务类型进入对应线程池，立即执行
+            for fire_time in missed:
+                self.backend.submit(task.id, executor, fire_time.date())
+            self.metrics.inc('catchup_fires', len(missed), policy=policy)
+            logging.info('任务%s停机期间错过%s次触发，按%s补执行', task.name, len(missed), policy)
+        elif missed:
+            self.metrics.inc('skipped_fires', len(missed), reason='downtime')
+            logging.info('任务%s停机期间错过的触发已跳过', task.name)
+        # 跳到当前之后的下一次触发
+        self.backend.set_next_fire_time(task.id, trigger.get_next_fire_time(None, now))
+    def start_metrics(self):
+        self.metrics.register_gauge('executor_queue_depth', self.executor_queue_depths)
+        self.metrics.register_gauge('scheduled_jobs', self.scheduled_job_count)
+        self.metrics.register_gauge('tasks', lambda: len(self.tasks))
+        self.metrics.register_gauge('holiday_fetch_failures', lambda: self.holiday_calendar.fetch_failures)
+        self.metrics.register_gauge('holiday_fallback_lookups', lambda: self.holiday_calendar.fallback_lookups)
+        options = self.settings['metrics']
+        if options.get('snapshot_path') or options.get('http_port'):
+            self.metrics_exporter = MetricsExporter(
+                self.metrics, options.get('snapshot_path'), options.get('snapshot_interval', 30), options.get('http_port', 0)
+            )
+            self.metrics_exporter.start()
+    def scheduled_job_count(self):
+        return self.backend.count()
+    def executor_queue_depths(self):
+        return {(('executor', name),): depth for name, depth in self.backend.queue_depths().items()}
+    def shutdown(self):
+        global _active_engine
+        if _active_engine is self:
+            _active_engine = None
+        if self.clock_monitor is not None:
+            self.clock_monitor.stop()
+            self.clock_monitor = None
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        if self.backend is not None:
+            self.backend.shutdown()
+            self.backend = None
+    def task_list(self):
+        return list(self.tasks.values())
+    def get_task(self, task_id):
+        return self.tasks.get(task_id)
+    def load_tasks(self):
+        # 加载时逐条校验，不会等到触发时才出错；无效的任务不调度，原始记录保留在 invalid_records 中，
+        # 界面启动时提示用户导出修改或删除
+        self.tasks = {}
+        self.invalid_records = {}
+        migrated = []
+        try:
+            for data in self.store.iter_tasks():
+                if data.get('cycle_type') == '自定义' and not data.get('days') and data.get('status', '启用') == '启用':
+                    # 旧版本可以保存未选择星期的自定义任务（从不触发），按禁用加载并写回，不视为无效
+                    data = dict(data, status='禁用')
+                    migrated.append(data)
+                    logging.warning('任务%s为自定义周期但未选择星期，已改为禁用', data['id'])
+                try:
+                    task = Task.from_dict(data)
+                except (ValueError, TypeError) as e:
+                    self.metrics.inc('invalid_tasks')
+                    self.invalid_records[data['id']] = (data, str(e))
+                    logging.error('任务%s无效，未调度：%s', data['id'], e)
+                    continue
+                self.tasks[task.id] = task
+        except Exception as e:
+            logging.error('加载任务失败: %s', e)
+        if migrated:
+            try:
+                self.store.upsert_many(migrated)
+            except Exception as e:
+                logging.error('保存迁移后的任务失败：%s', e)
+        self.index.rebuild(self.tasks.values())
+    def add_task(self, task):
+        # task 为字典时先校验转换，无效时抛出 ValueError；返回保存的 Task
+        task = as_task(task)
+        with self.lock:
+            self.tasks[task.id] = task
+            self.invalid_records.pop(task.id, None)
+            self.index.add(task)
+            self.schedule_task(task)
+            self.save_task(task)
+        return task
+    def update_task(self, task):
+        task = as_task(task)
+        with self.lock:
+            self.tasks[task.id] = task
+            self.index.add(task)
+            self.schedule_task(task)
+            self.save_task(task)
+        return task
+    def upsert_tasks(self, tasks):
+        # 批量新增或覆盖任务（按 id），用于导入
+        return self.apply_batch(upserts=tasks)
+    def apply_batch(self, upserts=(), deletes=()):
+        """
+        批量变更：新增/覆盖和删除在一个事务中写入存储，成功后再更新内存并增量调度；
+        写入失败时内存和调度都保持原样并返回 None。完成后回调 on_tasks_changed
+        """
+        upserts = [as_task(task) for task in upserts]
+        deletes = list(deletes)
+        with self.lock:
+            try:
+                self.store.apply([task.to_dict() for task in upserts], deletes)
+            except Exception as e:
+                self.report_store_error('批量保存任务失败', e)
+                return None
+            with self.metrics.timer('batch_schedule_seconds'):
+                for task_id in deletes:
+                    self.tasks.pop(task_id, None)
+                    self.invalid_records.pop(task_id, None)
+                    self.index.remove(task_id)
+                    self.unschedule_task(task_id)
+                    self.action_runner.forget(task_id)
+                for task in upserts:
+                    self.tasks[task.id] = task
+                    self.invalid_records.pop(task.id, None)
+                    self.index.add(task)
+                    self.schedule_task(task)
+        if self.on_tasks_changed:
+            self.on_tasks_changed()
+        return upserts
+    def remove_task(self, task_id):
+        with self.lock:
+            task = self.tasks.pop(task_id, None)
+            self.invalid_records.pop(task_id, None)
+            self.index.remove(task_id)
+            self.unschedule_task(task_id)
+            self.action_runner.forget(task_id)
+            try:
+                self.store.delete(task_id)
+            except Exception as e:
+                self.report_store_error('删除任务失败', e)
+        return task
+    def set_enabled(self, task_id, enabled):
+        # 读取、替换、保存在同一把锁内，不会覆盖控制接口同时做的修改
+        with self.lock:
+            task = self.tasks[task_id] = self.tasks[task_id].replace(status='启用' if enabled else '禁用')
+            self.index.add(task)
+            self.schedule_task(task)
+            self.save_task(task)
+        return task
+    def save_task(self, task):
+        try:
+            self.store.upsert(task.to_dict())
+        except Exception as e:
+            self.report_store_error('保存任务失败', e)
+    def report_store_error(self, title, e):
+        logging.error('%s: %s', title, e)
+        if self.on_error:
+            self.on_error(title, e)
+    def schedule_task(self, task):
+        """
+        增量调度单个任务：只对该任务的作业做新增、修改或删除
+        """
+        task_id = task.id
+        signature = schedule_signature(task)
+        if self.job_signatures.get(task_id) == signature:
+            return
+        trigger = None
+        if task.status == '启用':
+            try:
+                trigger = task.trigger
+            except Exception as e:
+                logging.warning('任务%s触发器生成失败：%s', task_id, e)
+        if trigger is None:
+            self.unschedule_task(task_id)
+            self.job_signatures[task_id] = signature
+            return
+        self.backend.schedule(task_id, trigger, signature, job_options(task))
+        self.job_signatures[task_id] = signature
+    @property
+    def paused(self):
+        return self.backend.paused
+    def pause(self):
+        # 暂停全部触发，恢复时错过的触发按各任务的合并和容错时间处理
+        self.backend.pause()
+        logging.info('调度已暂停')
+    def resume(self):
+        self.backend.resume()
+        logging.info('调度已恢复')
+    def upcoming_fires(self, limit=50, until=None):
+        """
+        按时间顺序列出即将发生的触发 [(时间, 任务)]：作业按下次执行时间升序读入，与已展开的触发序列用堆归并，
+        只读取和计算用到的部分
+        """
+        jobs = iter(self.backend.jobs_by_time())
+        pending = next(jobs, None)
+        heap = []
+        fires = []
+        loaded = 0  # 读入序号，时间相同时按读入顺序
+        while len(fires) < limit:
+            # 下一个作业不晚于堆顶时才需要读入
+            while pending is not None and (not heap or pending[2] <= heap[0][0]):
+                task_id, trigger, next_time = pending
+                heapq.heappush(heap, (next_time, loaded, task_id, trigger))
+                loaded += 1
+                pending = next(jobs, None)
+            if not heap:
+                break
+            fire_time, order, task_id, trigger = heapq.heappop(heap)
+            if until is not None and fire_time > until:
+                break
+            task = self.tasks.get(task_id)
+            if task is None:
+                continue
+            fires.append((fire_time, task))
+            next_time = trigger.get_next_fire_time(fire_time, fire_time)
+            if next_time is not None:
+                heapq.heappush(heap, (next_time, order, task_id, trigger))
+        return fires
+    def filter_tasks(self, text='', task_type=None, cycle_type=None, status=None, within=None):
+        """
+        按名称子串、类型、周期、状态筛选任务，within 为秒数时只保留该时间内会触发的任务；结果按任务顺序排列
+        """
+        with self.metrics.timer('filter_tasks_seconds'):
+            ids = None
+            if within is not None:
+                until = datetime.now(self.backend.timezone) + timedelta(seconds=within)
+                ids = set(self.backend.next_fire_times(until))
+            tasks = self.tasks
+            return [
+                tasks[task_id] for task_id in self.index.search(
+                    text, ids, type=task_type, cycle_type=cycle_type, status=status
+                ) if task_id in tasks
+            ]
+    def next_fire_time(self, task_id):
+        return self.backend.next_fire_time(task_id)
+    def next_fire_times(self):
+        # 全部任务的下次执行时间 {任务ID: 时间}，一次取出，用于排序
+        return self.backend.next_fire_times()
+    def on_holiday_calendar_updated(self, years):
+        # 日历数据变化后重新计算法定日任务的下次执行时间
+        for task in self.task_list():
+            if task.cycle_type not in ('法定工作日', '法定节假日'):
+                continue
+            trigger = task.trigger
+            if trigger is not None:
+                self.backend.reschedule(task.id, trigger)
+    def on_clock_event(self, kind, shift):
+        """
+        时钟事件，在监视线程中调用，只处理受影响的作业：
+        系统时间向前调整或休眠恢复后，已到期的作业同样经 catch_up 处理，超过补执行容错时间的不再执行（如休眠时错过的关机）；向后调整后，间隔任务从当前时间重新计算；
+        时区变化后重建与本地时间相关的触发器；日期变化时按需拉取法定日数据
+        """
+        self.metrics.inc('clock_events', kind=kind)
+        logging.info('检测到时钟事件：%s，偏移%.0f秒', kind, shift)
+        if kind == 'date':
+            this_year = datetime.now().year
+            calendar = self.holiday_calendar
+            if calendar is not None and (calendar.needs_refresh(this_year) or calendar.needs_refresh(this_year + 1)):
+                threading.Thread(target=calendar.prefetch, name='holiday-prefetch', daemon=True).start()
+            return
+        from apscheduler.triggers.interval import IntervalTrigger
+        with self.lock:
+            paused = self.backend.paused
+            # 处理期间暂停调度，避免与调度线程重复执行同一次触发；恢复时调度线程按新的系统时间重新计算等待时长
+            if not paused:
+                self.backend.pause()
+            try:
+                now = datetime.now(self.backend.timezone)
+                affected = 0
+                for task_id, trigger, next_time in self.backend.jobs():
+                    task = self.tasks.get(task_id)
+                    if task is None:
+                        continue
+                    if kind == 'timezone':
+                        if isinstance(trigger, IntervalTrigger) and not task.window:
+                            continue
+                        trigger = task.compile_trigger()
+                        if trigger is not None:
+                            self.backend.reschedule(task_id, trigger)
+                            affected += 1
+                    elif next_time is not None and next_time <= now:
+                        if not paused:
+                            self.catch_up(task, trigger, next_time, job_options(task)['executor'], now)
+                            affected += 1
+                    elif shift < 0 and isinstance(trigger, IntervalTrigger):
+                        # 时间往回调后，按原下次时间要多等 |shift| 秒
+                        self.backend.set_next_fire_time(task_id, trigger.get_next_fire_time(None, now))
+                        affected += 1
+            finally:
+                if not paused:
+                    self.backend.resume()
+        if affected:
+            logging.info('时钟事件%s影响%s个作业，已重新计算下次执行时间', kind, affected)
+    def unschedule_task(self, task_id):
+        self.job_signatures.pop(task_id, None)
+        self.backend.unschedule(task_id)
+    def reload_schedules(self):
+        # 与当前任务列表做差异对比，只处理有变化的作业
+        with self.metrics.timer('reload_schedules_seconds'):
+            for task_id in list(self.job_signatures):
+                if task_id not in self.tasks:
+                    self.unschedule_task(task_id)
+            for task in self.task_list():
+                self.schedule_task(task)
+    def trigger_task(self, task_id, fire_date=None):
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+        debug_log('调度触发：%s（%s）', task.name, task_id)
+        # 触发器已按日历跳过非匹配日，这里再核对一次，防止触发前日历数据刚好更新；补执行按原触发日期核对
+        cycle_type = task.cycle_type
+        if cycle_type in ('法定工作日', '法定节假日'):
+            is_work = self.holiday_calendar.is_workday(fire_date or datetime.now().date())
+            if cycle_type == '法定工作日' and not is_work:
+                self.metrics.inc('skipped_fires', reason='not_workday')
+                debug_log('今日不是法定工作日，跳过任务%s', task_id)
+                return
+            if cycle_type == '法定节假日' and is_work:
+                self.metrics.inc('skipped_fires', reason='not_holiday')
+                debug_log('今日不是法定节假日，跳过任务%s', task_id)
+                return
+        self.metrics.inc('fires', type=task.type)
+        if task.type == '提醒':
+            if self.on_reminder:
+                self.on_reminder(task)
+            else:
+                logging.info('提醒：%s %s', task.name, task.content or '时间到了！')
+        elif task.type in ACTION_COMMANDS:
+            # 异步启动命令，调度线程立即返回
+            self.action_runner.run(task_id, task.type)
+    def on_action_finished(self, result):
+        outcome = 'ok' if result.ok else ('timeout' if result.timed_out else 'failed')
+        self.metrics.observe('action_duration_seconds', result.duration, action=result.action)
+        self.metrics.inc('action_results', action=result.action, outcome=outcome)
+        if result.ok:
+            logging.info('执行%s命令成功，耗时%.2f秒', result.action, result.duration)
+        elif result.timed_out:
+            logging.error('执行%s命令超时（%s秒），已结束进程', result.action, self.action_runner.timeout)
+        else:
+            logging.error('执行%s命令失败，退出码%s：%s', result.action, result.exit_code, result.error)
+    def action_history(self, task_id):
+        return self.action_runner.get_history(task_id)
+
+def run_headless(settings=None, dry_run=False):
+    """
+    无界面运行调度引擎，直到收到 Ctrl+C / SIGTERM；dry_run 时加载并调度完立即退出
+    """
+    from control import open_control
+    settings = settings if settings is not None else load_settings()
+    control, running = open_control(settings['control'])
+    if running:
+        print(f"已有实例在运行（端口{settings['control']['port']}），请通过控制接口管理任务")
+        return 1
+    engine = SchedulerEngine(settings=settings)
+    # dry_run 只检查加载和调度结果，不执行任务，也不处理停机期间错过的触发
+    engine.start(refresh_holidays=not dry_run, paused=dry_run)
+    scheduled = sum(1 for task_id in engine.tasks if engine.next_fire_time(task_id))
+    logging.info('无界面模式启动：共%s个任务，已调度%s个', len(engine.tasks), scheduled)
+    print(f'已加载{len(engine.tasks)}个任务，已调度{scheduled}个')
+    if engine.invalid_records:
+        print(f'{len(engine.invalid_records)}个任务格式有误未调度，详见日志；可用 --export 导出后修改再 --import')
+    if dry_run:
+        engine.shutdown()
+        if control is not None:
+            control.stop()
+        return 0
+    if control is not None:
+        control.start(engine)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    # 带超时等待，Windows 下 Ctrl+C 才能及时响应
+    while not stop.wait(1):
+        pass
+    if control is not None:
+        control.stop()
+    engine.shutdown()
+    return 0
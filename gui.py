@@ -0,0 +1,866 @@
+import os
+import sys
+import logging
+import ctypes
+import threading
+from datetime import datetime, timedelta
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+    QPushButton, QTableView, QDialog, QLabel, QComboBox,
+    QCheckBox, QFormLayout, QLineEdit, QTimeEdit, QMessageBox, QMenuBar, QAction, QHeaderView, QSpinBox,
+    QSystemTrayIcon, QMenu, QStyledItemDelegate, QStyleOptionButton, QStyle, QAbstractItemView, QFileDialog,
+    QDockWidget, QListWidget
+)
+from PyQt5.QtCore import (
+    Qt, QTime, QTimer, pyqtSignal, QObject, QEvent, QAbstractTableModel, QModelIndex, QRect
+)
+from PyQt5.QtGui import QIcon
+from core import CYCLE_TYPES, TASK_TYPES, WEEKDAY_NAMES, SchedulerEngine, Task, build_trigger, describe_cycle
+from notify import ReminderQueue, format_reminders
+from config import DEFAULT_SETTINGS, load_settings
+from control import open_control, call, load_token
+from transfer import read_tasks, export_tasks
+
+# 即将执行面板显示的条数和时间范围
+UPCOMING_LIMIT = 50
+UPCOMING_HOURS = 24
+# 任务编辑对话框预览的触发次数
+PREVIEW_COUNT = 5
+# 筛选栏的下次执行时间范围：(显示文本, 秒数)
+WITHIN_CHOICES = [('不限时间', None), ('1小时内触发', 3600), ('24小时内触发', 86400), ('7天内触发', 7 * 86400)]
+
+IMPORT_FILTER = '任务文件 (*.csv *.jsonl *.ndjson *.ics);;CSV (*.csv);;JSON Lines (*.jsonl *.ndjson);;iCalendar (*.ics)'
+
+def get_now_hms():
+    now = datetime.now()
+    return now.hour, now.minute, now.second
+
+class CycleSelector(QWidget):
+    """
+    周期选择控件，支持七种周期类型，自定义、时间间隔、Cron表达式时显示不同控件；
+    固定时间点的周期可在“更多时间”中追加多个时间点，与上面的时间合并为一个任务
+    """
+    changed = pyqtSignal()
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        # 周期类型选择
+        type_layout = QHBoxLayout()
+        type_layout.addWidget(QLabel('周期类型：'))
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(CYCLE_TYPES)
+        type_layout.addWidget(self.type_combo)
+        layout.addLayout(type_layout)
+        # 自定义星期选择
+        self.week_layout = QHBoxLayout()
+        self.checks = []
+        self.days = WEEKDAY_NAMES
+        for day in self.days:
+            cb = QCheckBox(day)
+            self.week_layout.addWidget(cb)
+            self.checks.append(cb)
+        layout.addLayout(self.week_layout)
+        # 时间选择区（用三个SpinBox）
+        time_layout = QHBoxLayout()
+        self.time_label = QLabel('时间：')
+        time_layout.addWidget(self.time_label)
+        self.hour_spin = QSpinBox()
+        self.hour_spin.setRange(0, 23)
+        self.hour_spin.setSuffix(' 时')
+        self.minute_spin = QSpinBox()
+        self.minute_spin.setRange(0, 59)
+        self.minute_spin.setSuffix(' 分')
+        self.second_spin = QSpinBox()
+        self.second_spin.setRange(0, 59)
+        self.second_spin.setSuffix(' 秒')
+        # 默认值为当前时间
+        h, m, s = get_now_hms()
+        self.hour_spin.setValue(h)
+        self.minute_spin.setValue(m)
+        self.second_spin.setValue(s)
+        time_layout.addWidget(self.hour_spin)
+        time_layout.addWidget(self.minute_spin)
+        time_layout.addWidget(self.second_spin)
+        layout.addLayout(time_layout)
+        # 追加的时间点
+        extra_layout = QHBoxLayout()
+        self.extra_times_label = QLabel('更多时间：')
+        extra_layout.addWidget(self.extra_times_label)
+        self.extra_times_edit = QLineEdit()
+        self.extra_times_edit.setPlaceholderText('可选，逗号分隔，如 12:00, 18:30:00')
+        extra_layout.addWidget(self.extra_times_edit)
+        layout.addLayout(extra_layout)
+        # Cron表达式
+        cron_layout = QHBoxLayout()
+        self.cron_label = QLabel('表达式：')
+        cron_layout.addWidget(self.cron_label)
+        self.cron_edit = QLineEdit()
+        self.cron_edit.setPlaceholderText('分 时 日 月 周，如 0 9,18 * * 1-5')
+        cron_layout.addWidget(self.cron_edit)
+        layout.addLayout(cron_layout)
+        # 时间间隔区（用三个SpinBox）
+        self.interval_layout = QHBoxLayout()
+        self.interval_label = QLabel('每隔：')
+        self.interval_layout.addWidget(self.interval_label)
+        self.interval_hour_spin = QSpinBox()
+        self.interval_hour_spin.setRange(0, 23)
+        self.interval_hour_spin.setSuffix(' 小时')
+        self.interval_minute_spin = QSpinBox()
+        self.interval_minute_spin.setRange(0, 59)
+        self.interval_minute_spin.setSuffix(' 分钟')
+        self.interval_second_spin = QSpinBox()
+        self.interval_second_spin.setRange(0, 59)
+        self.interval_second_spin.setSuffix(' 秒')
+        self.interval_layout.addWidget(self.interval_hour_spin)
+        self.interval_layout.addWidget(self.interval_minute_spin)
+        self.interval_layout.addWidget(self.interval_second_spin)
+        layout.addLayout(self.interval_layout)
+        self.setLayout(layout)
+        self.type_combo.currentIndexChanged.connect(self.update_week_check_visible)
+        self.update_week_check_visible()
+        # 任一设置变化都通知外部（用于预览）
+        self.type_combo.currentIndexChanged.connect(self.changed)
+        for cb in self.checks:
+            cb.toggled.connect(self.changed)
+        for spin in (self.hour_spin, self.minute_spin, self.second_spin,
+                     self.interval_hour_spin, self.interval_minute_spin, self.interval_second_spin):
+            spin.valueChanged.connect(self.changed)
+        self.extra_times_edit.textChanged.connect(self.changed)
+        self.cron_edit.textChanged.connect(self.changed)
+    def update_week_check_visible(self):
+        ctype = self.type_combo.currentText()
+        week_visible = ctype == '自定义'
+        for cb in self.checks:
+            cb.setVisible(week_visible)
+        # 时间点控件
+        time_visible = ctype not in ('时间间隔', 'Cron表达式')
+        self.time_label.setVisible(time_visible)
+        self.hour_spin.setVisible(time_visible)
+        self.minute_spin.setVisible(time_visible)
+        self.second_spin.setVisible(time_visible)
+        self.extra_times_label.setVisible(time_visible)
+        self.extra_times_edit.setVisible(time_visible)
+        # Cron控件
+        cron_visible = ctype == 'Cron表达式'
+        self.cron_label.setVisible(cron_visible)
+        self.cron_edit.setVisible(cron_visible)
+        # 间隔控件
+        interval_visible = ctype == '时间间隔'
+        self.interval_label.setVisible(interval_visible)
+        self.interval_hour_spin.setVisible(interval_visible)
+        self.interval_minute_spin.setVisible(interval_visible)
+        self.interval_second_spin.setVisible(interval_visible)
+    def get_cycle_type(self):
+        return self.type_combo.currentText()
+    def get_selected_days(self):
+        if self.get_cycle_type() != '自定义':
+            return []
+        return [i for i, cb in enumerate(self.checks) if cb.isChecked()]
+    def get_time(self):
+        # 返回 (hour, minute, second)
+        return self.hour_spin.value(), self.minute_spin.value(), self.second_spin.value()
+    def get_times(self):
+        # 上面的时间加上追加的时间点，逗号分隔，格式由 Task.from_dict 校验
+        time_str = '%02d:%02d:%02d' % self.get_time()
+        if self.get_cycle_type() in ('时间间隔', 'Cron表达式'):
+            return time_str
+        extra = self.extra_times_edit.text().strip()
+        return f'{time_str},{extra}' if extra else time_str
+    def get_cron(self):
+        return ' '.join(self.cron_edit.text().split())
+    def get_interval(self):
+        # 返回 (hour, minute, second)
+        return self.interval_hour_spin.value(), self.interval_minute_spin.value(), self.interval_second_spin.value()
+    def set_cycle(self, cycle_type, days=None, time_str=None, interval_str=None, cron=None):
+        idx = CYCLE_TYPES.index(cycle_type)
+        self.type_combo.setCurrentIndex(idx)
+        if days and cycle_type == '自定义':
+            for i, cb in enumerate(self.checks):
+                cb.setChecked(i in days)
+        if cron and cycle_type == 'Cron表达式':
+            self.cron_edit.setText(cron)
+        if time_str and cycle_type not in ('时间间隔', 'Cron表达式'):
+            # 第一个时间点放在时间框，其余放在“更多时间”
+            time_str, _, extra = time_str.partition(',')
+            self.extra_times_edit.setText(extra.replace(',', ', '))
+            parts = time_str.split(':')
+            h = int(parts[0]) if len(parts) > 0 else 0
+            m = int(parts[1]) if len(parts) > 1 else 0
+            s = int(parts[2]) if len(parts) > 2 else 0
+            self.hour_spin.setValue(h)
+            self.minute_spin.setValue(m)
+            self.second_spin.setValue(s)
+        if interval_str and cycle_type == '时间间隔':
+            parts = interval_str.split(':')
+            h = int(parts[0]) if len(parts) > 0 else 0
+            m = int(parts[1]) if len(parts) > 1 else 0
+            s = int(parts[2]) if len(parts) > 2 else 0
+            self.interval_hour_spin.setValue(h)
+            self.interval_minute_spin.setValue(m)
+            self.interval_second_spin.setValue(s)
+
+class TaskDialog(QDialog):
+    """
+    任务编辑对话框；执行策略以 job_defaults（settings.json 中的默认值）为初值，
+    只有任务原本单独设置过或用户改成与默认不同的值时才写入任务，其余随 settings.json 变化
+    """
+    POLICY_FIELDS = ('max_instances', 'coalesce', 'misfire_grace_time')
+    def __init__(self, parent=None, task=None, job_defaults=None):
+        super().__init__(parent)
+        self.setWindowTitle('任务编辑')
+        self.resize(400, 300)
+        layout = QVBoxLayout()
+        form_layout = QFormLayout()
+        self.name_edit = QLineEdit()
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(TASK_TYPES)
+        self.content_edit = QLineEdit()
+        self.cycle_selector = CycleSelector()
+        # 新增提醒时间段
+        self.remind_start_edit = QTimeEdit()
+        self.remind_start_edit.setDisplayFormat('HH:mm')
+        self.remind_start_edit.setTime(QTime(8, 0))
+        self.remind_end_edit = QTimeEdit()
+        self.remind_end_edit.setDisplayFormat('HH:mm')
+        self.remind_end_edit.setTime(QTime(20, 0))
+        # 执行策略
+        job_defaults = self.job_defaults = job_defaults or DEFAULT_SETTINGS['job_defaults']
+        self.explicit_policy = {key for key in self.POLICY_FIELDS if task and key in task}
+        self.max_instances_spin = QSpinBox()
+        self.max_instances_spin.setRange(1, 10)
+        self.max_instances_spin.setValue(job_defaults['max_instances'])
+        self.coalesce_check = QCheckBox('错过多次只补执行一次')
+        self.coalesce_check.setChecked(job_defaults['coalesce'])
+        self.misfire_spin = QSpinBox()
+        self.misfire_spin.setRange(0, 86400)
+        self.misfire_spin.setSuffix(' 秒')
+        self.misfire_spin.setSpecialValueText('不限制')
+        self.misfire_spin.setValue(job_defaults['misfire_grace_time'] or 0)
+        form_layout.addRow('任务名称：', self.name_edit)
+        form_layout.addRow('类型：', self.type_combo)
+        form_layout.addRow('提醒内容：', self.content_edit)
+        form_layout.addRow('周期选择：', self.cycle_selector)
+        self.remind_start_row = form_layout.rowCount()
+        form_layout.addRow('提醒开始时间：', self.remind_start_edit)
+        self.remind_end_row = form_layout.rowCount()
+        form_layout.addRow('提醒结束时间：', self.remind_end_edit)
+        form_layout.addRow('最大并发数：', self.max_instances_spin)
+        form_layout.addRow('错过处理：', self.coalesce_check)
+        form_layout.addRow('补执行容错：', self.misfire_spin)
+        self.preview_label = QLabel()
+        self.preview_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        form_layout.addRow('接下来触发：', self.preview_label)
+        layout.addLayout(form_layout)
+        btn_layout = QHBoxLayout()
+        self.btn_ok = QPushButton('确定')
+        self.btn_cancel = QPushButton('取消')
+        btn_layout.addWidget(self.btn_ok)
+        btn_layout.addWidget(self.btn_cancel)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        self.btn_ok.clicked.connect(self.accept)
+        self.btn_cancel.clicked.connect(self.reject)
+        # 类型切换时显示/隐藏提醒时间段
+        self.type_combo.currentTextChanged.connect(self.update_remind_time_visible)
+        self.cycle_selector.type_combo.currentTextChanged.connect(self.update_remind_time_visible)
+        self.update_remind_time_visible()
+        if task:
+            self.name_edit.setText(task['name'])
+            self.type_combo.setCurrentText(task['type'])
+            self.content_edit.setText(task.get('content', ''))
+            self.cycle_selector.set_cycle(
+                task['cycle_type'],
+                task.get('days', []),
+                task.get('time', '00:00:00'),
+                task.get('interval', '00:00:00'),
+                task.get('cron', '')
+            )
+            self.max_instances_spin.setValue(task.get('max_instances', job_defaults['max_instances']))
+            self.coalesce_check.setChecked(task.get('coalesce', job_defaults['coalesce']))
+            self.misfire_spin.setValue(task.get('misfire_grace_time', job_defaults['misfire_grace_time']) or 0)
+            # 仅提醒类型才填充时间段
+            if task.get('type', '提醒') == '提醒':
+                start = task.get('remind_start', '08:00')
+                end = task.get('remind_end', '20:00')
+                sh, sm = map(int, start.split(':'))
+                eh, em = map(int, end.split(':'))
+                self.remind_start_edit.setTime(QTime(sh, sm))
+                self.remind_end_edit.setTime(QTime(eh, em))
+        else:
+            # 新建任务时，时间默认当前
+            h, m, s = get_now_hms()
+            self.cycle_selector.hour_spin.setValue(h)
+            self.cycle_selector.minute_spin.setValue(m)
+            self.cycle_selector.second_spin.setValue(s)
+            self.remind_start_edit.setTime(QTime(8, 0))
+            self.remind_end_edit.setTime(QTime(20, 0))
+        # 设置变化时刷新触发预览
+        self.type_combo.currentTextChanged.connect(self.update_preview)
+        self.cycle_selector.changed.connect(self.update_preview)
+        self.remind_start_edit.timeChanged.connect(self.update_preview)
+        self.remind_end_edit.timeChanged.connect(self.update_preview)
+        self.update_preview()
+    def update_remind_time_visible(self):
+        # Cron表达式自身限定时段，不使用提醒时间段
+        is_remind = self.type_combo.currentText() == '提醒' and self.cycle_selector.get_cycle_type() != 'Cron表达式'
+        self.remind_start_edit.setVisible(is_remind)
+        self.remind_end_edit.setVisible(is_remind)
+        # 还要隐藏label
+        form_layout = self.layout().itemAt(0).layout()
+        form_layout.labelForField(self.remind_start_edit).setVisible(is_remind)
+        form_layout.labelForField(self.remind_end_edit).setVisible(is_remind)
+    def update_preview(self):
+        """
+        按当前设置生成触发器，列出接下来几次触发时间；设置有误时显示错误原因
+        """
+        try:
+            # 名称不影响调度，未填写时也能预览
+            task = Task.from_dict(dict(self.get_task(), name='预览'))
+        except ValueError as e:
+            self.preview_label.setText(str(e))
+            return
+        # 每次输入都会生成触发器，不放入共享缓存，避免留下输入过程中的中间结果
+        trigger = build_trigger(task, shared=False)
+        if trigger is None:
+            self.preview_label.setText('所有时间点都在提醒时间段外，不会触发')
+            return
+        lines = []
+        # 组合触发器没有 timezone 属性，用带本地时区的当前时间
+        fire_time = trigger.get_next_fire_time(None, datetime.now().astimezone())
+        while fire_time is not None and len(lines) < PREVIEW_COUNT:
+            lines.append(fire_time.strftime('%Y-%m-%d %H:%M:%S ') + WEEKDAY_NAMES[fire_time.weekday()])
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+        self.preview_label.setText('\n'.join(lines) or '不会再触发')
+    def get_task(self):
+        name = self.name_edit.text().strip()
+        ttype = self.type_combo.currentText()
+        content = self.content_edit.text().strip()
+        cycle_type = self.cycle_selector.get_cycle_type()
+        days = self.cycle_selector.get_selected_days()
+        time_str = self.cycle_selector.get_times()
+        interval_h, interval_m, interval_s = self.cycle_selector.get_interval()
+        interval_str = f'{interval_h:02d}:{interval_m:02d}:{interval_s:02d}'
+        task = {
+            'name': name,
+            'type': ttype,
+            'content': content,
+            'cycle_type': cycle_type,
+            'days': days,
+            'time': time_str,
+            'interval': interval_str,
+        }
+        policy = {
+            'max_instances': self.max_instances_spin.value(),
+            'coalesce': self.coalesce_check.isChecked(),
+            'misfire_grace_time': self.misfire_spin.value()
+        }
+        for key, value in policy.items():
+            default = self.job_defaults[key]
+            if key == 'misfire_grace_time':
+                # 0 与 None 都表示不限制
+                default = default or 0
+            if key in self.explicit_policy or value != default:
+                task[key] = value
+        if cycle_type == 'Cron表达式':
+            task['cron'] = self.cycle_selector.get_cron()
+        elif ttype == '提醒':
+            remind_start = self.remind_start_edit.time().toString('HH:mm')
+            remind_end = self.remind_end_edit.time().toString('HH:mm')
+            task['remind_start'] = remind_start
+            task['remind_end'] = remind_end
+        return task
+
+class TaskTableModel(QAbstractTableModel):
+    """
+    任务表格模型，按行增量通知视图，视图只绘制可见行
+    """
+    HEADERS = ['任务名称', '类型', '周期', '时间', '状态', '操作', '下次执行']
+    ACTION_COLUMN = 5
+    NEXT_FIRE_COLUMN = 6
+    def __init__(self, tasks, next_fire_time=None, next_fire_times=None, parent=None):
+        super().__init__(parent)
+        self.tasks = tasks
+        # 查询任务下次执行时间的回调：task_id -> datetime 或 None；next_fire_times() 一次取出全部，用于排序
+        self.next_fire_time = next_fire_time
+        self.next_fire_times = next_fire_times
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        task = self.tasks[index.row()]
+        col = index.column()
+        if col == 0:
+            return task.name
+        if col == 1:
+            return task.type
+        if col == 2:
+            return describe_cycle(task)
+        if col == 3:
+            return '' if task.cron else task.time
+        if col == 4:
+            return task.status
+        if col == self.NEXT_FIRE_COLUMN and self.next_fire_time:
+            next_time = self.next_fire_time(task.id)
+            return next_time.strftime('%Y-%m-%d %H:%M:%S') if next_time else ''
+        return None
+    def task_at(self, row):
+        return self.tasks[row]
+    def reset_tasks(self, tasks):
+        self.beginResetModel()
+        self.tasks = tasks
+        self.sort_tasks()
+        self.endResetModel()
+    def sort(self, column, order=Qt.AscendingOrder):
+        # 点击表头排序；列号为-1时保持任务原顺序
+        self.sort_column = column
+        self.sort_order = order
+        self.beginResetModel()
+        self.sort_tasks()
+        self.endResetModel()
+    def sort_tasks(self):
+        column = self.sort_column
+        if column == 0:
+            key = lambda task: task.name
+        elif column == 1:
+            key = lambda task: task.type
+        elif column == 2:
+            key = describe_cycle
+        elif column == 3:
+            key = lambda task: task.times
+        elif column == 4:
+            key = lambda task: task.status
+        elif column == self.NEXT_FIRE_COLUMN and self.next_fire_times:
+            # 没有下次执行时间的排在最后
+            times = {task_id: t.timestamp() for task_id, t in self.next_fire_times().items()}
+            key = lambda task: times.get(task.id, float('inf'))
+        else:
+            return
+        self.tasks.sort(key=key, reverse=self.sort_order == Qt.DescendingOrder)
+    def append_task(self, task):
+        row = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.tasks.append(task)
+        self.endInsertRows()
+    def replace_task(self, row, task):
+        self.tasks[row] = task
+        self.task_changed(row)
+    def task_changed(self, row):
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+    def next_fire_changed(self):
+        # 视图只会重绘可见行
+        if self.tasks:
+            self.dataChanged.emit(self.index(0, self.NEXT_FIRE_COLUMN), self.index(len(self.tasks) - 1, self.NEXT_FIRE_COLUMN))
+    def remove_task(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        task = self.tasks.pop(row)
+        self.endRemoveRows()
+        return task
+
+class TaskActionDelegate(QStyledItemDelegate):
+    """
+    操作列委托：直接绘制编辑/删除/启用按钮，不为每行创建控件
+    """
+    edit_clicked = pyqtSignal(int)
+    delete_clicked = pyqtSignal(int)
+    toggle_clicked = pyqtSignal(int)
+    def button_rects(self, rect):
+        width = rect.width() // 3
+        return [QRect(rect.x() + i * width + 2, rect.y() + 2, width - 4, rect.height() - 4) for i in range(3)]
+    def button_texts(self, index):
+        task = index.model().task_at(index.row())
+        return ['编辑', '删除', '禁用' if task.status == '启用' else '启用']
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        for rect, text in zip(self.button_rects(option.rect), self.button_texts(index)):
+            btn = QStyleOptionButton()
+            btn.rect = rect
+            btn.text = text
+            btn.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, btn, painter, option.widget)
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        signals = [self.edit_clicked, self.delete_clicked, self.toggle_clicked]
+        for rect, signal in zip(self.button_rects(option.rect), signals):
+            if rect.contains(event.pos()):
+                signal.emit(index.row())
+                return True
+        return False
+
+class EngineSignals(QObject):
+    # 引擎回调可能来自调度线程，后台导入在导入线程中完成，都经信号转到界面线程处理
+    error = pyqtSignal(str, str)
+    tasks_changed = pyqtSignal()
+    show_window = pyqtSignal()
+    import_parsed = pyqtSignal(object, object)
+    import_failed = pyqtSignal(str)
+    import_done = pyqtSignal(int)
+
+class MainWindow(QMainWindow):
+    def __init__(self, engine, control=None):
+        super().__init__()
+        self.setWindowTitle('智能定时提醒器')
+        self.setFixedSize(1500, 800)
+        self.engine = engine
+        self.control = control
+        self.engine_signals = EngineSignals()
+        self.engine_signals.error.connect(self.report_store_error)
+        # 批量修改（导入、控制接口）完成后整体刷新一次表格
+        self.engine_signals.tasks_changed.connect(self.refresh_table)
+        self.engine_signals.show_window.connect(self.show_from_tray)
+        self.engine_signals.import_parsed.connect(self.on_import_parsed)
+        self.engine_signals.import_failed.connect(self.on_import_failed)
+        self.engine_signals.import_done.connect(self.on_import_done)
+        self.engine.on_tasks_changed = self.engine_signals.tasks_changed.emit
+        if control is not None:
+            control.on_show = self.engine_signals.show_window.emit
+        # 提醒先进入有界队列，由界面定时器合并、限流后以托盘气泡显示
+        self.reminder_queue = ReminderQueue()
+        self.reminder_box = None
+        self.engine.on_reminder = self.reminder_queue.push
+        self.engine.on_error = lambda title, e: self.engine_signals.error.emit(title, str(e))
+        # 托盘图标及菜单
+        icon_path = os.path.join(os.path.dirname(__file__), 'output.ico')
+        logging.info("托盘图标路径：%s", icon_path)
+        logging.info("文件是否存在：%s", os.path.exists(icon_path))
+        icon = QIcon(icon_path)
+        self.setWindowIcon(icon)
+        self.tray_icon = QSystemTrayIcon(self)
+        self.tray_icon.setIcon(icon)
+        self.tray_menu = QMenu(self)
+        self.restore_action = QAction('还原窗口', self)
+        self.quit_action = QAction('退出程序', self)
+        self.tray_menu.addAction(self.restore_action)
+        self.tray_menu.addAction(self.quit_action)
+        self.tray_icon.setContextMenu(self.tray_menu)
+        self.tray_icon.activated.connect(self.on_tray_activated)
+        self.restore_action.triggered.connect(self.showNormal)
+        self.quit_action.triggered.connect(self.exit_app)
+        self.tray_icon.show()
+        # 菜单栏
+        menubar = QMenuBar(self)
+        task_menu = menubar.addMenu('菜单')
+        self.action_add = QAction('新增', self)
+        task_menu.addAction(self.action_add)
+        self.action_import = QAction('导入...', self)
+        self.action_export = QAction('导出...', self)
+        task_menu.addAction(self.action_import)
+        task_menu.addAction(self.action_export)
+        self.setMenuBar(menubar)
+        self.action_add.triggered.connect(self.on_add_clicked)
+        self.action_import.triggered.connect(self.on_import_clicked)
+        self.action_export.triggered.connect(self.on_export_clicked)
+        # 主体布局
+        central = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0,0,0,0)
+        layout.setSpacing(0)
+        # 筛选栏：名称搜索（输入停顿后再查询）、类型、周期、状态、下次执行时间范围
+        filter_bar = QHBoxLayout()
+        filter_bar.setContentsMargins(4, 4, 4, 4)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('搜索任务名称')
+        self.search_edit.setClearButtonEnabled(True)
+        self.type_filter = self.make_filter_combo('全部类型', [(t, t) for t in TASK_TYPES])
+        self.cycle_filter = self.make_filter_combo('全部周期', [(c, c) for c in CYCLE_TYPES])
+        self.status_filter = self.make_filter_combo('全部状态', [('启用', '启用'), ('禁用', '禁用')])
+        self.within_filter = self.make_filter_combo(WITHIN_CHOICES[0][0], WITHIN_CHOICES[1:])
+        self.count_label = QLabel()
+        filter_bar.addWidget(self.search_edit, 1)
+        for combo in (self.type_filter, self.cycle_filter, self.status_filter, self.within_filter):
+            filter_bar.addWidget(combo)
+            combo.currentIndexChanged.connect(self.apply_filter)
+        filter_bar.addWidget(self.count_label)
+        layout.addLayout(filter_bar)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.search_edit.textChanged.connect(self.filter_timer.start)
+        self.table_model = TaskTableModel(self.engine.task_list(), self.engine.next_fire_time, self.engine.next_fire_times, self)
+        self.action_delegate = TaskActionDelegate(self)
+        self.action_delegate.edit_clicked.connect(self.on_edit_clicked)
+        self.action_delegate.delete_clicked.connect(self.on_delete_clicked)
+        self.action_delegate.toggle_clicked.connect(self.on_toggle_clicked)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setItemDelegateForColumn(TaskTableModel.ACTION_COLUMN, self.action_delegate)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # 固定行高，滚动时无需逐行测量
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(32)
+        # 启用表头排序前清除排序列，启动时保持任务原顺序
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+        central.setLayout(layout)
+        self.setCentralWidget(central)
+        self.next_fire_timer = QTimer(self)
+        self.next_fire_timer.timeout.connect(self.table_model.next_fire_changed)
+        self.next_fire_timer.start(1000)
+        self.reminder_timer = QTimer(self)
+        self.reminder_timer.timeout.connect(self.show_reminders)
+        self.reminder_timer.start(500)
+        # 即将执行面板：由各任务触发器推算接下来的触发，可在“视图”菜单中隐藏
+        self.upcoming_list = QListWidget()
+        self.upcoming_dock = QDockWidget('即将执行', self)
+        self.upcoming_dock.setObjectName('upcoming_dock')
+        self.upcoming_dock.setWidget(self.upcoming_list)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.upcoming_dock)
+        view_menu = menubar.addMenu('视图')
+        view_menu.addAction(self.upcoming_dock.toggleViewAction())
+        self.upcoming_dock.visibilityChanged.connect(self.refresh_upcoming)
+        self.upcoming_timer = QTimer(self)
+        self.upcoming_timer.timeout.connect(self.refresh_upcoming)
+        self.upcoming_timer.start(30 * 1000)
+        self.update_count()
+
+    def on_tray_activated(self, reason):
+        if reason == QSystemTrayIcon.DoubleClick:
+            self.show_from_tray()
+    def show_from_tray(self):
+        self.showNormal()
+        self.activateWindow()
+
+    def closeEvent(self, event):
+        event.ignore()
+        self.hide()
+        self.tray_icon.showMessage('智能定时提醒器', '程序已最小化到系统托盘，双击托盘图标可还原窗口。', QSystemTrayIcon.Information, 2000)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                QTimer.singleShot(0, self.hide)
+        super().changeEvent(event)
+
+    def exit_app(self):
+        self.tray_icon.hide()
+        if self.control is not None:
+            self.control.stop()
+        self.engine.shutdown()
+        QApplication.quit()
+
+    def report_store_error(self, title, message):
+        QMessageBox.warning(self, title, f'{title}，本次修改未写入磁盘：{message}')
+    def make_filter_combo(self, all_text, choices):
+        combo = QComboBox()
+        combo.addItem(all_text, None)
+        for text, value in choices:
+            combo.addItem(text, value)
+        return combo
+    def refresh_table(self):
+        # 整体重置，仅在重新加载任务时使用；单行变化走模型的增量接口
+        with self.engine.metrics.timer('refresh_table_seconds'):
+            self.apply_filter()
+        self.refresh_upcoming()
+    def apply_filter(self):
+        # 由任务索引按当前条件筛选，没有任何条件时显示全部任务
+        self.filter_timer.stop()
+        text = self.search_edit.text()
+        conditions = [combo.currentData() for combo in (self.type_filter, self.cycle_filter, self.status_filter, self.within_filter)]
+        if text.strip() or any(value is not None for value in conditions):
+            tasks = self.engine.filter_tasks(text, *conditions)
+        else:
+            tasks = self.engine.task_list()
+        self.table_model.reset_tasks(tasks)
+        self.update_count()
+    def update_count(self):
+        self.count_label.setText(f'{self.table_model.rowCount()}/{len(self.engine.tasks)}')
+    def refresh_upcoming(self):
+        # 面板隐藏时不计算
+        if not self.upcoming_dock.isVisible():
+            return
+        until = datetime.now(self.engine.backend.timezone) + timedelta(hours=UPCOMING_HOURS)
+        with self.engine.metrics.timer('upcoming_fires_seconds'):
+            fires = self.engine.upcoming_fires(UPCOMING_LIMIT, until)
+        self.upcoming_list.clear()
+        self.upcoming_list.addItems([
+            f"{fire_time.strftime('%m-%d %H:%M:%S')}  {task.name}（{task.type}）" for fire_time, task in fires
+        ] or [f'{UPCOMING_HOURS}小时内没有待执行的任务'])
+    def on_add_clicked(self):
+        dlg = TaskDialog(self, job_defaults=self.engine.settings['job_defaults'])
+        if dlg.exec_() == QDialog.Accepted:
+            task = dlg.get_task()
+            if not task['name']:
+                QMessageBox.warning(self, '提示', '任务名称不能为空！')
+                return
+            task['status'] = '启用'
+            try:
+                task = self.engine.add_task(task)
+            except ValueError as e:
+                QMessageBox.warning(self, '提示', str(e))
+                return
+            self.table_model.append_task(task)
+            self.update_count()
+            self.refresh_upcoming()
+    def on_import_clicked(self):
+        path, _ = QFileDialog.getOpenFileName(self, '导入任务', '', IMPORT_FILTER)
+        if not path:
+            return
+        # 解析校验和写入调度都在后台线程中进行，大文件也不会卡住界面；完成前不能再次导入
+        self.action_import.setEnabled(False)
+        threading.Thread(target=self.read_import_file, args=(path,), name='import', daemon=True).start()
+    def read_import_file(self, path):
+        # 在导入线程中调用
+        try:
+            tasks, errors = read_tasks(path)
+        except Exception as e:
+            self.engine_signals.import_failed.emit(str(e))
+            return
+        self.engine_signals.import_parsed.emit(tasks, errors)
+    def on_import_parsed(self, tasks, errors):
+        if errors:
+            detail = '\n'.join(f'第{line}行：{msg}' for line, msg in errors[:20])
+            more = f'\n……共{len(errors)}条错误' if len(errors) > 20 else ''
+            ret = QMessageBox.question(
+                self, '导入校验', f'{len(tasks)}个任务有效，{len(errors)}条记录有误将被跳过：\n{detail}{more}\n\n是否导入有效任务？'
+            )
+            if ret != QMessageBox.Yes:
+                tasks = []
+        if not tasks:
+            self.action_import.setEnabled(True)
+            return
+        threading.Thread(target=self.apply_import, args=(tasks,), name='import', daemon=True).start()
+    def apply_import(self, tasks):
+        # 在导入线程中调用：一个事务写入并调度，表格由 tasks_changed 信号整体刷新一次；写入失败时经 on_error 提示
+        imported = self.engine.upsert_tasks(tasks)
+        self.engine_signals.import_done.emit(-1 if imported is None else len(imported))
+    def on_import_failed(self, message):
+        self.action_import.setEnabled(True)
+        QMessageBox.warning(self, '导入失败', message)
+    def on_import_done(self, count):
+        self.action_import.setEnabled(True)
+        if count >= 0:
+            QMessageBox.information(self, '导入完成', f'已导入{count}个任务')
+    def on_export_clicked(self):
+        path, _ = QFileDialog.getSaveFileName(self, '导出任务', 'tasks.csv', IMPORT_FILTER)
+        if not path:
+            return
+        try:
+            count = export_tasks((task.to_dict() for task in self.engine.task_list()), path)
+        except Exception as e:
+            QMessageBox.warning(self, '导出失败', str(e))
+            return
+        QMessageBox.information(self, '导出完成', f'已导出{count}个任务到 {path}')
+    def report_invalid_tasks(self):
+        """
+        提示加载时校验失败的任务：可导出原始记录，修改后重新导入（按任务ID覆盖），或直接删除
+        """
+        items = list(self.engine.invalid_records.values())
+        if not items:
+            return
+        detail = '\n'.join(f"{data.get('name') or data['id']}：{reason}" for data, reason in items[:20])
+        more = f'\n……共{len(items)}个' if len(items) > 20 else ''
+        box = QMessageBox(
+            QMessageBox.Warning, '任务格式有误',
+            f'{len(items)}个任务格式有误，未加载也不会执行：\n{detail}{more}\n\n可导出后修改再导入（按任务ID覆盖），或直接删除。',
+            parent=self
+        )
+        export_btn = box.addButton('导出...', QMessageBox.ActionRole)
+        delete_btn = box.addButton('删除', QMessageBox.DestructiveRole)
+        box.addButton('保留', QMessageBox.RejectRole)
+        box.exec_()
+        if box.clickedButton() is export_btn:
+            path, _ = QFileDialog.getSaveFileName(self, '导出有误的任务', 'invalid_tasks.csv', IMPORT_FILTER)
+            if not path:
+                return
+            try:
+                count = export_tasks((data for data, _ in items), path)
+            except Exception as e:
+                QMessageBox.warning(self, '导出失败', str(e))
+                return
+            QMessageBox.information(self, '导出完成', f'已导出{count}个任务到 {path}')
+        elif box.clickedButton() is delete_btn:
+            self.engine.apply_batch(deletes=[data['id'] for data, _ in items])
+    def on_edit_clicked(self, row):
+        task = self.table_model.task_at(row)
+        dlg = TaskDialog(self, task, self.engine.settings['job_defaults'])
+        if dlg.exec_() == QDialog.Accepted:
+            new_task = dlg.get_task()
+            if not new_task['name']:
+                QMessageBox.warning(self, '提示', '任务名称不能为空！')
+                return
+            new_task['status'] = task.status
+            new_task['id'] = task.id
+            try:
+                new_task = self.engine.update_task(new_task)
+            except ValueError as e:
+                QMessageBox.warning(self, '提示', str(e))
+                return
+            self.table_model.replace_task(row, new_task)
+            self.refresh_upcoming()
+    def on_delete_clicked(self, row):
+        ret = QMessageBox.question(self, '确认删除', '确定要删除该任务吗？')
+        if ret == QMessageBox.Yes:
+            task = self.table_model.remove_task(row)
+            self.engine.remove_task(task.id)
+            self.update_count()
+            self.refresh_upcoming()
+    def on_toggle_clicked(self, row):
+        task = self.table_model.task_at(row)
+        try:
+            new_task = self.engine.set_enabled(task.id, task.status != '启用')
+        except ValueError as e:
+            # 如未选择星期的自定义任务，需先编辑
+            QMessageBox.warning(self, '无法启用', f'{e}，请先编辑任务')
+            return
+        self.table_model.replace_task(row, new_task)
+        self.refresh_upcoming()
+    def show_reminders(self):
+        items = self.reminder_queue.pop_ready()
+        if not items:
+            return
+        title, content = format_reminders(items, self.reminder_queue.take_dropped(), len(self.reminder_queue))
+        logging.info('弹窗提醒：%s %s', title, content)
+        if self.tray_icon.isVisible() and QSystemTrayIcon.supportsMessages():
+            self.tray_icon.showMessage(title, content, QSystemTrayIcon.Information, 5000)
+            return
+        # 不支持托盘气泡时复用同一个非模态对话框，不会堆叠窗口
+        if self.reminder_box is None:
+            self.reminder_box = QMessageBox(QMessageBox.Information, title, content, QMessageBox.Ok)
+            self.reminder_box.setWindowModality(Qt.NonModal)
+        self.reminder_box.setWindowTitle(title)
+        self.reminder_box.setText(content)
+        self.reminder_box.show()
+        self.reminder_box.raise_()
+
+def is_admin():
+    try:
+        return ctypes.windll.shell32.IsUserAnAdmin()
+    except:
+        return False
+
+def run_gui(settings=None):
+    settings = settings if settings is not None else load_settings()
+    control, running = open_control(settings['control'])
+    if running:
+        # 已有实例在运行，让它显示窗口后退出
+        try:
+            call(settings['control']['port'], 'POST', '/show', token=load_token(settings['control']))
+        except OSError as e:
+            logging.warning('通知已运行的实例失败：%s', e)
+        return
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    if not is_admin():
+        QMessageBox.warning(None, "权限不足", "请以管理员身份运行本程序，否则无法自动重启或关机。")
+        return
+    engine = SchedulerEngine(settings=settings)
+    engine.start()
+    window = MainWindow(engine, control)
+    if control is not None:
+        control.start(engine)
+    window.show()
+    window.report_invalid_tasks()
+    sys.exit(app.exec_())
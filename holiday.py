@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import date, timedelta
+
+# 每年最多366天，按位存储，46字节足够
+YEAR_BYTES = 46
+
+_default_calendar = None
+
+
+def get_default_calendar():
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = HolidayCalendar()
+    return _default_calendar
+
+
+def set_default_calendar(calendar):
+    global _default_calendar
+    _default_calendar = calendar
+
+
+def days_in_year(year):
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def _day_index(d):
+    return d.timetuple().tm_yday - 1
+
+
+def _get_bit(bits, idx):
+    return (bits[idx >> 3] >> (idx & 7)) & 1
+
+
+def _set_bit(bits, idx, value):
+    if value:
+        bits[idx >> 3] |= 1 << (idx & 7)
+    else:
+        bits[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+
+
+class HolidayProvider:
+    """
+    法定日数据源接口：fetch_year 返回 {date: 是否工作日}，允许只返回部分日期
+    """
+    def fetch_year(self, year):
+        raise NotImplementedError
+
+
+class AppWorldsProvider(HolidayProvider):
+    """
+    https://date.appworlds.cn 数据源。该接口只支持按天查询，没有按月或按年的批量接口，
+    拉取一年约 365 次请求，按 min_interval 限速约需 75 秒以上（刷新今明两年约两分半）；
+    只在 network 线程池的周期作业中调用，数据完整且未过期（refresh_days）的年份不会重复拉取，不影响调度
+    """
+    URL = 'https://date.appworlds.cn/work?date={}'
+
+    def __init__(self, timeout=5, min_interval=0.2, max_failures=3):
+        self.timeout = timeout
+        self.min_interval = min_interval
+        # 连续失败次数达到上限即认为离线，停止本轮拉取
+        self.max_failures = max_failures
+
+    def fetch_year(self, year):
+        import requests
+        result = {}
+        failures = 0
+        with requests.Session() as session:
+            d = date(year, 1, 1)
+            while d.year == year:
+                try:
+                    resp = session.get(self.URL.format(d.isoformat()), timeout=self.timeout, verify=False)
+                    data = resp.json()
+                    if data.get('code') != 200:
+                        raise ValueError(f'接口返回异常：{data}')
+                    result[d] = bool(data['data']['work'])
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    logging.warning('法定日接口异常（%s）：%s', d, e)
+                    if failures >= self.max_failures:
+                        break
+                d += timedelta(days=1)
+                if self.min_interval:
+                    time.sleep(self.min_interval)
+        if not result:
+            raise ConnectionError(f'无法获取{year}年法定日数据')
+        return result
+
+
+class StaticHolidayProvider(HolidayProvider):
+    """
+    本地数据源，data 为 {date 或 'YYYY-MM-DD': 是否工作日}，用于测试或离线导入
+    """
+    def __init__(self, data):
+        self.data = {}
+        for k, v in data.items():
+            if isinstance(k, str):
+                k = date.fromisoformat(k)
+            self.data[k] = bool(v)
+
+    def fetch_year(self, year):
+        return {d: v for d, v in self.data.items() if d.year == year}
+
+
+class _YearData:
+    __slots__ = ('work', 'known', 'updated')
+
+    def __init__(self, work=None, known=None, updated=0.0):
+        self.work = work if work is not None else bytearray(YEAR_BYTES)
+        self.known = known if known is not None else bytearray(YEAR_BYTES)
+        self.updated = updated
+
+    def known_count(self):
+        return sum(bin(b).count('1') for b in self.known)
+
+
+class HolidayCalendar:
+    """
+    法定工作日/节假日日历：按年批量预取并持久化到本地文件，
+    查询走内存位图 O(1)，由调度引擎的周期作业每 check_interval 秒调用 prefetch 刷新，离线时使用已持久化的数据
+    """
+    def __init__(self, provider=None, cache_path='holidays.json', refresh_days=7, check_interval=6 * 3600):
+        self.provider = provider or AppWorldsProvider()
+        self.cache_path = cache_path
+        self.refresh_days = refresh_days
+        self.check_interval = check_interval
+        self._years = {}
+        self._lock = threading.Lock()
+        self._warned = set()
+        self._listeners = []
+        # 运行统计：拉取失败次数、因缺少数据按周一至周五判断的次数
+        self.fetch_failures = 0
+        self.fallback_lookups = 0
+
+    def add_listener(self, callback):
+        """数据有更新时回调 callback(years)，在执行 prefetch 的线程（network 线程池）中调用"""
+        self._listeners.append(callback)
+
+    def is_workday(self, d):
+        data = self._years.get(d.year)
+        idx = _day_index(d)
+        if data is not None and _get_bit(data.known, idx):
+            return bool(_get_bit(data.work, idx))
+        # 没有数据时按周一至周五为工作日处理，避免提醒被直接丢弃
+        self.fallback_lookups += 1
+        if d.year not in self._warned:
+            self._warned.add(d.year)
+            logging.warning('缺少%s年法定日数据，按周一至周五判断工作日', d.year)
+        return d.weekday() < 5
+
+    def update(self, year, mapping):
+        """合并一年的数据，mapping 为 {date: 是否工作日}"""
+        with self._lock:
+            old = self._years.get(year)
+            work = bytearray(old.work) if old else bytearray(YEAR_BYTES)
+            known = bytearray(old.known) if old else bytearray(YEAR_BYTES)
+            for d, is_work in mapping.items():
+                if d.year != year:
+                    continue
+                idx = _day_index(d)
+                _set_bit(work, idx, is_work)
+                _set_bit(known, idx, True)
+            # 整体替换，查询线程无需加锁
+            self._years[year] = _YearData(work, known, time.time())
+            self._warned.discard(year)
+
+    def needs_refresh(self, year):
+        data = self._years.get(year)
+        if data is None or data.known_count() < days_in_year(year):
+            return True
+        # 已结束的年份数据不会再变化
+        if year < date.today().year:
+            return False
+        return time.time() - data.updated > self.refresh_days * 86400
+
+    def prefetch(self, years=None, force=False):
+        """同步拉取指定年份（默认今年和明年），返回是否有数据更新"""
+        if years is None:
+            this_year = date.today().year
+            years = [this_year, this_year + 1]
+        changed = []
+        for year in years:
+            if not force and not self.needs_refresh(year):
+                continue
+            try:
+                mapping = self.provider.fetch_year(year)
+            except Exception as e:
+                self.fetch_failures += 1
+                logging.warning('拉取%s年法定日数据失败，继续使用本地数据：%s', year, e)
+                continue
+            self.update(year, mapping)
+            changed.append(year)
+            logging.info('已更新%s年法定日数据，共%s天', year, len(mapping))
+        if changed:
+            self.save()
+            for callback in self._listeners:
+                try:
+                    callback(changed)
+                except Exception as e:
+                    logging.warning('法定日更新回调异常：%s', e)
+        return bool(changed)
+
+    def load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            years = {}
+            for year, item in raw.get('years', {}).items():
+                years[int(year)] = _YearData(
+                    bytearray.fromhex(item['work']),
+                    bytearray.fromhex(item['known']),
+                    float(item.get('updated', 0))
+                )
+            with self._lock:
+                self._years.update(years)
+        except Exception as e:
+            logging.warning('加载法定日缓存失败：%s', e)
+
+    def save(self):
+        with self._lock:
+            raw = {'version': 1, 'years': {
+                str(year): {'work': data.work.hex(), 'known': data.known.hex(), 'updated': data.updated}
+                for year, data in sorted(self._years.items())
+            }}
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(raw, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logging.warning('保存法定日缓存失败：%s', e)
@@ -0,0 +1,109 @@
+"""
+任务索引：按名称、类型、周期、状态建立内存索引，随任务增删改增量维护，供界面筛选和控制接口查询
+"""
+import threading
+
+# 参与分组索引的字段
+FIELDS = ('type', 'cycle_type', 'status')
+
+
+def _grams(text):
+    # 相邻两个字符组成的二元组，中文名称不分词也能按任意子串检索
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class TaskIndex:
+    """
+    名称按二元组建倒排表，查询时先用各条件的集合求交缩小范围，再核对子串；
+    类型、周期、状态各按取值分组。记录任务的加入顺序，查询结果与任务列表顺序一致
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}  # 任务ID -> 用于匹配的名称（忽略大小写）
+        self._order = {}  # 任务ID -> 序号，按加入顺序排列，替换任务时不变
+        self._seq = 0
+        self._grams = {}  # 二元组 -> {任务ID}
+        self._fields = {field: {} for field in FIELDS}  # 字段 -> 取值 -> {任务ID}
+        self._values = {}  # 任务ID -> 各字段取值，删除时据此找到所在分组
+
+    def __len__(self):
+        return len(self._names)
+
+    def rebuild(self, tasks):
+        with self._lock:
+            self._names.clear()
+            self._order.clear()
+            self._grams.clear()
+            self._values.clear()
+            for groups in self._fields.values():
+                groups.clear()
+            for task in tasks:
+                self._add(task)
+
+    def add(self, task):
+        # 新增或替换，已有任务保持原来的位置
+        with self._lock:
+            self._remove(task.id)
+            self._add(task)
+
+    def remove(self, task_id):
+        with self._lock:
+            self._remove(task_id)
+            self._order.pop(task_id, None)
+
+    def _add(self, task):
+        task_id = task.id
+        name = task.name.casefold()
+        if name == task.name:
+            name = task.name
+        self._names[task_id] = name
+        if task_id not in self._order:
+            self._order[task_id] = self._seq
+            self._seq += 1
+        for gram in _grams(name):
+            self._grams.setdefault(gram, set()).add(task_id)
+        values = tuple(getattr(task, field) for field in FIELDS)
+        self._values[task_id] = values
+        for field, value in zip(FIELDS, values):
+            self._fields[field].setdefault(value, set()).add(task_id)
+
+    def _remove(self, task_id):
+        name = self._names.pop(task_id, None)
+        if name is None:
+            return
+        for gram in _grams(name):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self._grams[gram]
+        for field, value in zip(FIELDS, self._values.pop(task_id)):
+            self._fields[field][value].discard(task_id)
+
+    def search(self, text='', ids=None, **conditions):
+        """
+        返回满足全部条件的任务ID列表，按任务顺序排列：text 为名称子串（忽略大小写），
+        conditions 为 type/cycle_type/status 的取值（None 表示不限），ids 为额外限定的任务ID集合
+        """
+        text = text.strip().casefold()
+        with self._lock:
+            sets = [ids] if ids is not None else []
+            for field, value in conditions.items():
+                if value is not None:
+                    sets.append(self._fields[field].get(value, set()))
+            grams = _grams(text)
+            sets.extend(self._grams.get(gram, set()) for gram in grams)
+            if not sets:
+                candidates = self._names
+            else:
+                # 从最小的集合开始求交
+                sets.sort(key=len)
+                candidates = sets[0].intersection(*sets[1:])
+            if text:
+                # 二元组都命中不代表连续出现，逐个核对；单个字符没有二元组，直接扫描
+                names = self._names
+                candidates = [task_id for task_id in candidates if text in names.get(task_id, '')]
+            elif candidates is self._names:
+                return list(self._order)
+            order = self._order
+            return sorted((task_id for task_id in candidates if task_id in order), key=order.__getitem__)
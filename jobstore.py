@@ -0,0 +1,179 @@
+"""
+APScheduler 作业持久化：用标准库 sqlite3 保存作业及下次执行时间，重启后直接恢复，无需 SQLAlchemy
+"""
+import pickle
+import sqlite3
+import logging
+import threading
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    与 APScheduler 自带的 SQLAlchemyJobStore 结构相同：作业状态 pickle 后存入 job_state，
+    next_run_time 存 UTC 时间戳并建索引，暂停的作业为 NULL
+    """
+    def __init__(self, path='jobs.db', pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.path = path
+        self.pickle_protocol = pickle_protocol
+        self.conn = None
+        self._lock = threading.RLock()
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS apscheduler_jobs ('
+            'id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)'
+        )
+        # (时间, id) 联合索引，按时间分页读取时可以从上一页末尾直接续读
+        self.conn.execute('DROP INDEX IF EXISTS idx_jobs_next_run_time')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_next_run ON apscheduler_jobs(next_run_time, id)')
+
+    def lookup_job(self, job_id):
+        with self._lock:
+            row = self.conn.execute('SELECT job_state FROM apscheduler_jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now):
+        timestamp = datetime_to_utc_timestamp(now)
+        return self._get_jobs('WHERE next_run_time <= ?', (timestamp,))
+
+    def get_next_run_time(self):
+        with self._lock:
+            if self.conn is None:
+                return None
+            row = self.conn.execute(
+                'SELECT next_run_time FROM apscheduler_jobs WHERE next_run_time IS NOT NULL '
+                'ORDER BY next_run_time LIMIT 1'
+            ).fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def next_run_times(self, until=None):
+        # [(作业ID, 下次执行时间)]，只含 until 及之前的（None 不限），只读索引列，不反序列化作业
+        with self._lock:
+            if self.conn is None:
+                return []
+            if until is None:
+                rows = self.conn.execute(
+                    'SELECT id, next_run_time FROM apscheduler_jobs WHERE next_run_time IS NOT NULL'
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT id, next_run_time FROM apscheduler_jobs WHERE next_run_time <= ?',
+                    (datetime_to_utc_timestamp(until),)
+                ).fetchall()
+        return [(job_id, utc_timestamp_to_datetime(timestamp)) for job_id, timestamp in rows]
+
+    def iter_jobs(self, batch_size=200):
+        """
+        按下次执行时间升序分批读取未暂停的作业，调用方只用前几个时不会反序列化全部作业
+        """
+        last = None
+        while True:
+            with self._lock:
+                if self.conn is None:
+                    return
+                if last is None:
+                    rows = self.conn.execute(
+                        'SELECT id, next_run_time, job_state FROM apscheduler_jobs WHERE next_run_time IS NOT NULL '
+                        'ORDER BY next_run_time, id LIMIT ?', (batch_size,)
+                    ).fetchall()
+                else:
+                    rows = self.conn.execute(
+                        'SELECT id, next_run_time, job_state FROM apscheduler_jobs WHERE (next_run_time, id) > (?, ?) '
+                        'ORDER BY next_run_time, id LIMIT ?', last + (batch_size,)
+                    ).fetchall()
+            for job_id, timestamp, job_state in rows:
+                last = (timestamp, job_id)
+                try:
+                    yield self._reconstitute_job(job_state)
+                except Exception as e:
+                    logging.warning('还原作业%s失败，已跳过：%s', job_id, e)
+            if len(rows) < batch_size:
+                return
+
+    def add_job(self, job):
+        with self._lock:
+            try:
+                self.conn.execute(
+                    'INSERT INTO apscheduler_jobs (id, next_run_time, job_state) VALUES (?, ?, ?)',
+                    (job.id, datetime_to_utc_timestamp(job.next_run_time), self._dump(job))
+                )
+            except sqlite3.IntegrityError:
+                raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        with self._lock:
+            cur = self.conn.execute(
+                'UPDATE apscheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?',
+                (datetime_to_utc_timestamp(job.next_run_time), self._dump(job), job.id)
+            )
+        if cur.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            cur = self.conn.execute('DELETE FROM apscheduler_jobs WHERE id = ?', (job_id,))
+        if cur.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM apscheduler_jobs')
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM apscheduler_jobs').fetchone()[0]
+
+    def shutdown(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _dump(self, job):
+        return pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+    def _reconstitute_job(self, job_state):
+        state = pickle.loads(job_state)
+        state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where='', params=()):
+        with self._lock:
+            if self.conn is None:
+                # 调度线程可能在关闭作业库后还会再取一次到期作业
+                return []
+            rows = self.conn.execute(
+                f'SELECT id, job_state FROM apscheduler_jobs {where} ORDER BY next_run_time', params
+            ).fetchall()
+        jobs, failed = [], []
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except Exception as e:
+                # 代码升级后无法还原的作业直接删除，对应任务会在重载时重新调度
+                logging.warning('还原作业%s失败，已删除：%s', job_id, e)
+                failed.append(job_id)
+        if failed:
+            with self._lock:
+                self.conn.executemany('DELETE FROM apscheduler_jobs WHERE id = ?', [(job_id,) for job_id in failed])
+        return jobs
+
+    def __repr__(self):
+        return f'<SQLiteJobStore (path={self.path})>'
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# 直方图桶上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300)
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}={labels[k]}' for k in sorted(labels)) + '}'
+
+
+class Histogram:
+    __slots__ = 'buckets', 'counts', 'count', 'sum', 'max'
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self):
+        # 与 Prometheus 一致，桶计数为累计值
+        cumulative = {}
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        cumulative['+Inf'] = self.count
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'max': round(self.max, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'buckets': cumulative,
+        }
+
+
+class Metrics:
+    """
+    进程内指标：计数器、瞬时值、直方图，线程安全；gauge 也可注册为回调在导出时取值
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._gauge_callbacks = {}
+        self._histograms = {}
+        self.started_at = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def register_gauge(self, name, callback):
+        """callback() 返回 {标签字典的元组: 值} 或单个数值，导出时调用"""
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+            callbacks = list(self._gauge_callbacks.items())
+            result = {
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'uptime_seconds': round(time.time() - self.started_at, 1),
+                'counters': dict(self._counters),
+                'histograms': {key: hist.snapshot() for key, hist in self._histograms.items()},
+            }
+        for name, callback in callbacks:
+            try:
+                value = callback()
+            except Exception as e:
+                logging.warning('指标%s取值失败：%s', name, e)
+                continue
+            if isinstance(value, dict):
+                for labels, v in value.items():
+                    gauges[_key(name, dict(labels))] = v
+            else:
+                gauges[name] = value
+        result['gauges'] = gauges
+        return result
+
+
+class MetricsExporter:
+    """
+    指标导出：定期把快照原子写入本地文件，可选在 127.0.0.1 上提供只读 HTTP 接口（GET /metrics）
+    """
+    def __init__(self, metrics, snapshot_path=None, interval=30, http_port=0):
+        self.metrics = metrics
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.http_port = http_port
+        self._stop = threading.Event()
+        self._server = None
+
+    def start(self):
+        if self.snapshot_path:
+            threading.Thread(target=self._write_loop, name='metrics-snapshot', daemon=True).start()
+        if self.http_port:
+            self._start_http()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.snapshot_path:
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        tmp_path = self.snapshot_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logging.warning('写入指标快照失败：%s', e)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_snapshot()
+
+    def _start_http(self):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.http_port), Handler)
+        except OSError as e:
+            logging.error('指标接口端口%s启动失败：%s', self.http_port, e)
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        logging.info('指标接口：http://127.0.0.1:%s/metrics', self.http_port)
@@ -0,0 +1,75 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class ReminderQueue:
+    """
+    有界提醒队列：同一任务的重复触发合并为计数，按最小间隔限流取出，
+    突发上千次提醒时内存和弹窗数量都保持恒定
+    """
+    def __init__(self, max_pending=200, min_interval=3.0, max_batch=5, clock=time.monotonic):
+        self.max_pending = max_pending
+        self.min_interval = min_interval
+        self.max_batch = max_batch
+        self.clock = clock
+        self.dropped = 0  # 队列满时被挤掉的任务数
+        self._pending = OrderedDict()  # 任务ID -> [任务, 触发次数]
+        self._lock = threading.Lock()
+        self._last_pop = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, task):
+        """可在任意线程调用"""
+        with self._lock:
+            entry = self._pending.get(task['id'])
+            if entry is not None:
+                entry[0] = task
+                entry[1] += 1
+                return
+            if len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[task['id']] = [task, 1]
+
+    def pop_ready(self):
+        """距上次取出不足 min_interval 时返回空列表，否则按先后取出最多 max_batch 条 (任务, 次数)"""
+        now = self.clock()
+        with self._lock:
+            if not self._pending:
+                return []
+            if self._last_pop is not None and now - self._last_pop < self.min_interval:
+                return []
+            self._last_pop = now
+            items = []
+            while self._pending and len(items) < self.max_batch:
+                _, (task, count) = self._pending.popitem(last=False)
+                items.append((task, count))
+            return items
+
+    def take_dropped(self):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+
+def format_reminders(items, dropped=0, remaining=0):
+    """把一批提醒合成一条通知的 (标题, 内容)"""
+    lines = []
+    for task, count in items:
+        content = task.get('content', '') or '时间到了！'
+        suffix = f'（{count}次）' if count > 1 else ''
+        lines.append(f"{task['name']}：{content}{suffix}")
+    if len(items) == 1:
+        task, count = items[0]
+        title = f"提醒：{task['name']}"
+        lines = [(task.get('content', '') or '时间到了！') + (f'（{count}次）' if count > 1 else '')]
+    else:
+        title = f'提醒：{len(items)}个任务'
+    if remaining:
+        lines.append(f'还有{remaining}个提醒稍后显示')
+    if dropped:
+        lines.append(f'提醒过多，已丢弃{dropped}个较早的提醒')
+    return title, '\n'.join(lines)
@@ -0,0 +1,138 @@
+import os
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+
+def new_task_id():
+    return uuid.uuid4().hex
+
+
+class TaskStore:
+    """
+    任务存储：SQLite WAL 模式，按任务增量写入，每次提交都是原子的，
+    首次打开时自动迁移旧的 tasks.json
+    """
+    def __init__(self, path='tasks.db', legacy_json='tasks.json'):
+        self.path = path
+        self._lock = threading.RLock()
+        # 手动管理事务，多线程共用一个连接，由锁串行化
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            'id TEXT PRIMARY KEY, position INTEGER NOT NULL, data TEXT NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_position ON tasks(position)')
+        if legacy_json:
+            self.migrate_json(legacy_json)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            else:
+                self.conn.execute('COMMIT')
+
+    def _upsert(self, conn, task):
+        data = json.dumps(task, ensure_ascii=False)
+        cur = conn.execute('UPDATE tasks SET data = ? WHERE id = ?', (data, task['id']))
+        if cur.rowcount == 0:
+            # 新任务排在末尾，已有任务保持原位置
+            conn.execute(
+                'INSERT INTO tasks (id, position, data) '
+                'VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM tasks), ?)',
+                (task['id'], data)
+            )
+
+    def upsert(self, task):
+        with self.transaction() as conn:
+            self._upsert(conn, task)
+
+    def upsert_many(self, tasks):
+        with self.transaction() as conn:
+            for task in tasks:
+                self._upsert(conn, task)
+
+    def apply(self, upserts=(), deletes=()):
+        # 写入和删除在同一个事务中提交
+        with self.transaction() as conn:
+            for task in upserts:
+                self._upsert(conn, task)
+            if deletes:
+                conn.executemany('DELETE FROM tasks WHERE id = ?', [(task_id,) for task_id in deletes])
+
+    def delete(self, task_id):
+        self.delete_many([task_id])
+
+    def delete_many(self, task_ids):
+        with self.transaction() as conn:
+            conn.executemany('DELETE FROM tasks WHERE id = ?', [(task_id,) for task_id in task_ids])
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def iter_tasks(self, batch_size=500):
+        """按位置顺序流式读取任务，损坏的记录跳过并记录日志"""
+        last_position = None
+        while True:
+            with self._lock:
+                if last_position is None:
+                    rows = self.conn.execute(
+                        'SELECT id, position, data FROM tasks ORDER BY position LIMIT ?', (batch_size,)
+                    ).fetchall()
+                else:
+                    rows = self.conn.execute(
+                        'SELECT id, position, data FROM tasks WHERE position > ? ORDER BY position LIMIT ?',
+                        (last_position, batch_size)
+                    ).fetchall()
+            if not rows:
+                return
+            for task_id, position, data in rows:
+                last_position = position
+                try:
+                    task = json.loads(data)
+                except ValueError as e:
+                    logging.error('任务记录%s损坏，已跳过：%s', task_id, e)
+                    continue
+                task['id'] = task_id
+                yield task
+
+    def migrate_json(self, json_path):
+        """数据库为空且存在旧的 tasks.json 时一次性导入，原文件改名保留"""
+        if not os.path.exists(json_path) or self.count() > 0:
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                tasks = json.load(f)
+        except Exception as e:
+            logging.error('迁移%s失败：%s', json_path, e)
+            return
+        # 格式不对或写入失败时保留原文件，不影响启动，修正后下次启动再迁移
+        if not isinstance(tasks, list) or not all(isinstance(task, dict) for task in tasks):
+            logging.error('迁移%s失败：文件应为任务对象的列表，已保留原文件', json_path)
+            return
+        for task in tasks:
+            if not task.get('id'):
+                task['id'] = new_task_id()
+        try:
+            self.upsert_many(tasks)
+        except Exception as e:
+            logging.error('迁移%s失败，已保留原文件：%s', json_path, e)
+            return
+        os.replace(json_path, json_path + '.migrated')
+        logging.info('已将%s个任务从%s迁移到%s', len(tasks), json_path, self.path)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,89 @@
+"""
+动作执行器：子进程异步执行、超时结束进程、失败原因、执行记录条数；FakeRunner 不执行命令
+"""
+import sys
+import time
+import threading
+import unittest
+from unittest import mock
+
+import actions
+from actions import FakeRunner, SubprocessRunner
+
+COMMANDS = {
+    'ok': [sys.executable, '-c', 'pass'],
+    'fail': [sys.executable, '-c', 'import sys; sys.stderr.write("拒绝访问"); sys.exit(5)'],
+    'hang': [sys.executable, '-c', 'import time; time.sleep(30)'],
+    'missing': ['no-such-command-for-tests'],
+}
+
+
+class SubprocessRunnerTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(actions.ACTION_COMMANDS, COMMANDS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.runner = SubprocessRunner(timeout=0.5, history_size=2)
+        self.results = []
+        self.done = threading.Event()
+        self.runner.listeners.append(self.on_result)
+
+    def on_result(self, result):
+        self.results.append(result)
+        self.done.set()
+
+    def run_action(self, action):
+        self.done.clear()
+        start = time.monotonic()
+        self.runner.run('t1', action)
+        returned = time.monotonic() - start
+        self.assertTrue(self.done.wait(10))
+        return self.results[-1], returned
+
+    def test_success(self):
+        result, _ = self.run_action('ok')
+        self.assertTrue(result.ok)
+        self.assertEqual((result.exit_code, result.timed_out, result.error), (0, False, None))
+
+    def test_failure_keeps_stderr(self):
+        result, _ = self.run_action('fail')
+        self.assertFalse(result.ok)
+        self.assertEqual((result.exit_code, result.error), (5, '拒绝访问'))
+
+    def test_timeout_kills_process_without_blocking_caller(self):
+        result, returned = self.run_action('hang')
+        self.assertLess(returned, 0.5)
+        self.assertTrue(result.timed_out)
+        self.assertFalse(result.ok)
+        self.assertLess(result.duration, 10)
+        self.assertIsNotNone(result.exit_code)
+
+    def test_missing_command(self):
+        result, _ = self.run_action('missing')
+        self.assertFalse(result.ok)
+        self.assertIsNotNone(result.error)
+
+    def test_history_is_bounded_and_forgettable(self):
+        for action in ('ok', 'fail', 'ok'):
+            self.run_action(action)
+        self.assertEqual([r.action for r in self.runner.get_history('t1')], ['fail', 'ok'])
+        self.runner.forget('t1')
+        self.assertEqual(self.runner.get_history('t1'), [])
+
+
+class FakeRunnerTest(unittest.TestCase):
+    def test_records_calls_and_results(self):
+        runner = FakeRunner(exit_code=1)
+        results = []
+        runner.listeners.append(results.append)
+        runner.listeners.insert(0, lambda result: 1 / 0)  # 回调异常不影响其他回调
+        runner.run('t1', '关机')
+        self.assertEqual(runner.calls, [('t1', '关机')])
+        self.assertEqual(len(results), 1)
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[0].to_dict()['command'], actions.ACTION_COMMANDS['关机'])
+        self.assertEqual(runner.get_history('t1'), results)
+
+
+if __name__ == '__main__':
+    unittest.main()
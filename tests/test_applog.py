@@ -0,0 +1,92 @@
+"""
+日志管道：按模板限流、JSON Lines 格式、队列满时丢弃，以及写入轮转文件
+"""
+import os
+import json
+import queue
+import shutil
+import logging
+import tempfile
+import unittest
+
+import applog
+from applog import DroppingQueueHandler, JsonLinesFormatter, RateLimitFilter, setup_logging
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(msg, *args, level=logging.INFO, name='test'):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class RateLimitFilterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.filter = RateLimitFilter(burst=2, interval=60, clock=self.clock)
+
+    def test_same_template_is_limited_regardless_of_args(self):
+        passed = [self.filter.filter(record('任务%s触发', i)) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(self.filter.filter(record('另一条%s', 1)))
+
+    def test_suppressed_count_reported_in_next_window(self):
+        for i in range(5):
+            self.filter.filter(record('任务%s触发', i))
+        self.clock.now = 61
+        item = record('任务%s触发', 9)
+        self.assertTrue(self.filter.filter(item))
+        self.assertEqual(item.getMessage(), '任务9触发（前60秒内另有3条相同日志被抑制）')
+
+    def test_errors_are_never_limited(self):
+        self.assertTrue(all(self.filter.filter(record('失败%s', i, level=logging.ERROR)) for i in range(10)))
+
+
+class HandlerTest(unittest.TestCase):
+    def test_json_lines_formatter(self):
+        item = json.loads(JsonLinesFormatter().format(record('任务%s', '喝水', level=logging.WARNING)))
+        self.assertEqual((item['level'], item['logger'], item['message']), ('WARNING', 'test', '任务喝水'))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(2))
+        for i in range(5):
+            handler.emit(record('任务%s', i))
+        self.assertEqual((handler.queue.qsize(), handler.dropped), (2, 3))
+
+
+class SetupLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        root = logging.getLogger()
+        self.saved = list(root.handlers), root.level
+
+    def tearDown(self):
+        applog.shutdown_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handlers, level = self.saved
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_writes_json_lines_through_queue(self):
+        path = setup_logging({'dir': self.tmpdir, 'file': 'test.log', 'json': True, 'rate_limit': {'burst': 1}}, level='debug')
+        logging.info('任务%s触发', 'a')
+        logging.info('任务%s触发', 'b')
+        logging.error('执行%s失败', '关机')
+        applog.shutdown_logging()
+        with open(path, encoding='utf-8') as f:
+            messages = [json.loads(line)['message'] for line in f]
+        self.assertEqual(messages, ['任务a触发', '执行关机失败'])
+        self.assertEqual(os.path.dirname(path), self.tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+规模基准：合成任务覆盖全部周期类型且都能通过校验，小规模跑一遍各项测量
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import importlib.util
+from contextlib import redirect_stdout
+from io import StringIO
+
+from core import CYCLE_TYPES, Task
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_bench_suite():
+    spec = importlib.util.spec_from_file_location('bench_suite', os.path.join(ROOT, 'benchmarks', 'bench_suite.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+bench_suite = load_bench_suite()
+
+
+class GenerateTasksTest(unittest.TestCase):
+    def test_tasks_are_valid_and_cover_every_cycle(self):
+        tasks = bench_suite.generate_tasks(len(CYCLE_TYPES) * 20)
+        self.assertEqual({task['cycle_type'] for task in tasks}, set(CYCLE_TYPES))
+        for task in tasks:
+            Task.from_dict(task)
+
+    def test_same_seed_same_schedule(self):
+        strip = lambda tasks: [{k: v for k, v in task.items() if k != 'id'} for task in tasks]
+        self.assertEqual(strip(bench_suite.generate_tasks(50)), strip(bench_suite.generate_tasks(50)))
+
+    def test_percentile(self):
+        self.assertEqual(bench_suite.percentile([], 95), 0.0)
+        self.assertEqual(bench_suite.percentile([3, 1, 2, 4, 5], 50), 3)
+        self.assertEqual(bench_suite.percentile([3, 1, 2, 4, 5], 100), 5)
+
+
+class BenchSizeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        # 在空目录中运行，检查基准不会在当前目录留下文件
+        self.rundir = os.path.join(self.tmpdir, 'run')
+        os.mkdir(self.rundir)
+        os.chdir(self.rundir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_small_run_measures_every_operation(self):
+        for backend in ('apscheduler', 'heap'):
+            with self.subTest(backend=backend), redirect_stdout(StringIO()):
+                results = bench_suite.bench_size(40, self.tmpdir, skip_gui=True, backend=backend)
+            ops = [item['op'] for item in results]
+            self.assertEqual(ops[:5], ['save_all', 'save_one', 'load_all', 'engine_start', 'reload_unchanged'])
+            self.assertIn('fire_jitter_1h', ops)
+            self.assertEqual(next(item for item in results if item['op'] == 'load_all')['count'], 40)
+        self.assertEqual(os.listdir(self.rundir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
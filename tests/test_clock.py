@@ -0,0 +1,197 @@
+"""
+时钟监视：识别系统时间调整、休眠恢复、时区和日期变化，引擎只重新计算受影响的作业
+"""
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from clock import ClockMonitor
+from tests.test_engine import RecordingBackend, make_engine, shutdown_task
+
+
+class FakeClock:
+    def __init__(self, wall):
+        self.wall_time = wall
+        self.mono_time = 1000.0
+        self.zone_name = 'Asia/Shanghai'
+        self.zone_calls = 0
+
+    def wall(self):
+        return self.wall_time
+
+    def monotonic(self):
+        return self.mono_time
+
+    def zone(self):
+        self.zone_calls += 1
+        if self.zone_name is None:
+            raise OSError('无法读取时区')
+        return self.zone_name
+
+    def tick(self, seconds, wall_shift=0):
+        self.mono_time += seconds
+        self.wall_time += seconds + wall_shift
+
+
+class ClockMonitorTest(unittest.TestCase):
+    def setUp(self):
+        # 从本地时间中午开始，几分钟内的走时不会跨日
+        noon = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        self.clock = FakeClock(noon.timestamp())
+        self.monitor = ClockMonitor(
+            None, interval=5, tolerance=2, zone_interval=60,
+            wall=self.clock.wall, monotonic=self.clock.monotonic, zone=self.clock.zone
+        )
+        self.assertEqual(self.monitor.check(), [])
+
+    def run_for(self, seconds):
+        # 按检查间隔正常走时，返回期间的全部事件
+        events = []
+        for _ in range(int(seconds // 5)):
+            self.clock.tick(5)
+            events.extend(self.monitor.check())
+        return events
+
+    def test_normal_ticks_report_nothing(self):
+        for _ in range(3):
+            self.clock.tick(5, wall_shift=0.5)
+            self.assertEqual(self.monitor.check(), [])
+
+    def test_wall_clock_jumps(self):
+        self.clock.tick(5, wall_shift=3600)
+        self.assertEqual(self.monitor.check(), [('jump', 3600)])
+        self.clock.tick(5, wall_shift=-600)
+        self.assertEqual(self.monitor.check(), [('jump', -600)])
+
+    def test_long_pause_is_resume(self):
+        # 单调时钟包含休眠时间、系统时间同步前进，只能从检查间隔过长判断
+        self.clock.tick(3600)
+        self.assertEqual(self.monitor.check(), [('resume', 3595)])
+
+    def test_timezone_checked_every_zone_interval(self):
+        self.clock.zone_name = 'Europe/London'
+        self.assertEqual(self.run_for(55), [])
+        self.assertEqual(self.clock.zone_calls, 1)
+        self.assertEqual(self.run_for(5), [('timezone', 0)])
+        self.assertEqual(self.run_for(55), [])
+        self.assertEqual(self.clock.zone_calls, 2)
+
+    def test_jump_rechecks_timezone_immediately(self):
+        self.clock.zone_name = 'Europe/London'
+        self.clock.tick(5, wall_shift=-8 * 3600)
+        self.assertEqual(self.monitor.check(), [('jump', -8 * 3600), ('timezone', 0)])
+
+    def test_zone_read_failure_keeps_last_zone(self):
+        self.clock.zone_name = None
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(self.run_for(60), [])
+        self.clock.zone_name = 'Asia/Shanghai'
+        self.assertEqual(self.run_for(60), [])
+        self.assertEqual(self.clock.zone_calls, 3)
+
+    def test_date_change(self):
+        self.clock.tick(5, wall_shift=13 * 3600)
+        self.assertEqual(self.monitor.check(), [('jump', 13 * 3600), ('date', 0)])
+
+
+class JobsBackend(RecordingBackend):
+    """提供 jobs 列表的后端，记录 pause/resume 与 reschedule"""
+    def __init__(self, jobs, paused=False):
+        super().__init__()
+        self.timezone = datetime.now().astimezone().tzinfo
+        self._jobs = jobs
+        self.paused = paused
+        self.events = []
+        self.rescheduled = []
+
+    def jobs(self):
+        return list(self._jobs)
+
+    def pause(self):
+        self.events.append('pause')
+
+    def resume(self):
+        self.events.append('resume')
+
+    def reschedule(self, task_id, trigger):
+        self.rescheduled.append(task_id)
+
+
+class ClockEventTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = make_engine(self.tmpdir)
+        self.now = datetime.now().astimezone()
+
+    def tearDown(self):
+        self.engine.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def add(self, task, next_time, **backend_options):
+        self.engine.tasks[task.id] = task
+        jobs = getattr(self.engine.backend, '_jobs', None)
+        if jobs is None:
+            self.engine.backend = JobsBackend([], **backend_options)
+            jobs = self.engine.backend._jobs
+        jobs.append((task.id, task.trigger, next_time))
+
+    def counter(self, name):
+        return self.engine.metrics.snapshot()['counters'].get(name, 0)
+
+    def test_resume_skips_fire_missed_while_asleep(self):
+        # 休眠一夜错过的关机，唤醒后不应立即执行
+        self.add(shutdown_task(), self.now - timedelta(hours=9))
+        self.engine.on_clock_event('resume', 9 * 3600)
+        backend = self.engine.backend
+        self.assertEqual(backend.submits, [])
+        self.assertEqual(backend.events, ['pause', 'resume'])
+        self.assertGreater(backend.next_fire_times['t1'], self.now)
+        self.assertEqual(self.counter('skipped_fires{reason=misfire}'), 1)
+        self.assertEqual(self.counter('clock_events{kind=resume}'), 1)
+
+    def test_forward_jump_runs_recently_due_fire(self):
+        due = self.now - timedelta(seconds=30)
+        self.add(shutdown_task(), due)
+        self.add(shutdown_task(id='t2'), self.now + timedelta(hours=1))
+        self.engine.on_clock_event('jump', 60)
+        self.assertEqual(self.engine.backend.submits, [('t1', 'system', due.date())])
+        self.assertNotIn('t2', self.engine.backend.next_fire_times)
+
+    def test_paused_engine_leaves_due_jobs(self):
+        self.add(shutdown_task(), self.now - timedelta(seconds=30), paused=True)
+        self.engine.on_clock_event('jump', 60)
+        self.assertEqual(self.engine.backend.submits, [])
+        self.assertEqual(self.engine.backend.events, [])
+
+    def test_backward_jump_restarts_interval_from_now(self):
+        interval = shutdown_task(id='i1', type='提醒', cycle_type='时间间隔', interval='00:30:00')
+        daily = shutdown_task()
+        # 时间往回调了两小时，按原下次时间要多等两小时
+        self.add(interval, self.now + timedelta(hours=2, minutes=10))
+        self.add(daily, self.now + timedelta(hours=2))
+        self.engine.on_clock_event('jump', -2 * 3600)
+        next_fire_times = self.engine.backend.next_fire_times
+        self.assertEqual(list(next_fire_times), ['i1'])
+        self.assertLessEqual(next_fire_times['i1'], datetime.now().astimezone() + timedelta(minutes=30))
+
+    def test_timezone_change_rebuilds_local_time_triggers(self):
+        self.add(shutdown_task(id='i1', type='提醒', cycle_type='时间间隔', interval='00:30:00'), self.now)
+        self.add(shutdown_task(id='i2', type='提醒', cycle_type='时间间隔', interval='00:30:00',
+                               remind_start='09:00', remind_end='18:00'), self.now)
+        self.add(shutdown_task(), self.now + timedelta(hours=1))
+        self.engine.on_clock_event('timezone', 0)
+        self.assertEqual(self.engine.backend.rescheduled, ['i2', 't1'])
+        self.assertEqual(self.engine.backend.submits, [])
+
+    def test_date_change_does_not_touch_jobs(self):
+        self.add(shutdown_task(), self.now - timedelta(seconds=30))
+        self.engine.holiday_calendar.needs_refresh = lambda year: False
+        self.engine.on_clock_event('date', 0)
+        self.assertEqual(self.engine.backend.events, [])
+        self.assertEqual(self.engine.backend.submits, [])
+        self.assertEqual(self.counter('clock_events{kind=date}'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+控制接口：口令与浏览器请求的拒绝、批量请求全部生效或全部拒绝、更新只改动给出的字段、单实例检测
+"""
+import os
+import json
+import shutil
+import socket
+import tempfile
+import unittest
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+
+from control import TOKEN_HEADER, ControlServer, call, is_running, load_token, open_control
+from core import Task
+from tests.test_engine import make_engine
+
+TOKEN = 'test-token'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def reminder(task_id, **fields):
+    return dict({'id': task_id, 'name': task_id, 'type': '提醒', 'cycle_type': '每天', 'time': '09:00'}, **fields)
+
+
+class ControlTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = make_engine(self.tmpdir)
+        self.engine.start(refresh_holidays=False, paused=True)
+        self.port = free_port()
+        self.control = ControlServer(self.port, TOKEN)
+        self.assertTrue(self.control.bind())
+        self.control.start(self.engine)
+
+    def tearDown(self):
+        self.control.stop()
+        self.engine.shutdown()
+        self.engine.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def post(self, path, body=None, token=TOKEN):
+        return call(self.port, 'POST', path, body if body is not None else {}, token=token)
+
+    def get(self, path, token=TOKEN):
+        return call(self.port, 'GET', path, token=token)
+
+    def stored_ids(self):
+        return [task['id'] for task in self.engine.store.iter_tasks()]
+
+
+class AuthTest(ControlTestCase):
+    def raw(self, method, path, headers, data=None):
+        req = Request(f'http://127.0.0.1:{self.port}{path}', data=data, method=method, headers=headers)
+        try:
+            with urlopen(req, timeout=5) as resp:
+                return resp.status
+        except HTTPError as e:
+            e.close()
+            return e.code
+
+    def test_ping_needs_no_token(self):
+        self.assertEqual(self.get('/ping', token=None), (200, {'app': 'dingshitixing'}))
+        self.assertTrue(is_running(self.port))
+
+    def test_token_required(self):
+        self.assertEqual(self.get('/status', token=None)[0], 401)
+        self.assertEqual(self.get('/status', token='wrong')[0], 401)
+        self.assertEqual(self.post('/tasks/create', {'tasks': [reminder('a')]}, token=None)[0], 401)
+        status, data = self.get('/status')
+        self.assertEqual((status, data['tasks']), (200, 0))
+
+    def test_browser_requests_rejected(self):
+        headers = {TOKEN_HEADER: TOKEN, 'Origin': 'http://example.com'}
+        self.assertEqual(self.raw('GET', '/status', headers), 403)
+        body = json.dumps({'tasks': [reminder('a')]}).encode('utf-8')
+        self.assertEqual(self.raw('POST', '/tasks/create', {TOKEN_HEADER: TOKEN, 'Content-Type': 'text/plain'}, body), 415)
+        self.assertEqual(self.engine.tasks, {})
+
+    def test_load_token_generates_once(self):
+        path = os.path.join(self.tmpdir, 'control.token')
+        token = load_token({'token_path': path})
+        self.assertEqual(load_token({'token_path': path}), token)
+        self.assertEqual(load_token({'token': 'fixed', 'token_path': path}), 'fixed')
+        if os.name == 'posix':
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_second_instance_detected(self):
+        server, running = open_control({'port': self.port, 'token': TOKEN})
+        self.assertIsNone(server)
+        self.assertTrue(running)
+
+
+class BatchTest(ControlTestCase):
+    def setUp(self):
+        super().setUp()
+        self.assertEqual(self.post('/tasks/create', {'tasks': [reminder('a'), reminder('b')]})[0], 200)
+
+    def test_create_schedules_tasks(self):
+        self.assertEqual(self.stored_ids(), ['a', 'b'])
+        self.assertEqual(self.engine.scheduled_job_count(), 2)
+
+    def test_one_invalid_task_rejects_whole_batch(self):
+        status, data = self.post('/tasks/create', {'tasks': [reminder('c'), reminder('d', time='25:00'), 'x']})
+        self.assertEqual(status, 400)
+        self.assertEqual([item['index'] for item in data['errors']], [1, 2])
+        self.assertEqual(self.stored_ids(), ['a', 'b'])
+        self.assertNotIn('c', self.engine.tasks)
+
+    def test_wrong_field_types_are_client_errors(self):
+        for task in (reminder('c', cycle_type='自定义', days=3), reminder('c', max_instances=[1]), reminder({})):
+            with self.subTest(task=task):
+                status, data = self.post('/tasks/create', {'tasks': [task]})
+                self.assertEqual(status, 400, data)
+        self.assertEqual(self.post('/tasks/update', {'tasks': [{'id': 'a', 'days': {'x': 1}, 'cycle_type': '自定义'}]})[0], 400)
+        self.assertEqual(self.post('/tasks/delete', {'ids': ['a', {}]})[0], 400)
+        self.assertEqual(self.stored_ids(), ['a', 'b'])
+
+    def test_existing_and_duplicate_ids(self):
+        self.assertEqual(self.post('/tasks/create', {'tasks': [reminder('a')]})[0], 400)
+        self.assertEqual(self.post('/tasks/create', {'tasks': [reminder('c'), reminder('c')]})[0], 400)
+        status, _ = self.post('/tasks/create', {'tasks': [reminder('a', name='覆盖')], 'replace': True})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.engine.tasks['a'].name, '覆盖')
+
+    def test_update_only_changes_given_fields(self):
+        # 界面创建的提醒可以没有提醒时段，通过接口改名不应补上默认时段
+        self.engine.upsert_tasks([Task.from_dict(reminder('w'))])
+        before = self.engine.tasks['w'].to_dict()
+        self.assertNotIn('remind_start', before)
+        self.assertEqual(self.post('/tasks/update', {'tasks': [{'id': 'w', 'name': '改名'}]})[0], 200)
+        after = self.engine.tasks['w'].to_dict()
+        self.assertEqual(after, dict(before, name='改名'))
+        stored = next(task for task in self.engine.store.iter_tasks() if task['id'] == 'w')
+        self.assertEqual(stored, after)
+
+    def test_update_missing_task_rejects_batch(self):
+        status, _ = self.post('/tasks/update', {'tasks': [{'id': 'a', 'name': '改名'}, {'id': 'zzz', 'name': 'x'}]})
+        self.assertEqual(status, 400)
+        self.assertEqual(self.engine.tasks['a'].name, 'a')
+
+    def test_enable_disable_delete(self):
+        self.assertEqual(self.post('/tasks/disable', {'ids': ['a', 'a']}), (200, {'disabled': 1}))
+        self.assertEqual(self.engine.tasks['a'].status, '禁用')
+        self.assertEqual(self.engine.scheduled_job_count(), 1)
+        self.assertEqual(self.post('/tasks/delete', {'ids': ['a', 'missing']})[0], 400)
+        self.assertEqual(self.stored_ids(), ['a', 'b'])
+        self.assertEqual(self.post('/tasks/delete', {'ids': ['a']}), (200, {'deleted': 1}))
+        self.assertEqual(self.stored_ids(), ['b'])
+
+    def test_enable_custom_task_without_days_rejected(self):
+        self.assertEqual(self.post('/tasks/create', {'tasks': [reminder('c', cycle_type='自定义', status='禁用')]})[0], 200)
+        status, data = self.post('/tasks/enable', {'ids': ['a', 'c']})
+        self.assertEqual(status, 400)
+        self.assertEqual([item['index'] for item in data['errors']], [1])
+        self.assertEqual(self.engine.tasks['c'].status, '禁用')
+
+    def test_store_failure_changes_nothing(self):
+        def fail(*args):
+            raise OSError('disk full')
+        self.engine.store.apply = fail
+        status, _ = self.post('/tasks/create', {'tasks': [reminder('c')]})
+        self.assertEqual(status, 500)
+        self.assertNotIn('c', self.engine.tasks)
+        self.assertEqual(self.engine.scheduled_job_count(), 2)
+
+    def test_bad_body(self):
+        self.assertEqual(self.post('/tasks/create', {'task': []})[0], 400)
+        self.assertEqual(self.post('/nowhere')[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
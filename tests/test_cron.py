@@ -0,0 +1,67 @@
+"""
+Cron表达式：crontab 星期编号换算、日和周都限定时的“或”语义、无效表达式
+"""
+import unittest
+from datetime import datetime
+
+from core import Task, _cron_weekdays, cron_trigger
+
+
+def fires(expr, start, count):
+    trigger = cron_trigger(expr)
+    result, previous, now = [], None, start.astimezone()
+    for _ in range(count):
+        now = trigger.get_next_fire_time(previous, now)
+        result.append(now.strftime('%Y-%m-%d %H:%M %a'))
+        previous = now
+    return result
+
+
+class CronWeekdayTest(unittest.TestCase):
+    def test_crontab_numbering(self):
+        self.assertEqual(_cron_weekdays('0'), 'sun')
+        self.assertEqual(_cron_weekdays('7'), 'sun')
+        self.assertEqual(_cron_weekdays('1'), 'mon')
+        self.assertEqual(_cron_weekdays('1-5'), 'mon,tue,wed,thu,fri')
+        self.assertEqual(_cron_weekdays('5-7'), 'sun,fri,sat')
+        self.assertEqual(_cron_weekdays('*/2'), 'sun,tue,thu,sat')
+        self.assertEqual(_cron_weekdays('MON,wed'), 'mon,wed')
+        self.assertEqual(_cron_weekdays('*'), '*')
+
+    def test_invalid_weekdays(self):
+        for field in ('8', '5-1', 'xyz'):
+            with self.subTest(field=field):
+                self.assertRaises(ValueError, _cron_weekdays, field)
+
+
+class CronTriggerTest(unittest.TestCase):
+    def test_weekday_only(self):
+        # 2026-10-01 是周四
+        self.assertEqual(fires('30 8 * * 1-5', datetime(2026, 10, 2, 9, 0), 2), [
+            '2026-10-05 08:30 Mon', '2026-10-06 08:30 Tue',
+        ])
+
+    def test_day_and_weekday_match_either(self):
+        self.assertEqual(fires('0 9 1 * 1', datetime(2026, 9, 30, 10, 0), 4), [
+            '2026-10-01 09:00 Thu', '2026-10-05 09:00 Mon', '2026-10-12 09:00 Mon', '2026-10-19 09:00 Mon',
+        ])
+
+    def test_day_with_wildcard_weekday_matches_day_only(self):
+        self.assertEqual(fires('0 9 1 * *', datetime(2026, 9, 30, 10, 0), 2), [
+            '2026-10-01 09:00 Thu', '2026-11-01 09:00 Sun',
+        ])
+
+    def test_invalid_expressions(self):
+        for expr in ('0 9 * *', '61 9 * * *', '0 9 * * 8', '0 9 32 * *'):
+            with self.subTest(expr=expr):
+                self.assertRaises(ValueError, cron_trigger, expr)
+
+    def test_task_validates_expression(self):
+        with self.assertRaises(ValueError):
+            Task.from_dict({'name': 'x', 'cycle_type': 'Cron表达式', 'cron': '0 25 * * *'})
+        task = Task.from_dict({'name': 'x', 'cycle_type': 'Cron表达式', 'cron': ' 0  9 * *  1 '})
+        self.assertEqual(task.cron, '0 9 * * 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+"""
+调度引擎：任务增删改只调度有变化的作业、法定日任务触发前的核对、重启后恢复作业并处理停机期间错过的触发
+"""
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+
+from actions import FakeRunner
+from config import load_settings
+from core import SchedulerEngine, Task, build_trigger
+from holiday import HolidayCalendar, StaticHolidayProvider
+from store import TaskStore
+from triggers import WeekdayTrigger
+
+
+def make_engine(tmpdir, holidays=None, **overrides):
+    """引擎使用临时目录中的存储、本地法定日数据和 FakeRunner，不持久化作业、不写指标快照"""
+    settings = load_settings(None)
+    settings['jobstore']['path'] = None
+    settings['metrics']['snapshot_path'] = None
+    settings.update(overrides)
+    calendar = HolidayCalendar(StaticHolidayProvider(holidays or {}), cache_path=os.path.join(tmpdir, 'holidays.json'))
+    store = TaskStore(os.path.join(tmpdir, 'tasks.db'), legacy_json=os.path.join(tmpdir, 'tasks.json'))
+    return SchedulerEngine(store=store, calendar=calendar, settings=settings, action_runner=FakeRunner())
+
+
+class EngineTestCase(unittest.TestCase):
+    """启动一个暂停状态的引擎，记录对调度后端的 schedule/unschedule 调用"""
+    backend = 'apscheduler'
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = make_engine(self.tmpdir, scheduler_backend=self.backend)
+        self.engine.start(refresh_holidays=False, paused=True)
+        self.calls = []
+        backend = self.engine.backend
+        schedule, unschedule = backend.schedule, backend.unschedule
+
+        def record_schedule(task_id, *args):
+            self.calls.append(('schedule', task_id))
+            schedule(task_id, *args)
+
+        def record_unschedule(task_id):
+            self.calls.append(('unschedule', task_id))
+            unschedule(task_id)
+        backend.schedule, backend.unschedule = record_schedule, record_unschedule
+
+    def tearDown(self):
+        self.engine.shutdown()
+        self.engine.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+def reminder(task_id, **fields):
+    return dict({'id': task_id, 'name': task_id, 'type': '提醒', 'cycle_type': '每天', 'time': '09:00'}, **fields)
+
+
+class IncrementalScheduleTest(EngineTestCase):
+    def setUp(self):
+        super().setUp()
+        for task_id in ('a', 'b', 'c'):
+            self.engine.add_task(reminder(task_id))
+        del self.calls[:]
+
+    def test_add_schedules_only_the_new_task(self):
+        self.engine.add_task(reminder('d'))
+        self.assertEqual(self.calls, [('schedule', 'd')])
+        self.assertIsNotNone(self.engine.next_fire_time('d'))
+
+    def test_update_without_schedule_change_keeps_job(self):
+        next_time = self.engine.next_fire_time('a')
+        self.engine.update_task(reminder('a', name='改名', content='新内容'))
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.engine.next_fire_time('a'), next_time)
+        self.assertEqual(self.engine.store.count(), 3)
+
+    def test_update_with_new_time_reschedules_only_that_task(self):
+        self.engine.update_task(reminder('b', time='10:00'))
+        self.assertEqual(self.calls, [('schedule', 'b')])
+        self.assertEqual(self.engine.next_fire_time('b').strftime('%H:%M'), '10:00')
+
+    def test_disable_and_remove_unschedule(self):
+        self.engine.set_enabled('a', False)
+        self.engine.remove_task('b')
+        self.assertEqual(self.calls, [('unschedule', 'a'), ('unschedule', 'b')])
+        self.assertIsNone(self.engine.next_fire_time('a'))
+        self.assertEqual(self.engine.scheduled_job_count(), 1)
+
+    def test_reload_only_touches_differences(self):
+        self.engine.tasks.pop('c')
+        self.engine.reload_schedules()
+        self.assertEqual(self.calls, [('unschedule', 'c')])
+
+
+class HeapIncrementalScheduleTest(IncrementalScheduleTest):
+    backend = 'heap'
+
+
+class HolidayCheckTest(unittest.TestCase):
+    # 2026-10-10 是周六调休上班，2026-10-05 是周一国庆假期；触发时按原触发日期再核对一次
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = make_engine(self.tmpdir, holidays={'2026-10-10': True, '2026-10-05': False})
+        self.engine.holiday_calendar.prefetch([2026])
+
+    def tearDown(self):
+        self.engine.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def fire(self, cycle_type, fire_date):
+        self.engine.tasks['t1'] = Task.from_dict(
+            {'id': 't1', 'name': '关机', 'type': '关机', 'cycle_type': cycle_type, 'time': '22:00'}
+        )
+        self.engine.trigger_task('t1', fire_date)
+        return self.engine.action_runner.calls
+
+    def test_workday_task_runs_on_adjusted_saturday(self):
+        self.assertEqual(self.fire('法定工作日', date(2026, 10, 10)), [('t1', '关机')])
+
+    def test_workday_task_skips_public_holiday(self):
+        self.assertEqual(self.fire('法定工作日', date(2026, 10, 5)), [])
+        counters = self.engine.metrics.snapshot()['counters']
+        self.assertEqual(counters.get('skipped_fires{reason=not_workday}'), 1)
+
+    def test_holiday_task_runs_on_public_holiday(self):
+        self.assertEqual(self.fire('法定节假日', date(2026, 10, 5)), [('t1', '关机')])
+
+    def test_holiday_task_skips_adjusted_saturday(self):
+        self.assertEqual(self.fire('法定节假日', date(2026, 10, 10)), [])
+
+
+class RecordingBackend:
+    """只记录引擎对后端的调用"""
+    def __init__(self):
+        self.submits = []
+        self.next_fire_times = {}
+
+    def submit(self, task_id, executor, fire_date=None):
+        self.submits.append((task_id, executor, fire_date))
+
+    def set_next_fire_time(self, task_id, next_run_time):
+        self.next_fire_times[task_id] = next_run_time
+
+
+def shutdown_task(**fields):
+    return Task.from_dict(dict({'id': 't1', 'name': '关机', 'type': '关机', 'cycle_type': '每天', 'time': '22:00'}, **fields))
+
+
+class CatchUpTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = make_engine(self.tmpdir)
+        self.engine.backend = RecordingBackend()
+        self.now = datetime.now().astimezone().replace(microsecond=0)
+        self.trigger = WeekdayTrigger(times=((22, 0, 0),))
+
+    def tearDown(self):
+        self.engine.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def catch_up(self, task, late):
+        self.engine.catch_up(task, self.trigger, self.now - late, 'system', self.now)
+        return self.engine.backend.submits
+
+    def counter(self, name):
+        return self.engine.metrics.snapshot()['counters'].get(name, 0)
+
+    def test_fire_missed_long_ago_is_skipped(self):
+        # 昨晚错过的关机，开机后不应立即执行
+        self.assertEqual(self.catch_up(shutdown_task(), timedelta(hours=9)), [])
+        self.assertEqual(self.counter('skipped_fires{reason=misfire}'), 1)
+        self.assertGreater(self.engine.backend.next_fire_times['t1'], self.now)
+
+    def test_fire_within_grace_runs_once(self):
+        submits = self.catch_up(shutdown_task(), timedelta(seconds=30))
+        self.assertEqual(submits, [('t1', 'system', (self.now - timedelta(seconds=30)).date())])
+        self.assertEqual(self.counter('catchup_fires{policy=run_once}'), 1)
+
+    def test_task_grace_overrides_default(self):
+        self.assertEqual(len(self.catch_up(shutdown_task(misfire_grace_time=3600), timedelta(minutes=30))), 1)
+
+    def test_zero_grace_means_unlimited(self):
+        self.assertEqual(len(self.catch_up(shutdown_task(misfire_grace_time=0), timedelta(hours=9))), 1)
+
+    def test_run_all_submits_each_missed_fire(self):
+        self.engine.settings['jobstore']['catchup'] = 'run_all'
+        task = shutdown_task(misfire_grace_time=0)
+        trigger = build_trigger(task, shared=False)
+        fire_time = trigger.get_next_fire_time(None, self.now - timedelta(days=3))
+        self.engine.catch_up(task, trigger, fire_time, 'system', self.now)
+        expected = []
+        while fire_time <= self.now:
+            expected.append(fire_time.date())
+            fire_time = trigger.get_next_fire_time(fire_time, fire_time)
+        self.assertEqual([fire_date for _, _, fire_date in self.engine.backend.submits], expected)
+
+    def test_skip_policy_only_moves_next_fire_time(self):
+        self.engine.settings['jobstore']['catchup'] = 'skip'
+        self.assertEqual(self.catch_up(shutdown_task(), timedelta(seconds=30)), [])
+        self.assertEqual(self.counter('skipped_fires{reason=downtime}'), 1)
+        self.assertIn('t1', self.engine.backend.next_fire_times)
+
+
+class RestartTest(unittest.TestCase):
+    """作业保存在 jobs.db 中，重启后恢复原下次执行时间并补执行"""
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.jobs_path = os.path.join(self.tmpdir, 'jobs.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def start(self, paused=True):
+        engine = make_engine(self.tmpdir)
+        engine.settings['jobstore']['path'] = self.jobs_path
+        engine.start(refresh_holidays=False, paused=paused)
+        return engine
+
+    def stop(self, engine):
+        engine.shutdown()
+        engine.store.close()
+
+    def test_restored_jobs_keep_next_fire_time(self):
+        engine = self.start()
+        engine.add_task(shutdown_task().to_dict())
+        next_time = engine.next_fire_time('t1')
+        self.stop(engine)
+        engine = self.start()
+        try:
+            self.assertEqual(engine.next_fire_time('t1'), next_time)
+            self.assertEqual(engine.scheduled_job_count(), 1)
+        finally:
+            self.stop(engine)
+
+    def test_deleted_task_job_is_removed_on_restart(self):
+        engine = self.start()
+        engine.add_task(shutdown_task().to_dict())
+        engine.store.delete('t1')
+        self.stop(engine)
+        engine = self.start()
+        try:
+            self.assertEqual(engine.scheduled_job_count(), 0)
+        finally:
+            self.stop(engine)
+
+    def test_fire_missed_while_down_runs_after_restart(self):
+        engine = self.start()
+        engine.add_task(shutdown_task().to_dict())
+        engine.backend.set_next_fire_time('t1', datetime.now(engine.backend.timezone) - timedelta(seconds=20))
+        self.stop(engine)
+        engine = self.start(paused=False)
+        try:
+            deadline = time.monotonic() + 5
+            while not engine.action_runner.calls and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(engine.action_runner.calls, [('t1', '关机')])
+            self.assertGreater(engine.next_fire_time('t1'), datetime.now(engine.backend.timezone))
+        finally:
+            self.stop(engine)
+
+
+if __name__ == '__main__':
+    unittest.main()
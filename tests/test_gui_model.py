@@ -0,0 +1,75 @@
+"""
+任务表格模型：按行增量通知视图、按列排序、下次执行时间列
+"""
+import os
+import unittest
+from datetime import datetime
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+try:
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+except ImportError:  # 无界面环境未安装 PyQt5
+    QApplication = None
+
+from core import Task
+
+
+def task(task_id, name, time='09:00', status='启用'):
+    return Task.from_dict({'id': task_id, 'name': name, 'cycle_type': '每天', 'time': time, 'status': status})
+
+
+@unittest.skipIf(QApplication is None, '未安装 PyQt5')
+class TaskTableModelTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        from gui import TaskTableModel
+        self.fire_times = {'a': datetime(2026, 10, 18, 9, 0), 'c': datetime(2026, 10, 17, 23, 0)}
+        self.model = TaskTableModel(
+            [task('a', '喝水'), task('b', '休息', status='禁用'), task('c', '吃饭', '23:00')],
+            next_fire_time=self.fire_times.get, next_fire_times=lambda: dict(self.fire_times)
+        )
+        self.events = []
+        self.model.rowsInserted.connect(lambda parent, first, last: self.events.append(('inserted', first, last)))
+        self.model.rowsRemoved.connect(lambda parent, first, last: self.events.append(('removed', first, last)))
+        self.model.dataChanged.connect(
+            lambda top, bottom, roles=(): self.events.append(('changed', top.row(), bottom.row()))
+        )
+        self.model.modelReset.connect(lambda: self.events.append(('reset',)))
+
+    def cell(self, row, column):
+        return self.model.data(self.model.index(row, column))
+
+    def test_cells(self):
+        self.assertEqual(self.model.rowCount(), 3)
+        self.assertEqual(self.model.columnCount(), len(self.model.HEADERS))
+        self.assertEqual([self.cell(0, column) for column in range(5)], ['喝水', '提醒', '每天', '09:00:00', '启用'])
+        self.assertEqual(self.cell(0, self.model.NEXT_FIRE_COLUMN), '2026-10-18 09:00:00')
+        self.assertEqual(self.cell(1, self.model.NEXT_FIRE_COLUMN), '')
+
+    def test_row_changes_are_incremental(self):
+        self.model.append_task(task('d', '散步'))
+        self.model.replace_task(1, task('b', '休息'))
+        self.assertEqual(self.model.remove_task(0).id, 'a')
+        self.assertEqual(self.events, [('inserted', 3, 3), ('changed', 1, 1), ('removed', 0, 0)])
+        self.assertEqual([t.id for t in self.model.tasks], ['b', 'c', 'd'])
+
+    def test_next_fire_change_only_touches_its_column(self):
+        self.model.next_fire_changed()
+        self.assertEqual(self.events, [('changed', 0, 2)])
+
+    def test_sort_by_name_and_next_fire(self):
+        self.model.sort(0)
+        self.assertEqual([t.name for t in self.model.tasks], sorted(['喝水', '休息', '吃饭']))
+        self.model.sort(self.model.NEXT_FIRE_COLUMN)
+        # 没有下次执行时间的排在最后
+        self.assertEqual([t.id for t in self.model.tasks], ['c', 'a', 'b'])
+        self.model.sort(self.model.NEXT_FIRE_COLUMN, Qt.DescendingOrder)
+        self.assertEqual([t.id for t in self.model.tasks], ['b', 'a', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
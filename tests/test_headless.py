@@ -0,0 +1,61 @@
+"""
+无界面模式：在临时目录中 --headless --dry-run 加载并调度任务，不加载 PyQt5
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = '''
+import sys
+import main
+try:
+    main.main(['--headless', '--dry-run'])
+except SystemExit as e:
+    print('exit', e.code)
+print('pyqt', any(name.startswith('PyQt5') for name in sys.modules))
+'''
+
+
+class HeadlessTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        settings = {
+            'control': {'port': 0},
+            'jobstore': {'path': None},
+            'metrics': {'snapshot_path': None},
+            'logging': {'dir': os.path.join(self.tmpdir, 'logs')},
+        }
+        with open(os.path.join(self.tmpdir, 'settings.json'), 'w', encoding='utf-8') as f:
+            json.dump(settings, f)
+        tasks = [
+            {'id': 'a', 'name': '喝水', 'type': '提醒', 'cycle_type': '每天', 'time': '09:00'},
+            {'id': 'b', 'name': '关机', 'type': '关机', 'cycle_type': '周末', 'time': '23:00', 'status': '禁用'},
+            {'id': 'c', 'name': '', 'type': '提醒', 'cycle_type': '每天'},
+        ]
+        with open(os.path.join(self.tmpdir, 'tasks.json'), 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, ensure_ascii=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_dry_run_schedules_without_pyqt(self):
+        env = dict(os.environ, PYTHONPATH=ROOT, PYTHONIOENCODING='utf-8')
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT], cwd=self.tmpdir, env=env, capture_output=True, text=True,
+            encoding='utf-8', timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = result.stdout.splitlines()
+        self.assertIn('已加载2个任务，已调度1个', lines)
+        self.assertTrue(any(line.startswith('1个任务格式有误') for line in lines))
+        self.assertEqual(lines[-2:], ['exit 0', 'pyqt False'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+堆后端：同一时刻的作业合并成一桶、容错时间和最大并发数跳过、错过多次合并、周期作业立即执行
+"""
+import time
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from apscheduler.triggers.interval import IntervalTrigger
+
+from backends import HeapBackend, create_backend
+from config import load_settings
+from metrics import Metrics
+from triggers import WeekdayTrigger
+
+
+class RecordingPool:
+    """代替线程池，记录每次提交并立即同步执行"""
+    def __init__(self):
+        self.submits = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submits.append(args)
+        fn(*args, **kwargs)
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def make_backend():
+    settings = load_settings(None)
+    settings['jobstore']['path'] = None
+    fired = []
+    metrics = Metrics()
+    backend = HeapBackend(settings, metrics, lambda task_id, fire_date=None: fired.append(task_id))
+    pool = RecordingPool()
+    # 不启动调度线程，测试里直接调用 _fire 处理一桶作业
+    backend._pools = {name: pool for name in settings['executors']}
+    return backend, pool, fired, metrics
+
+
+def skipped(metrics, reason):
+    return metrics.snapshot()['counters'].get(f'skipped_fires{{reason={reason}}}', 0)
+
+
+class HeapBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.backend, self.pool, self.fired, self.metrics = make_backend()
+        self.now = datetime.now(self.backend.timezone).replace(microsecond=0)
+
+    def schedule(self, task_id, trigger=None, fire_time=None, **options):
+        options.setdefault('executor', 'reminder')
+        self.backend.schedule(task_id, trigger or WeekdayTrigger(times=((9, 0, 0),)), None, options)
+        if fire_time is not None:
+            self.backend.set_next_fire_time(task_id, fire_time)
+        return self.backend._entries[f'task_{task_id}']
+
+    def fire(self, fire_time):
+        ts = fire_time.timestamp()
+        self.assertIn(ts, self.backend._heap)
+        self.backend._fire(self.backend._buckets.pop(ts))
+
+    def test_same_instant_is_one_bucket_and_one_batch_per_executor(self):
+        fire_time = self.now - timedelta(seconds=1)
+        for task_id in ('a', 'b', 'c'):
+            self.schedule(task_id, fire_time=fire_time)
+        self.schedule('d', fire_time=fire_time, executor='system')
+        ts = fire_time.timestamp()
+        self.assertEqual(self.backend._heap.count(ts), 1)
+        self.assertEqual(len(self.backend._buckets[ts]), 4)
+        self.fire(fire_time)
+        self.assertEqual(sorted(self.fired), ['a', 'b', 'c', 'd'])
+        # 每个线程池一次提交
+        self.assertEqual(sorted(len(args[0]) for args in self.pool.submits), [1, 3])
+
+    def test_shared_trigger_moves_all_entries_to_next_time(self):
+        fire_time = self.now - timedelta(seconds=1)
+        entries = [self.schedule(task_id, fire_time=fire_time) for task_id in ('a', 'b')]
+        self.assertIs(entries[0].trigger, entries[1].trigger)
+        self.fire(fire_time)
+        self.assertEqual(entries[0].next_time, entries[1].next_time)
+        self.assertGreater(entries[0].next_time, self.now)
+
+    def test_fire_past_grace_time_is_skipped(self):
+        fire_time = self.now - timedelta(seconds=120)
+        self.schedule('late', fire_time=fire_time, misfire_grace_time=60)
+        self.fire(fire_time)
+        self.assertEqual(self.fired, [])
+        self.assertEqual(skipped(self.metrics, 'misfire'), 1)
+
+    def test_unlimited_grace_time_still_fires(self):
+        fire_time = self.now - timedelta(hours=5)
+        self.schedule('late', fire_time=fire_time, misfire_grace_time=None)
+        self.fire(fire_time)
+        self.assertEqual(self.fired, ['late'])
+
+    def test_max_instances_skips_while_running(self):
+        fire_time = self.now - timedelta(seconds=1)
+        entry = self.schedule('busy', fire_time=fire_time, max_instances=1)
+        entry.running = 1
+        self.fire(fire_time)
+        self.assertEqual(self.fired, [])
+        self.assertEqual(skipped(self.metrics, 'max_instances'), 1)
+
+    def test_coalesce_jumps_past_missed_fires(self):
+        trigger = IntervalTrigger(seconds=10, start_date=self.now - timedelta(seconds=100))
+        fire_time = self.now - timedelta(seconds=40)
+        entry = self.schedule('c', trigger, fire_time, coalesce=True, misfire_grace_time=None)
+        self.fire(fire_time)
+        self.assertEqual(self.fired, ['c'])
+        self.assertGreater(entry.next_time, datetime.now(self.backend.timezone) - timedelta(seconds=1))
+
+    def test_without_coalesce_next_fire_is_the_next_missed_one(self):
+        trigger = IntervalTrigger(seconds=10, start_date=self.now - timedelta(seconds=100))
+        fire_time = self.now - timedelta(seconds=40)
+        entry = self.schedule('c', trigger, fire_time, coalesce=False, misfire_grace_time=None)
+        self.fire(fire_time)
+        self.assertEqual(entry.next_time, fire_time + timedelta(seconds=10))
+
+    def test_periodic_job_is_due_immediately(self):
+        before = datetime.now(self.backend.timezone)
+        self.backend.add_periodic(lambda: None, 3600, 'network', 'refresh')
+        entry = self.backend._entries['refresh']
+        self.assertLessEqual(entry.next_time, datetime.now(self.backend.timezone))
+        self.assertGreaterEqual(entry.next_time, before)
+        # 之后按间隔
+        following = entry.trigger.get_next_fire_time(entry.next_time, entry.next_time)
+        self.assertEqual(following - entry.next_time, timedelta(seconds=3600))
+
+
+class PeriodicFirstRunTest(unittest.TestCase):
+    def test_both_backends_run_periodic_job_on_start(self):
+        for name in ('apscheduler', 'heap'):
+            with self.subTest(backend=name):
+                settings = load_settings(None)
+                settings['jobstore']['path'] = None
+                settings['scheduler_backend'] = name
+                backend = create_backend(settings, Metrics(), lambda *args, **kwargs: None)
+                backend.start()
+                ran = threading.Event()
+                try:
+                    backend.add_periodic(ran.set, 6 * 3600, 'network', 'holiday_refresh')
+                    self.assertTrue(ran.wait(5))
+                finally:
+                    backend.shutdown()
+                    time.sleep(0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
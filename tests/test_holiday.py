@@ -0,0 +1,95 @@
+"""
+法定日日历：本地数据源、按位存储的查询、缺少数据时按周一至周五判断、缓存读写、拉取失败继续使用本地数据
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from holiday import HolidayCalendar, HolidayProvider, StaticHolidayProvider
+
+# 2026-10-05 周一为国庆假期，2026-10-10 周六调休上班
+DATA = {'2026-10-05': False, '2026-10-10': True, date(2026, 10, 12): True}
+
+
+class FailingProvider(HolidayProvider):
+    def fetch_year(self, year):
+        raise ConnectionError('offline')
+
+
+class HolidayCalendarTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmpdir, 'holidays.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def calendar(self, provider=None):
+        return HolidayCalendar(provider or StaticHolidayProvider(DATA), cache_path=self.cache_path)
+
+    def test_static_provider_filters_by_year(self):
+        provider = StaticHolidayProvider(dict(DATA, **{'2027-01-01': False}))
+        self.assertEqual(provider.fetch_year(2026), {
+            date(2026, 10, 5): False, date(2026, 10, 10): True, date(2026, 10, 12): True,
+        })
+        self.assertEqual(provider.fetch_year(2027), {date(2027, 1, 1): False})
+
+    def test_known_days_override_weekdays(self):
+        calendar = self.calendar()
+        self.assertTrue(calendar.prefetch([2026]))
+        self.assertFalse(calendar.is_workday(date(2026, 10, 5)))
+        self.assertTrue(calendar.is_workday(date(2026, 10, 10)))
+        self.assertEqual(calendar.fallback_lookups, 0)
+
+    def test_missing_days_fall_back_to_monday_to_friday(self):
+        calendar = self.calendar()
+        calendar.prefetch([2026])
+        self.assertTrue(calendar.is_workday(date(2026, 10, 14)))
+        self.assertFalse(calendar.is_workday(date(2026, 10, 17)))
+        self.assertTrue(calendar.is_workday(date(2031, 3, 3)))
+        self.assertEqual(calendar.fallback_lookups, 3)
+
+    def test_cache_survives_restart(self):
+        self.calendar().prefetch([2026])
+        calendar = self.calendar(FailingProvider())
+        calendar.load()
+        self.assertFalse(calendar.is_workday(date(2026, 10, 5)))
+        self.assertEqual(calendar.fallback_lookups, 0)
+
+    def test_fetch_failure_keeps_local_data(self):
+        self.calendar().prefetch([2026])
+        calendar = self.calendar(FailingProvider())
+        calendar.load()
+        changed = []
+        calendar.add_listener(changed.append)
+        self.assertFalse(calendar.prefetch([2026], force=True))
+        self.assertEqual(calendar.fetch_failures, 1)
+        self.assertEqual(changed, [])
+        self.assertTrue(calendar.is_workday(date(2026, 10, 10)))
+
+    def test_update_notifies_listeners(self):
+        calendar = self.calendar()
+        changed = []
+        calendar.add_listener(changed.append)
+        calendar.prefetch([2026, 2027])
+        self.assertEqual(changed, [[2026, 2027]])
+
+    def test_incomplete_year_needs_refresh(self):
+        calendar = self.calendar()
+        calendar.prefetch([2026])
+        self.assertTrue(calendar.needs_refresh(2026))
+        calendar.update(2020, {date(2020, 1, 1) + timedelta(days=i): True for i in range(366)})
+        self.assertFalse(calendar.needs_refresh(2020))
+
+    def test_corrupt_cache_is_ignored(self):
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        calendar = self.calendar()
+        calendar.load()
+        self.assertTrue(calendar.is_workday(date(2026, 10, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
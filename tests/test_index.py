@@ -0,0 +1,121 @@
+"""
+任务索引：名称子串检索、按类型/周期/状态筛选、保持任务顺序；引擎的筛选与即将触发列表
+"""
+import unittest
+from datetime import datetime, timedelta
+
+from core import Task
+from index import TaskIndex
+from tests.test_engine import EngineTestCase, reminder
+
+
+def task(task_id, name, **fields):
+    return Task.from_dict(dict({'id': task_id, 'name': name, 'cycle_type': '每天', 'time': '09:00'}, **fields))
+
+
+class TaskIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TaskIndex()
+        self.index.rebuild([
+            task('1', '每日备份 Backup'),
+            task('2', '下班关机', type='关机', cycle_type='法定工作日'),
+            task('3', '喝水', cycle_type='时间间隔', interval='01:00:00'),
+            task('4', '周报备份', cycle_type='周末', status='禁用'),
+        ])
+
+    def test_empty_query_lists_all_in_order(self):
+        self.assertEqual(self.index.search(), ['1', '2', '3', '4'])
+        self.assertEqual(self.index.search('  '), ['1', '2', '3', '4'])
+        self.assertEqual(len(self.index), 4)
+
+    def test_substring_ignores_case(self):
+        self.assertEqual(self.index.search('备份'), ['1', '4'])
+        self.assertEqual(self.index.search('BACKup'), ['1'])
+        self.assertEqual(self.index.search(' ckU '), ['1'])
+        self.assertEqual(self.index.search('每日备份 b'), ['1'])
+        self.assertEqual(self.index.search('备份周报'), [])
+
+    def test_single_character_scans_names(self):
+        self.assertEqual(self.index.search('水'), ['3'])
+        self.assertEqual(self.index.search('份'), ['1', '4'])
+
+    def test_all_grams_present_but_not_contiguous(self):
+        # “日备”“备份”都在“每日备份”中，但“日备份”必须连续出现
+        self.index.add(task('5', '日备-备份'))
+        self.assertEqual(self.index.search('日备份'), ['1'])
+
+    def test_conditions_intersect(self):
+        self.assertEqual(self.index.search(status='启用'), ['1', '2', '3'])
+        self.assertEqual(self.index.search('备份', status='启用'), ['1'])
+        self.assertEqual(self.index.search(type='关机', cycle_type='法定工作日'), ['2'])
+        self.assertEqual(self.index.search(type='关机', cycle_type='每天'), [])
+        self.assertEqual(self.index.search(type='锁定'), [])
+        self.assertEqual(self.index.search(type=None, cycle_type=None, status=None), ['1', '2', '3', '4'])
+
+    def test_ids_restrict_results(self):
+        self.assertEqual(self.index.search(ids={'4', '3', 'x'}), ['3', '4'])
+        self.assertEqual(self.index.search('备份', ids={'4'}), ['4'])
+        self.assertEqual(self.index.search(ids=set()), [])
+
+    def test_replace_keeps_position_and_updates_groups(self):
+        self.index.add(task('1', '改名', status='禁用'))
+        self.assertEqual(self.index.search(), ['1', '2', '3', '4'])
+        self.assertEqual(self.index.search('备份'), ['4'])
+        self.assertEqual(self.index.search('改名'), ['1'])
+        self.assertEqual(self.index.search(status='禁用'), ['1', '4'])
+
+    def test_remove_and_readd_goes_to_end(self):
+        self.index.remove('2')
+        self.assertEqual(self.index.search('关机'), [])
+        self.assertEqual(self.index.search(type='关机'), [])
+        # 倒排表中不留空集合
+        self.assertNotIn('下班', self.index._grams)
+        self.index.add(task('2', '下班关机', type='关机'))
+        self.assertEqual(self.index.search(), ['1', '3', '4', '2'])
+        self.index.remove('missing')
+        self.assertEqual(len(self.index), 4)
+
+
+class EngineFilterTest(EngineTestCase):
+    def setUp(self):
+        super().setUp()
+        now = datetime.now(self.engine.backend.timezone)
+        self.soon = (now + timedelta(minutes=30)).strftime('%H:%M:%S')
+        self.later = (now + timedelta(hours=3)).strftime('%H:%M:%S')
+        self.engine.upsert_tasks([
+            Task.from_dict(reminder('a', name='午饭', time=self.soon)),
+            Task.from_dict(reminder('b', name='午休', time=self.later)),
+            Task.from_dict(reminder('c', name='晚饭', time=self.soon, status='禁用')),
+        ])
+
+    def filter_ids(self, *args, **kwargs):
+        return [task.id for task in self.engine.filter_tasks(*args, **kwargs)]
+
+    def test_filter_by_text_status_and_window(self):
+        self.assertEqual(self.filter_ids('饭'), ['a', 'c'])
+        self.assertEqual(self.filter_ids('饭', status='启用'), ['a'])
+        self.assertEqual(self.filter_ids(within=3600), ['a'])
+        self.assertEqual(self.filter_ids('午', within=4 * 3600), ['a', 'b'])
+        self.assertEqual(self.filter_ids(task_type='关机'), [])
+
+    def test_filter_follows_changes(self):
+        self.engine.remove_task('a')
+        self.engine.set_enabled('c', True)
+        self.assertEqual(self.filter_ids('饭'), ['c'])
+        self.assertEqual(self.filter_ids(within=3600), ['c'])
+
+    def test_upcoming_fires_in_time_order(self):
+        fires = self.engine.upcoming_fires(limit=5)
+        self.assertEqual([task.id for _, task in fires], ['a', 'b', 'a', 'b', 'a'])
+        times = [fire_time for fire_time, _ in fires]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(times[2] - times[0], timedelta(days=1))
+
+    def test_upcoming_fires_until(self):
+        until = datetime.now(self.engine.backend.timezone) + timedelta(hours=1)
+        self.assertEqual([task.id for _, task in self.engine.upcoming_fires(until=until)], ['a'])
+        self.assertEqual(self.engine.upcoming_fires(limit=0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
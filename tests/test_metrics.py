@@ -0,0 +1,88 @@
+"""
+运行指标：带标签的计数器、累计直方图、回调取值的 gauge，快照文件与只读 HTTP 接口
+"""
+import os
+import json
+import shutil
+import socket
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+from metrics import Histogram, Metrics, MetricsExporter
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class MetricsTest(unittest.TestCase):
+    def test_counters_with_labels(self):
+        metrics = Metrics()
+        metrics.inc('skipped_fires', reason='misfire')
+        metrics.inc('skipped_fires', 2, reason='misfire')
+        metrics.inc('action_results', action='关机', outcome='ok')
+        self.assertEqual(metrics.snapshot()['counters'], {
+            'skipped_fires{reason=misfire}': 3, 'action_results{action=关机,outcome=ok}': 1,
+        })
+
+    def test_histogram_buckets_are_cumulative(self):
+        hist = Histogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            hist.observe(value)
+        snapshot = hist.snapshot()
+        self.assertEqual(snapshot['buckets'], {'0.1': 2, '1': 3, '+Inf': 4})
+        self.assertEqual((snapshot['count'], snapshot['max'], snapshot['sum']), (4, 3, 3.65))
+
+    def test_timer_observes_duration(self):
+        metrics = Metrics()
+        with metrics.timer('reload_schedules_seconds'):
+            pass
+        self.assertEqual(metrics.snapshot()['histograms']['reload_schedules_seconds']['count'], 1)
+
+    def test_gauge_callbacks(self):
+        metrics = Metrics()
+        metrics.set_gauge('tasks', 3)
+        metrics.register_gauge('executor_queue_depth', lambda: {(('executor', 'system'),): 2})
+        metrics.register_gauge('broken', lambda: 1 / 0)
+        self.assertEqual(metrics.snapshot()['gauges'], {'tasks': 3, 'executor_queue_depth{executor=system}': 2})
+
+
+class MetricsExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.metrics = Metrics()
+        self.metrics.inc('fires', type='提醒')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_snapshot_written_on_stop(self):
+        path = os.path.join(self.tmpdir, 'metrics.json')
+        exporter = MetricsExporter(self.metrics, path, interval=3600)
+        exporter.start()
+        exporter.stop()
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['counters'], {'fires{type=提醒}': 1})
+        self.assertEqual(os.listdir(self.tmpdir), ['metrics.json'])
+
+    def test_http_endpoint(self):
+        port = free_port()
+        exporter = MetricsExporter(self.metrics, http_port=port)
+        exporter.start()
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as resp:
+                self.assertEqual(json.load(resp)['counters'], {'fires{type=提醒}': 1})
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/other', timeout=5)
+            self.assertEqual(cm.exception.code, 404)
+            cm.exception.close()
+        finally:
+            exporter.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+提醒队列：同一任务合并计数、按最小间隔限流、队列满时丢弃最早的提醒，以及合并通知的文本
+"""
+import threading
+import unittest
+
+from notify import ReminderQueue, format_reminders
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def task(task_id, content=''):
+    return {'id': task_id, 'name': f'任务{task_id}', 'content': content}
+
+
+class ReminderQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = ReminderQueue(max_pending=3, min_interval=3.0, max_batch=2, clock=self.clock)
+
+    def test_repeated_fires_coalesce_with_latest_task(self):
+        self.queue.push(task('a', '旧'))
+        self.queue.push(task('b'))
+        self.queue.push(task('a', '新'))
+        self.assertEqual(len(self.queue), 2)
+        self.assertEqual(self.queue.pop_ready(), [(task('a', '新'), 2), (task('b'), 1)])
+
+    def test_rate_limit_and_batch_size(self):
+        for task_id in 'abc':
+            self.queue.push(task(task_id))
+        self.assertEqual([t['id'] for t, _ in self.queue.pop_ready()], ['a', 'b'])
+        self.clock.now += 1
+        self.assertEqual(self.queue.pop_ready(), [])
+        self.clock.now += 2
+        self.assertEqual([t['id'] for t, _ in self.queue.pop_ready()], ['c'])
+        self.clock.now += 10
+        self.assertEqual(self.queue.pop_ready(), [])
+
+    def test_full_queue_drops_oldest(self):
+        for task_id in 'abcde':
+            self.queue.push(task(task_id))
+        self.assertEqual(len(self.queue), 3)
+        self.assertEqual(self.queue.take_dropped(), 2)
+        self.assertEqual(self.queue.take_dropped(), 0)
+        self.assertEqual([t['id'] for t, _ in self.queue.pop_ready()], ['c', 'd'])
+
+    def test_burst_from_many_threads_stays_bounded(self):
+        queue = ReminderQueue(max_pending=50)
+
+        def burst(offset):
+            for i in range(1000):
+                queue.push(task((offset + i) % 80))
+        threads = [threading.Thread(target=burst, args=(n * 7,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(queue), 50)
+
+
+class FormatRemindersTest(unittest.TestCase):
+    def test_single_reminder(self):
+        self.assertEqual(format_reminders([(task('a', '喝水'), 3)]), ('提醒：任务a', '喝水（3次）'))
+        self.assertEqual(format_reminders([(task('a'), 1)]), ('提醒：任务a', '时间到了！'))
+
+    def test_batch_with_remaining_and_dropped(self):
+        title, body = format_reminders([(task('a', '喝水'), 1), (task('b'), 2)], dropped=4, remaining=1)
+        self.assertEqual(title, '提醒：2个任务')
+        self.assertEqual(body.splitlines(), [
+            '任务a：喝水', '任务b：时间到了！（2次）', '还有1个提醒稍后显示', '提醒过多，已丢弃4个较早的提醒',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+执行策略：按任务类型分配线程池，任务单独设置的并发数、合并、容错时间覆盖 settings.json 的默认值
+"""
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+try:
+    from PyQt5.QtWidgets import QApplication
+except ImportError:  # 无界面环境未安装 PyQt5
+    QApplication = None
+
+from backends import create_backend
+from config import load_settings
+from core import Task, job_options
+from metrics import Metrics
+from triggers import WeekdayTrigger
+
+
+def task(**fields):
+    return Task.from_dict(dict({'id': 't', 'name': '任务', 'cycle_type': '每天', 'time': '09:00'}, **fields))
+
+
+class JobOptionsTest(unittest.TestCase):
+    def test_executor_by_type(self):
+        self.assertEqual(job_options(task()), {'executor': 'reminder'})
+        for ttype in ('关机', '重启', '锁定'):
+            self.assertEqual(job_options(task(type=ttype)), {'executor': 'system'})
+
+    def test_task_overrides(self):
+        options = job_options(task(max_instances=3, coalesce=False, misfire_grace_time=600))
+        self.assertEqual(options, {'executor': 'reminder', 'max_instances': 3, 'coalesce': False, 'misfire_grace_time': 600})
+        # 0 表示不限制补执行时间
+        self.assertIsNone(job_options(task(misfire_grace_time=0))['misfire_grace_time'])
+
+    def test_invalid_overrides_are_rejected(self):
+        self.assertRaises(ValueError, task, max_instances=0)
+        self.assertRaises(ValueError, task, misfire_grace_time=-1)
+
+
+class SettingsTest(unittest.TestCase):
+    def test_partial_settings_merge_with_defaults(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'settings.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'executors': {'system': 1}, 'job_defaults': {'misfire_grace_time': 300}}, f)
+            settings = load_settings(path)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        self.assertEqual(settings['executors'], {'default': 4, 'reminder': 4, 'network': 2, 'system': 1})
+        self.assertEqual(settings['job_defaults'], {'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 300})
+        self.assertEqual(load_settings(None)['job_defaults']['misfire_grace_time'], 60)
+
+
+class APSchedulerOptionsTest(unittest.TestCase):
+    def setUp(self):
+        settings = load_settings(None)
+        settings['jobstore']['path'] = None
+        settings['job_defaults']['misfire_grace_time'] = 300
+        self.backend = create_backend(settings, Metrics(), lambda *args, **kwargs: None)
+        self.backend.start(paused=True)
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def job(self, item):
+        self.backend.schedule(item.id, WeekdayTrigger(times=item.times), None, job_options(item))
+        return self.backend.scheduler.get_job(f'task_{item.id}', jobstore='tasks')
+
+    def test_defaults_apply_to_unset_fields(self):
+        job = self.job(task(type='关机'))
+        self.assertEqual((job.executor, job.max_instances, job.coalesce, job.misfire_grace_time), ('system', 1, True, 300))
+
+    def test_task_fields_override_defaults(self):
+        job = self.job(task(max_instances=2, coalesce=False, misfire_grace_time=0))
+        self.assertEqual((job.executor, job.max_instances, job.coalesce, job.misfire_grace_time), ('reminder', 2, False, None))
+
+
+@unittest.skipIf(QApplication is None, '未安装 PyQt5')
+class TaskDialogPolicyTest(unittest.TestCase):
+    DEFAULTS = {'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 300}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def dialog(self, data=None):
+        from gui import TaskDialog
+        return TaskDialog(None, data, self.DEFAULTS)
+
+    def test_unchanged_policy_follows_settings(self):
+        result = self.dialog({'name': '喝水', 'type': '提醒', 'cycle_type': '每天', 'time': '09:00:00'}).get_task()
+        for key in ('max_instances', 'coalesce', 'misfire_grace_time'):
+            self.assertNotIn(key, result)
+
+    def test_changed_and_explicit_policy_is_kept(self):
+        dialog = self.dialog({'name': '喝水', 'type': '提醒', 'cycle_type': '每天', 'time': '09:00:00', 'coalesce': True})
+        dialog.misfire_spin.setValue(60)
+        result = dialog.get_task()
+        self.assertEqual((result['coalesce'], result['misfire_grace_time']), (True, 60))
+        self.assertNotIn('max_instances', result)
+
+
+if __name__ == '__main__':
+    unittest.main()
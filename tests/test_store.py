@@ -0,0 +1,99 @@
+"""
+任务存储：增量写入、批量事务、按位置流式读取、旧 tasks.json 的一次性迁移
+"""
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from store import TaskStore
+
+
+class TaskStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'tasks.db')
+        self.json_path = os.path.join(self.tmpdir, 'tasks.json')
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def open(self):
+        store = TaskStore(self.db_path, legacy_json=self.json_path)
+        self.stores.append(store)
+        return store
+
+    def write_json(self, value):
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+
+    def test_upsert_keeps_position(self):
+        store = self.open()
+        store.upsert_many([{'id': 'a', 'name': '一'}, {'id': 'b', 'name': '二'}])
+        store.upsert({'id': 'a', 'name': '改'})
+        store.upsert({'id': 'c', 'name': '三'})
+        self.assertEqual([(t['id'], t['name']) for t in store.iter_tasks(batch_size=2)], [('a', '改'), ('b', '二'), ('c', '三')])
+
+    def test_apply_is_atomic(self):
+        store = self.open()
+        store.upsert_many([{'id': 'a'}, {'id': 'b'}])
+        with self.assertRaises(TypeError):
+            # 第二条无法序列化，整个事务回滚
+            store.apply([{'id': 'c'}, {'id': 'd', 'bad': object()}], ['a'])
+        self.assertEqual([t['id'] for t in store.iter_tasks()], ['a', 'b'])
+        store.apply([{'id': 'c'}], ['a'])
+        self.assertEqual([t['id'] for t in store.iter_tasks()], ['b', 'c'])
+
+    def test_corrupt_record_is_skipped(self):
+        store = self.open()
+        store.upsert_many([{'id': 'a'}, {'id': 'b'}])
+        with store.transaction() as conn:
+            conn.execute("UPDATE tasks SET data = '{broken' WHERE id = 'a'")
+        self.assertEqual([t['id'] for t in store.iter_tasks()], ['b'])
+
+    def test_migrate_json(self):
+        self.write_json([{'name': '喝水'}, {'id': 'x', 'name': '关机'}])
+        store = self.open()
+        tasks = list(store.iter_tasks())
+        self.assertEqual([t['name'] for t in tasks], ['喝水', '关机'])
+        self.assertTrue(tasks[0]['id'])
+        self.assertFalse(os.path.exists(self.json_path))
+        self.assertTrue(os.path.exists(self.json_path + '.migrated'))
+
+    def test_migration_skipped_when_database_has_tasks(self):
+        self.open().upsert({'id': 'a'})
+        self.write_json([{'id': 'b'}])
+        self.assertEqual([t['id'] for t in self.open().iter_tasks()], ['a'])
+        self.assertTrue(os.path.exists(self.json_path))
+
+    def test_bad_legacy_file_is_left_in_place(self):
+        for content in ('{not json', '{"id": "a"}', '[{"id": "a"}, "b"]', '[1, 2]'):
+            with self.subTest(content=content):
+                with open(self.json_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                store = self.open()
+                self.assertEqual(store.count(), 0)
+                self.assertTrue(os.path.exists(self.json_path))
+
+    def test_write_failure_leaves_legacy_file(self):
+        # id 为列表时 SQLite 无法绑定参数
+        self.write_json([{'id': ['a'], 'name': '喝水'}])
+        store = self.open()
+        self.assertEqual(store.count(), 0)
+        self.assertTrue(os.path.exists(self.json_path))
+
+    def test_data_survives_reopen(self):
+        self.open().upsert({'id': 'a', 'name': '喝水'})
+        self.assertEqual(list(self.open().iter_tasks()), [{'id': 'a', 'name': '喝水'}])
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+任务模型：加载时一次性校验，格式有误的记录给出原因；未选择星期的自定义任务按禁用加载
+"""
+import shutil
+import tempfile
+import unittest
+
+from core import Task, build_trigger, describe_cycle
+from tests.test_engine import make_engine
+
+
+def task_dict(**fields):
+    return dict({'id': 't', 'name': '任务', 'type': '提醒', 'cycle_type': '每天', 'time': '09:00'}, **fields)
+
+
+class FromDictTest(unittest.TestCase):
+    def test_parses_once(self):
+        task = Task.from_dict(task_dict(time='9:00, 21:30:15', remind_start='08:00', remind_end='22:00'))
+        self.assertEqual(task.times, ((9, 0, 0), (21, 30, 15)))
+        self.assertEqual(task.time, '09:00:00,21:30:15')
+        self.assertEqual((task.remind_start, task.remind_end), ('08:00', '22:00'))
+        self.assertEqual(Task.from_dict(task.to_dict()).to_dict(), task.to_dict())
+
+    def test_rejects_invalid_records(self):
+        cases = [
+            task_dict(name=''),
+            task_dict(name=None),
+            task_dict(type='未知'),
+            task_dict(cycle_type='每月'),
+            task_dict(status='暂停'),
+            task_dict(time='25:00'),
+            task_dict(time='09:xx'),
+            task_dict(cycle_type='时间间隔', interval='00:00:00'),
+            task_dict(cycle_type='Cron表达式', cron=''),
+            task_dict(cycle_type='Cron表达式', cron='61 * * * *'),
+            task_dict(cycle_type='自定义', days=[7]),
+            task_dict(cycle_type='自定义', days=['1']),
+            task_dict(cycle_type='自定义', days=[]),
+            task_dict(remind_start='8点'),
+            task_dict(max_instances=0),
+            task_dict(max_instances='x'),
+            task_dict(misfire_grace_time=-1),
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    Task.from_dict(data)
+
+    def test_disabled_custom_task_without_days_is_unscheduled(self):
+        task = Task.from_dict(task_dict(cycle_type='自定义', days=[], status='禁用'))
+        self.assertEqual(task.days, [])
+        self.assertIsNone(build_trigger(task, shared=False))
+        self.assertEqual(describe_cycle(task), '未选择星期')
+        with self.assertRaises(ValueError):
+            task.replace(status='启用')
+        self.assertEqual(task.replace(days=[0, 4], status='启用').days, [0, 4])
+
+    def test_missing_id_is_generated(self):
+        self.assertTrue(Task.from_dict(task_dict(id=None)).id)
+
+
+class LoadTasksTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = make_engine(self.tmpdir)
+        self.engine.store.upsert_many([
+            task_dict(id='ok'),
+            task_dict(id='nodays', cycle_type='自定义', days=[]),
+            task_dict(id='bad', cycle_type='时间间隔', interval='00:00:00'),
+        ])
+
+    def tearDown(self):
+        self.engine.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_custom_task_without_days_is_migrated_to_disabled(self):
+        with self.assertLogs(level='WARNING'):
+            self.engine.load_tasks()
+        self.assertEqual(list(self.engine.tasks), ['ok', 'nodays'])
+        self.assertEqual(self.engine.tasks['nodays'].status, '禁用')
+        stored = {task['id']: task for task in self.engine.store.iter_tasks()}
+        self.assertEqual(stored['nodays']['status'], '禁用')
+        self.assertEqual(list(self.engine.invalid_records), ['bad'])
+
+    def test_enabling_without_days_is_refused(self):
+        self.engine.load_tasks()
+        with self.assertRaises(ValueError):
+            self.engine.set_enabled('nodays', True)
+        self.assertEqual(self.engine.tasks['nodays'].status, '禁用')
+
+
+if __name__ == '__main__':
+    unittest.main()
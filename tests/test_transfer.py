@@ -0,0 +1,202 @@
+"""
+导入/导出：三种格式往返一致（含多个时间点和Cron表达式），解析外部 iCalendar 文件（折行、转义、BYDAY），错误带行号；
+命令行导入在一个事务中流式写入，已有实例在运行时经控制接口交给它导入
+"""
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from control import ControlServer
+from core import Task
+from store import TaskStore
+from transfer import export_tasks, import_tasks, normalize_task, read_tasks, run_cli
+from tests.test_engine import make_engine
+
+TASKS = [
+    {'id': 'a1', 'name': '喝水, 休息', 'type': '提醒', 'content': '第一行\n第二行', 'cycle_type': '自定义',
+     'days': [0, 2, 4], 'time': '15:30:15', 'remind_start': '08:00', 'remind_end': '18:00'},
+    {'id': 'a2', 'name': '吃药', 'type': '提醒', 'cycle_type': '每天', 'time': '08:00,12:30:00,21:00',
+     'remind_start': '07:00', 'remind_end': '22:00'},
+    {'id': 'a3', 'name': '关机', 'type': '关机', 'cycle_type': '法定工作日', 'time': '22:00', 'status': '禁用'},
+    {'id': 'a4', 'name': '检查', 'type': '提醒', 'cycle_type': '时间间隔', 'interval': '01:30:00',
+     'remind_start': '07:00', 'remind_end': '22:00'},
+    {'id': 'a5', 'name': '月初汇总, 周一例会', 'type': '锁定', 'cycle_type': 'Cron表达式', 'cron': '0 9 1 * 1'},
+]
+
+EXTERNAL_ICS = (
+    'BEGIN:VCALENDAR\r\n'
+    'VERSION:2.0\r\n'
+    'BEGIN:VEVENT\r\n'
+    'UID:ext-1\r\n'
+    'DTSTART;TZID=Asia/Shanghai:20261005T073000\r\n'
+    'RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR\r\n'
+    'SUMMARY:晨跑\\, 拉伸\r\n'
+    'DESCRIPTION:这是一段很长的说明，\r\n'
+    ' 被折成了两行\r\n'
+    'END:VEVENT\r\n'
+    'BEGIN:VEVENT\r\n'
+    'UID:ext-2\r\n'
+    'DTSTART:20261005T080000\r\n'
+    'SUMMARY:单次会议\r\n'
+    'END:VEVENT\r\n'
+    'END:VCALENDAR\r\n'
+)
+
+
+class TransferTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.tasks = [Task.from_dict(task).to_dict() for task in TASKS]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def test_round_trip(self):
+        for name in ('tasks.csv', 'tasks.jsonl', 'tasks.ics'):
+            with self.subTest(format=name):
+                self.assertEqual(export_tasks(iter(self.tasks), self.path(name)), len(self.tasks))
+                tasks, errors = read_tasks(self.path(name), batch_size=3)
+                self.assertEqual(errors, [])
+                self.assertEqual(tasks, self.tasks)
+
+    def test_external_ics(self):
+        with open(self.path('ext.ics'), 'w', encoding='utf-8', newline='') as f:
+            f.write(EXTERNAL_ICS)
+        tasks, errors = read_tasks(self.path('ext.ics'))
+        self.assertEqual(len(tasks), 1)
+        task = tasks[0]
+        self.assertEqual(task['name'], '晨跑, 拉伸')
+        self.assertEqual(task['content'], '这是一段很长的说明，被折成了两行')
+        self.assertEqual((task['cycle_type'], task['days'], task['time']), ('自定义', [0, 2, 4], '07:30:00'))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][0], 11)
+        self.assertIn('不支持的重复规则', errors[0][1])
+
+    def test_invalid_rows_report_line_numbers(self):
+        with open(self.path('bad.jsonl'), 'w', encoding='utf-8') as f:
+            f.write('{"name": "好", "cycle_type": "每天", "time": "08:00"}\n')
+            f.write('{"name": "坏", "cycle_type": "每天", "time": "25:00"}\n')
+            f.write('not json\n')
+        tasks, errors = read_tasks(self.path('bad.jsonl'))
+        self.assertEqual([task['name'] for task in tasks], ['好'])
+        self.assertEqual([line_no for line_no, _ in errors], [2, 3])
+
+    def test_normalize_keeps_unset_policy_fields_unset(self):
+        record = normalize_task({'name': '喝水', 'cycle_type': '周末', 'days': '周一', 'coalesce': '是'})
+        self.assertEqual(record['days'], [])
+        self.assertIs(record['coalesce'], True)
+        self.assertNotIn('max_instances', record)
+        self.assertNotIn('misfire_grace_time', record)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        self.rundir = os.path.join(self.tmpdir, 'run')
+        os.mkdir(self.rundir)
+        os.chdir(self.rundir)
+        self.path = os.path.join(self.tmpdir, 'tasks.jsonl')
+        export_tasks([Task.from_dict(task).to_dict() for task in TASKS], self.path)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"name": "坏", "cycle_type": "每天", "time": "25:00"}\n')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_import_streams_in_one_transaction(self):
+        store = TaskStore(os.path.join(self.tmpdir, 'tasks.db'), legacy_json=None)
+        transactions = []
+        transaction = store.transaction
+
+        def counting_transaction():
+            transactions.append(1)
+            return transaction()
+        store.transaction = counting_transaction
+        try:
+            count, errors = import_tasks(store, self.path, batch_size=2)
+            self.assertEqual((count, [line for line, _ in errors]), (len(TASKS), [len(TASKS) + 1]))
+            self.assertEqual(len(transactions), 1)
+            self.assertEqual([task['id'] for task in store.iter_tasks()], [task['id'] for task in TASKS])
+        finally:
+            store.close()
+
+    def test_read_failure_rolls_back(self):
+        with open(self.path, 'ab') as f:
+            f.write(b'\xff\xfe\n')
+        store = TaskStore(os.path.join(self.tmpdir, 'tasks.db'), legacy_json=None)
+        try:
+            with self.assertRaises(UnicodeDecodeError):
+                import_tasks(store, self.path, batch_size=2)
+            self.assertEqual(store.count(), 0)
+        finally:
+            store.close()
+
+    def test_cli_writes_database_when_no_instance_runs(self):
+        with redirect_stdout(StringIO()) as out:
+            code = run_cli(self.path, settings={'control': {'port': free_port(), 'token': 'x'}})
+        self.assertEqual(code, 0)
+        self.assertIn(f'已导入{len(TASKS)}个任务，跳过1条无效记录', out.getvalue())
+        store = TaskStore(legacy_json=None)
+        try:
+            self.assertEqual(store.count(), len(TASKS))
+        finally:
+            store.close()
+
+    def test_cli_hands_import_to_running_instance(self):
+        engine = make_engine(self.tmpdir)
+        engine.start(refresh_holidays=False, paused=True)
+        engine.add_task({'id': 'a1', 'name': '旧名称', 'cycle_type': '每天'})
+        port = free_port()
+        control = ControlServer(port, 'secret')
+        self.assertTrue(control.bind())
+        control.start(engine)
+        try:
+            with redirect_stdout(StringIO()) as out:
+                code = run_cli(self.path, settings={'control': {'port': port, 'token': 'secret'}})
+        finally:
+            control.stop()
+            engine.shutdown()
+            engine.store.close()
+        self.assertEqual(code, 0, out.getvalue())
+        self.assertIn(f'导入{len(TASKS)}个任务并立即调度，跳过1条无效记录', out.getvalue())
+        # 已存在的任务ID整条覆盖，导入的任务已调度，本目录下没有另写 tasks.db
+        self.assertEqual(engine.tasks['a1'].name, '喝水, 休息')
+        self.assertEqual(sorted(engine.job_signatures), sorted(task['id'] for task in TASKS))
+        self.assertEqual(os.listdir(self.rundir), [])
+
+    def test_cli_reports_wrong_token(self):
+        engine = make_engine(self.tmpdir)
+        engine.start(refresh_holidays=False, paused=True)
+        port = free_port()
+        control = ControlServer(port, 'secret')
+        control.bind()
+        control.start(engine)
+        try:
+            with redirect_stdout(StringIO()) as out:
+                code = run_cli(self.path, settings={'control': {'port': port, 'token': 'wrong'}})
+        finally:
+            control.stop()
+            engine.shutdown()
+            engine.store.close()
+        self.assertEqual(code, 1)
+        self.assertIn('运行中的实例拒绝导入：口令错误', out.getvalue())
+        self.assertEqual(engine.tasks, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+触发器：法定日触发器只在匹配日期唤醒，带提醒时间段的间隔触发器在时间段外不唤醒
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+from holiday import HolidayCalendar, StaticHolidayProvider
+from core import Task, build_trigger
+from triggers import HolidayTrigger, WeekdayTrigger, WindowedIntervalTrigger, window_contains
+
+TZ = ZoneInfo('Asia/Shanghai')
+
+
+def at(*args):
+    return datetime(*args, tzinfo=TZ)
+
+
+def fires(trigger, now, count):
+    result, previous = [], None
+    for _ in range(count):
+        previous = now = trigger.get_next_fire_time(previous, now)
+        result.append(now.strftime('%m-%d %H:%M'))
+    return result
+
+
+class HolidayTriggerTest(unittest.TestCase):
+    # 2026 国庆：10-01 至 10-08 放假（10-03、10-04 为周末），10-10 周六调休上班
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        data = {date(2026, 10, day): False for day in range(1, 9)}
+        data[date(2026, 10, 10)] = True
+        self.calendar = HolidayCalendar(StaticHolidayProvider(data), cache_path=os.path.join(self.tmpdir, 'holidays.json'))
+        self.calendar.prefetch([2026])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_workday_skips_holidays_and_includes_adjusted_saturday(self):
+        trigger = HolidayTrigger(True, ((9, 0, 0), (18, 0, 0)), TZ, self.calendar)
+        self.assertEqual(fires(trigger, at(2026, 9, 30, 12, 0), 6), [
+            '09-30 18:00', '10-09 09:00', '10-09 18:00', '10-10 09:00', '10-10 18:00', '10-12 09:00',
+        ])
+
+    def test_holiday_only_fires_on_days_off(self):
+        trigger = HolidayTrigger(False, ((10, 0, 0),), TZ, self.calendar)
+        self.assertEqual(fires(trigger, at(2026, 10, 7, 11, 0), 3), ['10-08 10:00', '10-11 10:00', '10-17 10:00'])
+
+    def test_calendar_update_moves_next_fire(self):
+        trigger = HolidayTrigger(True, ((9, 0, 0),), TZ, self.calendar)
+        self.assertEqual(fires(trigger, at(2026, 10, 9, 10, 0), 1), ['10-10 09:00'])
+        self.calendar.update(2026, {date(2026, 10, 10): False})
+        self.assertEqual(fires(trigger, at(2026, 10, 9, 10, 0), 1), ['10-12 09:00'])
+
+    def test_pickle_uses_default_calendar(self):
+        trigger = pickle.loads(pickle.dumps(HolidayTrigger(False, ((8, 30, 0),), TZ, self.calendar)))
+        self.assertIsNone(trigger.calendar)
+        self.assertEqual((trigger.workday, trigger.times[0].strftime('%H:%M'), trigger.timezone), (False, '08:30', TZ))
+
+
+class WeekdayTriggerTest(unittest.TestCase):
+    def test_selected_days_and_times(self):
+        # 2026-10-16 为周五
+        trigger = WeekdayTrigger([0, 4], ((8, 0, 0), (20, 0, 0)), TZ)
+        self.assertEqual(fires(trigger, at(2026, 10, 16, 9, 0), 4), ['10-16 20:00', '10-19 08:00', '10-19 20:00', '10-23 08:00'])
+
+    def test_pickle_round_trip(self):
+        trigger = pickle.loads(pickle.dumps(WeekdayTrigger([5, 6], ((7, 0, 0),), TZ)))
+        self.assertEqual(trigger.days, [5, 6])
+        self.assertEqual(fires(trigger, at(2026, 10, 16, 9, 0), 2), ['10-17 07:00', '10-18 07:00'])
+
+
+class WindowedIntervalTriggerTest(unittest.TestCase):
+    def trigger(self, start, end, hours, start_date):
+        return WindowedIntervalTrigger(time(*start), time(*end), hours=hours, start_date=start_date, timezone=TZ)
+
+    def test_window_contains_whole_end_minute_and_midnight(self):
+        self.assertTrue(window_contains(time(9), time(18), time(18, 0, 59)))
+        self.assertFalse(window_contains(time(9), time(18), time(18, 1)))
+        self.assertTrue(window_contains(time(22), time(6), time(23, 30)))
+        self.assertTrue(window_contains(time(22), time(6), time(2)))
+        self.assertFalse(window_contains(time(22), time(6), time(12)))
+
+    def test_day_window_jumps_to_next_morning(self):
+        trigger = self.trigger((9, 0), (18, 0), 4, at(2026, 10, 16, 8, 0))
+        self.assertEqual(fires(trigger, at(2026, 10, 16, 8, 0), 5), [
+            '10-16 09:00', '10-16 13:00', '10-16 17:00', '10-17 09:00', '10-17 13:00',
+        ])
+
+    def test_window_across_midnight(self):
+        trigger = self.trigger((22, 0), (6, 0), 3, at(2026, 10, 16, 20, 0))
+        self.assertEqual(fires(trigger, at(2026, 10, 16, 20, 0), 5), [
+            '10-16 22:00', '10-17 01:00', '10-17 04:00', '10-17 22:00', '10-18 01:00',
+        ])
+
+    def test_pickle_keeps_window(self):
+        trigger = pickle.loads(pickle.dumps(self.trigger((22, 0), (6, 0), 3, at(2026, 10, 16, 20, 0))))
+        self.assertEqual((trigger.window_start, trigger.window_end), (time(22), time(6)))
+        self.assertEqual(fires(trigger, at(2026, 10, 17, 7, 0), 1), ['10-17 22:00'])
+
+    def test_fixed_times_outside_window_are_dropped(self):
+        task = {'name': '喝水', 'cycle_type': '每天', 'time': '07:00, 12:00', 'remind_start': '09:00', 'remind_end': '18:00'}
+        trigger = build_trigger(Task.from_dict(task), shared=False)
+        self.assertEqual([t.strftime('%H:%M') for t in trigger.times], ['12:00'])
+        self.assertIsNone(build_trigger(Task.from_dict(dict(task, time='07:00')), shared=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
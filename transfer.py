@@ -0,0 +1,438 @@
+"""
+任务批量导入/导出：CSV、JSON Lines、iCalendar，逐行流式读写，大文件也不会整体读入内存
+"""
+import os
+import re
+import csv
+import json
+from datetime import date
+from core import CYCLE_TYPES, WEEKDAY_NAMES, Task, parse_hms
+from store import new_task_id
+
+# 扩展名 -> 格式
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.ics': 'ics',
+}
+
+CSV_FIELDS = [
+    'id', 'name', 'type', 'content', 'cycle_type', 'days', 'time', 'interval', 'cron', 'status',
+    'remind_start', 'remind_end', 'max_instances', 'coalesce', 'misfire_grace_time'
+]
+
+# iCalendar 的星期代码，顺序与 WEEKDAY_NAMES 一致
+ICS_DAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+ICS_UNITS = {'HOURLY': 3600, 'MINUTELY': 60, 'SECONDLY': 1}
+
+_DAY_SPLIT = re.compile(r'[,，|、;；\s]+')
+_TRUE = {'1', 'true', 'yes', 'y', '是', '启用'}
+_FALSE = {'0', 'false', 'no', 'n', '否', '', '禁用'}
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f'无法识别的文件格式：{ext or path}，支持 {"、".join(FORMATS)}')
+    return FORMATS[ext]
+
+
+def _days(value):
+    # 星期名称或数字 -> 数字列表，取值范围由 Task.from_dict 校验
+    if isinstance(value, str):
+        value = [item for item in _DAY_SPLIT.split(value.strip()) if item]
+    elif value and not isinstance(value, (list, tuple)):
+        raise ValueError(f'星期应为列表或逗号分隔的文本：{value}')
+    days = set()
+    for item in value or []:
+        if isinstance(item, str) and item in WEEKDAY_NAMES:
+            days.add(WEEKDAY_NAMES.index(item))
+            continue
+        try:
+            days.add(int(item))
+        except (TypeError, ValueError):
+            raise ValueError(f'无法识别的星期：{item}')
+    return sorted(days)
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f'无法识别的布尔值：{value}')
+
+
+def _int(value, field):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError(f'{field}应为整数：{value}')
+
+
+def _text(value, default):
+    # 时间可以是列表（JSON）或字符串，其余类型按字符串处理
+    if not value:
+        return default
+    return value if isinstance(value, list) else str(value)
+
+
+def normalize_task(raw):
+    """
+    把一条外部记录转换为 Task.from_dict 接受的字典：星期名称转为数字，布尔、整数文本转为对应类型，
+    补上 id 和默认值；字段是否有效由 Task.from_dict 统一校验，转换失败时抛出 ValueError
+    """
+    ttype = str(raw.get('type') or '提醒').strip()
+    cycle_type = str(raw.get('cycle_type') or '').strip()
+    task = {
+        'id': str(raw.get('id') or '').strip() or new_task_id(),
+        'name': str(raw.get('name') or '').strip(),
+        'type': ttype,
+        'content': str(raw.get('content') or '').strip(),
+        'cycle_type': cycle_type,
+        'days': _days(raw.get('days')) if cycle_type == '自定义' else [],
+        'time': _text(raw.get('time'), '00:00:00'),
+        'interval': _text(raw.get('interval'), '00:00:00'),
+        'status': '启用' if _bool(raw.get('status', '启用') or '启用') else '禁用',
+    }
+    if raw.get('cron'):
+        task['cron'] = str(raw['cron'])
+    # 执行策略只在输入中给出时写入，未给出的随 settings.json 的 job_defaults
+    if raw.get('max_instances') not in (None, ''):
+        task['max_instances'] = _int(raw['max_instances'], '最大并发数')
+    if raw.get('coalesce') not in (None, ''):
+        task['coalesce'] = _bool(raw['coalesce'])
+    if raw.get('misfire_grace_time') not in (None, ''):
+        task['misfire_grace_time'] = _int(raw['misfire_grace_time'], '补执行容错')
+    if ttype == '提醒':
+        # 未给出时间段时不限制，全天都可提醒
+        task['remind_start'] = _text(raw.get('remind_start'), '00:00')
+        task['remind_end'] = _text(raw.get('remind_end'), '23:59')
+    return task
+
+
+def _read_csv(f):
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _read_jsonl(f):
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f'JSON 解析失败：{e}')
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValueError('每行应为一个 JSON 对象')
+            continue
+        yield line_no, record
+
+
+def _ics_unescape(value):
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def _ics_lines(f):
+    # 展开折行：以空格或制表符开头的行接在上一行后面
+    current, start = None, 0
+    for line_no, line in enumerate(f, 1):
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, line_no
+    if current is not None:
+        yield start, current
+
+
+def _ics_event(props):
+    # VEVENT 属性 -> 任务记录；法定日周期等无法用 RRULE 表达的字段放在 X-DINGSHI-* 中
+    record = {
+        'id': props.get('UID', ''),
+        'name': _ics_unescape(props.get('SUMMARY', '')),
+        'content': _ics_unescape(props.get('DESCRIPTION', '')),
+        'type': props.get('X-DINGSHI-TYPE', '提醒'),
+        'status': '禁用' if props.get('STATUS') == 'CANCELLED' else '启用',
+        'remind_start': props.get('X-DINGSHI-REMIND-START'),
+        'remind_end': props.get('X-DINGSHI-REMIND-END'),
+    }
+    dtstart = props.get('DTSTART', '')
+    match = re.search(r'T(\d{2})(\d{2})(\d{2})', dtstart)
+    if not match:
+        raise ValueError(f'DTSTART 缺少时间：{dtstart}')
+    record['time'] = props.get('X-DINGSHI-TIMES') or ':'.join(match.groups())
+    if props.get('X-DINGSHI-CRON'):
+        record['cron'] = props['X-DINGSHI-CRON']
+    rule = dict(part.split('=', 1) for part in props.get('RRULE', '').split(';') if '=' in part)
+    freq = rule.get('FREQ')
+    byday = [day[-2:] for day in rule.get('BYDAY', '').split(',') if day]
+    if props.get('X-DINGSHI-CYCLE') in CYCLE_TYPES:
+        record['cycle_type'] = props['X-DINGSHI-CYCLE']
+    elif freq == 'DAILY' and rule.get('INTERVAL', '1') == '1':
+        record['cycle_type'] = '每天'
+    elif freq == 'WEEKLY' and byday:
+        record['cycle_type'] = '周末' if sorted(byday) == ['SA', 'SU'] else '自定义'
+    elif freq in ICS_UNITS:
+        record['cycle_type'] = '时间间隔'
+    else:
+        raise ValueError(f'不支持的重复规则：{props.get("RRULE") or "无（单次事件）"}')
+    if byday:
+        unknown = [day for day in byday if day not in ICS_DAYS]
+        if unknown:
+            raise ValueError(f'无法识别的星期：{",".join(unknown)}')
+        record['days'] = [ICS_DAYS.index(day) for day in byday]
+    if freq in ICS_UNITS:
+        total = int(rule.get('INTERVAL', '1')) * ICS_UNITS[freq]
+        record['interval'] = f'{total // 3600:02d}:{total // 60 % 60:02d}:{total % 60:02d}'
+    return record
+
+
+def _read_ics(f):
+    props, start = None, 0
+    for line_no, line in _ics_lines(f):
+        if line == 'BEGIN:VEVENT':
+            props, start = {}, line_no
+        elif line == 'END:VEVENT' and props is not None:
+            try:
+                yield start, _ics_event(props)
+            except ValueError as e:
+                yield start, e
+            props = None
+        elif props is not None and ':' in line:
+            name, value = line.split(':', 1)
+            # 忽略 TZID 等参数，时间按本地时间处理
+            props[name.split(';', 1)[0].upper()] = value
+
+
+READERS = {'csv': _read_csv, 'jsonl': _read_jsonl, 'ics': _read_ics}
+
+
+def iter_batches(path, fmt=None, batch_size=500):
+    """
+    流式读取文件，每 batch_size 条校验一次，逐批返回 (有效任务列表, [(行号, 错误信息)])
+    """
+    reader = READERS[detect_format(path, fmt)]
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        records = []
+        for item in reader(f):
+            records.append(item)
+            if len(records) >= batch_size:
+                yield _validate(records)
+                records = []
+        if records:
+            yield _validate(records)
+
+
+def _validate(records):
+    tasks, errors = [], []
+    for line_no, record in records:
+        if isinstance(record, Exception):
+            errors.append((line_no, str(record)))
+            continue
+        try:
+            tasks.append(Task.from_dict(normalize_task(record)).to_dict())
+        except (ValueError, TypeError) as e:
+            errors.append((line_no, str(e)))
+    return tasks, errors
+
+
+def read_tasks(path, fmt=None, batch_size=500):
+    """读取并校验整个文件，返回 (有效任务列表, 错误列表)；界面导入先列出错误再确认，需要全部结果"""
+    tasks, errors = [], []
+    for batch, batch_errors in iter_batches(path, fmt, batch_size):
+        tasks.extend(batch)
+        errors.extend(batch_errors)
+    return tasks, errors
+
+
+def import_tasks(store, path, fmt=None, batch_size=500):
+    """
+    流式读取并校验文件，有效任务边读边在同一个事务中写入 store，不整体读入内存，
+    返回 (导入条数, [(行号, 错误信息)])；读取中途出错时整个事务回滚
+    """
+    errors = []
+    count = 0
+
+    def valid_tasks():
+        nonlocal count
+        for batch, batch_errors in iter_batches(path, fmt, batch_size):
+            errors.extend(batch_errors)
+            count += len(batch)
+            yield from batch
+    store.upsert_many(valid_tasks())
+    return count, errors
+
+
+def _csv_row(task):
+    row = {field: task.get(field, '') for field in CSV_FIELDS}
+    row['days'] = ','.join(WEEKDAY_NAMES[i] for i in task.get('days', []))
+    return row
+
+
+def _ics_escape(value):
+    return str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_fold(line):
+    # 每行不超过75字节，续行以空格开头
+    out, current, size = [], '', 0
+    for ch in line:
+        width = len(ch.encode('utf-8'))
+        if size + width > 75:
+            out.append(current)
+            current, size = ' ', 1
+        current += ch
+        size += width
+    out.append(current)
+    return '\r\n'.join(out) + '\r\n'
+
+
+def _ics_event_lines(task, today):
+    times = task.get('time', '00:00:00')
+    h, m, s = parse_hms(times.split(',')[0])
+    cycle_type = task['cycle_type']
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{task["id"]}',
+        f'DTSTAMP:{today}T000000',
+        f'DTSTART:{today}T{h:02d}{m:02d}{s:02d}',
+        f'SUMMARY:{_ics_escape(task["name"])}',
+    ]
+    if task.get('content'):
+        lines.append(f'DESCRIPTION:{_ics_escape(task["content"])}')
+    if cycle_type == '每天':
+        lines.append('RRULE:FREQ=DAILY')
+    elif cycle_type in ('周末', '法定节假日'):
+        # 法定日无法用 RRULE 表达，按周末/工作日近似，原周期写在 X-DINGSHI-CYCLE
+        lines.append('RRULE:FREQ=WEEKLY;BYDAY=SA,SU')
+    elif cycle_type == '法定工作日':
+        lines.append('RRULE:FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR')
+    elif cycle_type == '自定义':
+        lines.append('RRULE:FREQ=WEEKLY;BYDAY=' + ','.join(ICS_DAYS[i] for i in task.get('days', [])))
+    elif cycle_type == '时间间隔':
+        ih, im, isec = parse_hms(task.get('interval', '00:00:00'))
+        lines.append(f'RRULE:FREQ=SECONDLY;INTERVAL={max(ih * 3600 + im * 60 + isec, 1)}')
+    if task.get('status', '启用') != '启用':
+        lines.append('STATUS:CANCELLED')
+    lines.append(f'X-DINGSHI-CYCLE:{cycle_type}')
+    lines.append(f'X-DINGSHI-TYPE:{task.get("type", "提醒")}')
+    if ',' in times:
+        # 多个时间点无法用一条 RRULE 表达，DTSTART 只写第一个
+        lines.append(f'X-DINGSHI-TIMES:{times}')
+    if task.get('cron'):
+        lines.append(f'X-DINGSHI-CRON:{task["cron"]}')
+    if task.get('remind_start'):
+        lines.append(f'X-DINGSHI-REMIND-START:{task["remind_start"]}')
+        lines.append(f'X-DINGSHI-REMIND-END:{task.get("remind_end", "23:59")}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def export_tasks(tasks, path, fmt=None):
+    """
+    逐条写出任务（可传入生成器，如 TaskStore.iter_tasks()），先写临时文件再替换，返回写出的条数
+    """
+    fmt = detect_format(path, fmt)
+    tmp_path = path + '.tmp'
+    count = 0
+    # CSV 带 BOM，Excel 打开中文不乱码
+    encoding = 'utf-8-sig' if fmt == 'csv' else 'utf-8'
+    with open(tmp_path, 'w', encoding=encoding, newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for task in tasks:
+                writer.writerow(_csv_row(task))
+                count += 1
+        elif fmt == 'jsonl':
+            for task in tasks:
+                f.write(json.dumps(task, ensure_ascii=False) + '\n')
+                count += 1
+        else:
+            today = date.today().strftime('%Y%m%d')
+            f.write('BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//dingshitixing//CN\r\n')
+            for task in tasks:
+                for line in _ics_event_lines(task, today):
+                    f.write(_ics_fold(line))
+                count += 1
+            f.write('END:VCALENDAR\r\n')
+    os.replace(tmp_path, path)
+    return count
+
+
+def _print_errors(errors, limit=50):
+    for line_no, message in errors[:limit]:
+        print(f'第{line_no}行：{message}')
+    if len(errors) > limit:
+        print(f'……共{len(errors)}条错误')
+
+
+def _import_to_running(path, port, token, batch_size=500):
+    """
+    已有实例在运行时经控制接口导入，由该实例写入并立即调度（直接写 tasks.db 的话它要到重启才会调度）；
+    每批一个请求，按任务ID新增或覆盖
+    """
+    from control import call
+    count, errors = 0, []
+    try:
+        for batch, batch_errors in iter_batches(path, batch_size=batch_size):
+            errors.extend(batch_errors)
+            if not batch:
+                continue
+            status, data = call(port, 'POST', '/tasks/create', {'tasks': batch, 'replace': True}, token=token, timeout=120)
+            if status != 200:
+                print(f"运行中的实例拒绝导入：{data.get('error') or status}")
+                for item in data.get('errors', [])[:50]:
+                    print(f"本批第{item['index'] + 1}条：{item['error']}")
+                print(f'此前已导入{count}个任务')
+                return 1
+            count += data['created']
+    except OSError as e:
+        print(f'连接运行中的实例（端口{port}）失败：{e}，此前已导入{count}个任务')
+        return 1
+    _print_errors(errors)
+    print(f'已通过运行中的实例（端口{port}）导入{count}个任务并立即调度，跳过{len(errors)}条无效记录')
+    return 0
+
+
+def run_cli(import_path=None, export_path=None, settings=None):
+    """
+    命令行导入/导出：没有实例在运行时直接读写 tasks.db，导入的任务在程序下次启动时调度；
+    已有实例在运行时（控制接口可用）导入交给该实例处理
+    """
+    from store import TaskStore
+    if import_path:
+        from config import load_settings
+        from control import is_running, load_token
+        options = (settings if settings is not None else load_settings())['control']
+        port = options.get('port')
+        if port and is_running(port):
+            code = _import_to_running(import_path, port, load_token(options))
+            if code or not export_path:
+                return code
+            import_path = None
+    store = TaskStore()
+    try:
+        if import_path:
+            count, errors = import_tasks(store, import_path)
+            _print_errors(errors)
+            print(f'已导入{count}个任务，跳过{len(errors)}条无效记录')
+        if export_path:
+            count = export_tasks(store.iter_tasks(), export_path)
+            print(f'已导出{count}个任务到 {export_path}')
+    finally:
+        store.close()
+    return 0